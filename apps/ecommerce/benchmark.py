@@ -0,0 +1,105 @@
+# apps/ecommerce/benchmark.py
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+# (nombre, url, máximo de consultas, máximo de ms). Los presupuestos de consultas
+# son fijos: no deben crecer con el volumen sembrado; si crecen hay un N+1.
+# Los verifica apps/ecommerce/tests.py; `benchmark_endpoints` mide los tiempos.
+ENDPOINTS = [
+    ('products.data', '/api/products/data/', 5, 3000),
+    ('products.active', '/api/products/active/', 5, 3000),
+    ('products.page', '/api/products/data/?limit=50', 5, 1000),
+    ('customers.data', '/api/customers/data/', 5, 3000),
+    ('customers.page', '/api/customers/data/?limit=50', 5, 1000),
+    ('customers.detail', '/api/customers/{customer}/', 6, 1000),
+    ('sales.data', '/api/sales/data/', 6, 5000),
+    ('sales.page', '/api/sales/data/?limit=50', 6, 1000),
+    ('sales.items_with_stock', '/api/sales/{sale}/items_with_stock/', 9, 1000),
+    ('suppliers.data', '/api/suppliers/data/', 6, 3000),
+    ('requirements.data', '/api/requirements/data/', 6, 3000),
+    ('cotizacion.envios', '/api/cotizacion/envios/data/', 5, 3000),
+    ('purchasing.suppliers', '/purchasing/api/suppliers/', 6, 1000),
+    ('purchasing.products', '/purchasing/api/products/', 6, 1000),
+]
+
+
+def seed(customers=200, products=200, sales=200, quotations=50, items_per_sale=3):
+    """Sembrar clientes, productos, ventas, cotizaciones y órdenes de compra.
+
+    Devuelve los ids que completan las URLs de ENDPOINTS más el usuario
+    con el que se hacen las peticiones.
+    """
+    from apps.ecommerce.categories.models import Category
+    from apps.ecommerce.cotizacion.models import EnvioCotizacion
+    from apps.ecommerce.customers.models import Customer, CustomerContact
+    from apps.ecommerce.products.models import Product
+    from apps.ecommerce.purchasing.services import PurchaseOrderManagementService
+    from apps.ecommerce.requirements.models import Requirement
+    from apps.ecommerce.sales.models import Sale
+    from apps.ecommerce.suppliers.models import Supplier
+
+    user = User.objects.create_superuser('benchmark', password='benchmark')
+    categories = [Category.objects.create(name=f'Categoría {i}', detail='Benchmark') for i in range(5)]
+
+    product_list = [
+        Product.objects.create(
+            name=f'Producto {i}', category=categories[i % len(categories)],
+            price=Decimal(10 + i % 90), stock_current=100, stock_minimum=10, stock_maximum=500
+        )
+        for i in range(products)
+    ]
+    customer_list = [
+        Customer.objects.create(document_type='1', document_number=f'{10000000 + i}', first_name=f'Cliente {i}')
+        for i in range(customers)
+    ]
+    CustomerContact.objects.bulk_create([
+        CustomerContact(customer=customer, name='Contacto') for customer in customer_list
+    ])
+    suppliers = [
+        Supplier.objects.create(
+            company_name=f'Proveedor {i}', contact_person='Benchmark', tax_id=f'20{i:09d}',
+            phone_primary='999999999', address_line1='Av. Benchmark', city='Lima', state='Lima'
+        )
+        for i in range(max(5, quotations // 5))
+    ]
+
+    per_sale = max(1, min(items_per_sale, len(product_list)))
+    sale_list = [
+        Sale.objects.create_with_items(
+            [{'product': product_list[(i + k) % len(product_list)], 'quantity': 1 + k} for k in range(per_sale)],
+            customer=customer_list[i % len(customer_list)] if customer_list else None,
+            payment_method='efectivo',
+            created_by=user,
+        )
+        for i in range(sales)
+    ]
+
+    # Un envío por (requerimiento, proveedor): cada requerimiento se cotiza a todos los proveedores
+    requirement = None
+    for i in range(quotations):
+        if i % len(suppliers) == 0:
+            requirement = Requirement.objects.create(usuario_solicitante=user, fecha_requerimiento=date.today())
+        EnvioCotizacion.objects.create(
+            requerimiento=requirement, proveedor=suppliers[i % len(suppliers)], usuario_creacion=user,
+            metodo_envio='email', fecha_respuesta_esperada=date.today() + timedelta(days=7)
+        )
+
+    # Algunas órdenes de compra para las estadísticas de purchasing
+    service = PurchaseOrderManagementService()
+    for i, supplier in enumerate(suppliers):
+        service.create_purchase_order({
+            'supplier_id': supplier.id,
+            'expected_delivery': date.today() + timedelta(days=7),
+            'items': [
+                {'product_id': product_list[(i + k) % len(product_list)].id, 'quantity_ordered': 5, 'unit_price': 10 + k}
+                for k in range(min(3, len(product_list)))
+            ],
+        }, user)
+
+    return {
+        'user': user,
+        'customer': customer_list[0].id if customer_list else 0,
+        'sale': sale_list[0].id if sale_list else 0,
+    }
@@ -1,19 +1,95 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
+import asyncio
 import json
 
+from apps.notification.realtime import bind_server_loop
+from .products.broadcast import LOW_STOCK_GROUP, STOCK_GROUP, category_group
+
 class StockConsumer(AsyncWebsocketConsumer):
+    """Actualizaciones de stock en tiempo real.
+
+    Al conectarse el socket recibe todo el catálogo (`stock_group`). Con
+    mensajes `subscribe` / `unsubscribe` el cliente puede limitarse a
+    categorías o solo stock bajo (la lista de productos lo hace según sus
+    filtros):
+
+        {"type": "subscribe", "categories": [1, 2], "low_stock": true}
+        {"type": "unsubscribe", "categories": [1]}
+        {"type": "subscribe", "all": true}
+    """
+
     async def connect(self):
-        await self.channel_layer.group_add("stock_group", self.channel_name)
+        bind_server_loop(asyncio.get_running_loop())
+        self.groups_joined = set()
+        await self._join(STOCK_GROUP)
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("stock_group", self.channel_name)
+        for group in getattr(self, 'groups_joined', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
 
     async def receive(self, text_data):
-        pass  # No necesitamos recibir nada del cliente por ahora
+        try:
+            message = json.loads(text_data)
+            message_type = message.get('type')
+
+            if message_type == 'subscribe':
+                await self.subscribe(self._topics(message), message.get('all', False))
+            elif message_type == 'unsubscribe':
+                await self.unsubscribe(self._topics(message))
+            else:
+                return
+
+            await self.send(text_data=json.dumps({
+                'type': 'subscriptions',
+                'topics': sorted(self.groups_joined),
+            }))
+        except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Mensaje de suscripción inválido'
+            }))
+
+    def _topics(self, message):
+        """Grupos pedidos en un mensaje subscribe/unsubscribe"""
+        topics = {category_group(int(pk)) for pk in message.get('categories', [])}
+        if message.get('low_stock'):
+            topics.add(LOW_STOCK_GROUP)
+        return topics
+
+    async def subscribe(self, topics, everything=False):
+        if everything:
+            await self._join(STOCK_GROUP)
+        elif topics:
+            # Al elegir temas se deja de recibir el catálogo completo
+            await self._leave(STOCK_GROUP)
+        for group in topics:
+            await self._join(group)
+
+    async def unsubscribe(self, topics):
+        for group in topics:
+            await self._leave(group)
+
+    async def _join(self, group):
+        if group not in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.groups_joined.add(group)
+
+    async def _leave(self, group):
+        if group in self.groups_joined:
+            await self.channel_layer.group_discard(group, self.channel_name)
+            self.groups_joined.discard(group)
 
     async def send_stock_update(self, event):
         await self.send(text_data=json.dumps({
             'type': 'stock_update',
             'data': event['data'],
         }))
+
+    async def send_stock_batch(self, event):
+        """Cambios agrupados por StockBroadcaster: una lista con el último estado de cada producto"""
+        await self.send(text_data=json.dumps({
+            'type': 'stock_update',
+            'batch': True,
+            'data': event['data'],
+        }))
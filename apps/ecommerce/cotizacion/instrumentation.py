@@ -0,0 +1,78 @@
+# apps/ecommerce/cotizacion/instrumentation.py
+import functools
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def excel_debug_enabled():
+    """Detalle fila por fila solo si COTIZACION_EXCEL_DEBUG está activo"""
+    return getattr(settings, 'COTIZACION_EXCEL_DEBUG', False)
+
+
+class PhaseTimer:
+    """Acumula duraciones por fase y contadores de filas de un procesamiento.
+
+    Uso:
+        timer = PhaseTimer()
+        with timer.phase('read'):
+            ...
+        timer.count('filas_leidas', 500)
+        timer.as_dict()  # -> se guarda en ExcelProcessingLog.metricas
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counters = defaultdict(int)
+        self._started = perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += perf_counter() - start
+
+    def count(self, name, value=1):
+        self.counters[name] += int(value)
+
+    @property
+    def total_seconds(self):
+        return perf_counter() - self._started
+
+    def as_dict(self):
+        total = self.total_seconds
+        filas = self.counters.get('filas_leidas', 0)
+        return {
+            'fases': {name: round(seconds, 4) for name, seconds in self.durations.items()},
+            'filas': dict(self.counters),
+            'total_segundos': round(total, 4),
+            'filas_por_segundo': round(filas / total, 1) if total > 0 else 0,
+        }
+
+    def log_summary(self, label):
+        metrics = self.as_dict()
+        logger.info(
+            f"{label}: {metrics['total_segundos']}s, {metrics['filas_por_segundo']} filas/s, "
+            f"fases={metrics['fases']}, filas={metrics['filas']}"
+        )
+
+
+def timed_phase(name):
+    """Decorador: mide el método dentro de la fase `name` del `self.timer` del objeto"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            timer = getattr(self, 'timer', None)
+            if timer is None:
+                return func(self, *args, **kwargs)
+            with timer.phase(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
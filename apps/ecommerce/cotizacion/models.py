@@ -222,10 +222,14 @@ def procesar_respuesta_automatica(self):
 
 
 class RespuestaCotizacion(models.Model):
+    # NULL mientras se carga desde Excel: la respuesta en preparación no
+    # reemplaza a la vigente hasta que el archivo se procesa completo
     envio = models.OneToOneField(
         EnvioCotizacion, 
         on_delete=models.CASCADE, 
         related_name='respuesta',
+        null=True,
+        blank=True,
         verbose_name="Envío"
     )
     fecha_respuesta = models.DateTimeField(auto_now_add=True, verbose_name="Fecha Respuesta")
@@ -268,6 +272,8 @@ class Meta:
         verbose_name_plural = "Respuestas de Cotizaciones"
     
     def __str__(self):
+        if self.envio_id is None:
+            return f"Respuesta {self.id} (en preparación)"
         return f"Respuesta {self.envio.numero_envio}"
     
     @property
@@ -430,6 +436,12 @@ class ExcelProcessingLog(models.Model):
         verbose_name="Procesado Por"
     )
     tiempo_procesamiento = models.DurationField(null=True, blank=True, verbose_name="Tiempo de Procesamiento")
+    metricas = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Métricas",
+        help_text="Duración por fase (read, validate, resolve_codes, parse, insert) y conteo de filas"
+    )
     errores_detallados = models.TextField(blank=True, null=True, verbose_name="Errores Detallados")
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Procesamiento")
@@ -460,4 +472,81 @@ def resumen_validacion(self):
             'total_advertencias': len(self.advertencias_validacion),
             'codigos_validos': self.codigos_validos,
             'precios_validos': self.precios_validos
-        }
\ No newline at end of file
+        }
+
+class ExcelProcessingJob(models.Model):
+    """Trabajo en cola para procesar respuestas Excel fuera del request"""
+
+    TIPO_CHOICES = [
+        ('upload', 'Carga de Archivo'),
+        ('reprocess', 'Reprocesamiento'),
+    ]
+
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completado', 'Completado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    envio = models.ForeignKey(
+        EnvioCotizacion,
+        on_delete=models.CASCADE,
+        related_name='processing_jobs',
+        verbose_name="Envío"
+    )
+    log = models.OneToOneField(
+        ExcelProcessingLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='job',
+        verbose_name="Log de Procesamiento"
+    )
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, default='upload', verbose_name="Tipo")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', verbose_name="Estado")
+    archivo = models.FileField(
+        upload_to='cotizaciones/respuestas_clientes/',
+        blank=True,
+        null=True,
+        verbose_name="Archivo Subido",
+        help_text="Pasa a ser el archivo del envío solo si el procesamiento termina bien"
+    )
+
+    progreso = models.PositiveSmallIntegerField(default=0, verbose_name="Progreso (%)")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    resultado = models.JSONField(default=dict, blank=True, verbose_name="Resultado")
+    error = models.TextField(blank=True, null=True, verbose_name="Error")
+
+    creado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Creado Por"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Inicio")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Trabajo de Procesamiento Excel"
+        verbose_name_plural = "Trabajos de Procesamiento Excel"
+        indexes = [
+            models.Index(fields=['estado', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} - {self.envio.numero_envio} - {self.estado}"
+
+    @property
+    def terminado(self):
+        return self.estado in ('completado', 'fallido')
+
+    @property
+    def duracion(self):
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
+        return None
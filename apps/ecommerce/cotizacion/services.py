@@ -1,5 +1,4 @@
 # apps/ecommerce/cotizacion/services.py
-import openpyxl
 import re
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from io import BytesIO
@@ -10,20 +9,34 @@
 from datetime import date, timedelta
 import logging
 from apps.ecommerce.requirements.services import RequirementExcelGenerator
+from .services_excel import CotizacionExcelStreamReader
+from .instrumentation import PhaseTimer, excel_debug_enabled, timed_phase
 import pandas as pd
-from decimal import Decimal, InvalidOperation
-import logging
+import numpy as np
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 
 logger = logging.getLogger(__name__)
 
 class CotizacionResponseProcessor:
     """Procesador automático de respuestas de cotización desde Excel"""
+
+    # Filas por bloque al leer/insertar en streaming
+    EXCEL_CHUNK_SIZE = 500
     
-    def __init__(self, envio_cotizacion):
+    def __init__(self, envio_cotizacion, progress_callback=None, on_publish=None):
         self.envio = envio_cotizacion
+        # Llamado tras cada bloque con (filas_leidas, productos_procesados, filas_estimadas)
+        self.progress_callback = progress_callback
+        # Llamado con la respuesta publicada, dentro de la misma transacción del reemplazo
+        self.on_publish = on_publish
         self.errors = []
         self.warnings = []
         self.processed_items = []
+        # Caché código (en mayúsculas) -> id de producto, None si no existe
+        self._code_cache = {}
+        # Tiempos por fase y conteo de filas; el detalle por fila solo con COTIZACION_EXCEL_DEBUG
+        self.timer = PhaseTimer()
+        self.debug = excel_debug_enabled()
         
         # Mapeo oficial de columnas según tu template
         self.OFFICIAL_COLUMNS = {
@@ -39,759 +52,458 @@ def __init__(self, envio_cotizacion):
         }
         
     def _validate_excel_from_file(self, file_obj):
-        """Validar archivo Excel directamente desde el objeto file"""
-        print(f"\n=== INICIANDO VALIDACIÓN DE ARCHIVO EN MEMORIA ===")
-        
+        """Validar archivo Excel directamente desde el objeto file (sin guardar nada)"""
         try:
-            # Resetear posición del archivo
-            file_obj.seek(0)
-            
-            print("\n[1/3] Leyendo archivo Excel desde memoria...")
-            df = pd.read_excel(file_obj, engine='openpyxl')
-            print(f"✔ Archivo leído correctamente. Filas: {len(df)}, Columnas: {len(df.columns)}")
-            
-            # NO resetear aquí - mantener posición para que Django pueda leer después
-            
-            errors = []
-            warnings = []
-            
-            print(f"\n[2/3] Validando estructura...")
-            if len(df.columns) < len(self.OFFICIAL_COLUMNS):
-                error_msg = f"El archivo debe tener al menos {len(self.OFFICIAL_COLUMNS)} columnas"
-                errors.append(error_msg)
-                return {
-                    'valid': False,
-                    'errors': errors,
-                    'warnings': warnings,
-                    'dataframe': None
-                }
-            
-            if len(df) == 0:
-                errors.append("El archivo Excel está vacío")
+            result = self._scan_excel_stream(file_obj)
+        except Exception as e:
+            logger.warning(f"Excepción validando Excel del envío {self.envio.id}: {e}")
+            return {
+                'valid': False,
+                'errors': [f"Error leyendo archivo: {str(e)}"],
+                'warnings': [],
+                'codigos': set(),
+                'total_filas': 0
+            }
+
+        self.timer.log_summary(f"Validación Excel envío {self.envio.id} ({'válido' if result['valid'] else 'inválido'})")
+        return result
+
+    def _validate_structure(self, file_obj):
+        """Validación rápida de estructura: solo lee la fila de encabezados"""
+        try:
+            reader = CotizacionExcelStreamReader(file_obj, self.OFFICIAL_COLUMNS)
+        except Exception as e:
+            return [f"Error leyendo archivo: {str(e)}"]
+
+        try:
+            if len(reader.header) < len(self.OFFICIAL_COLUMNS):
+                return [f"El archivo debe tener al menos {len(self.OFFICIAL_COLUMNS)} columnas"]
+            return []
+        finally:
+            reader.close()
+
+    def _scan_excel_stream(self, file_obj, respuesta=None):
+        """Recorrer el Excel una sola vez en modo read_only.
+
+        Acumula las estadísticas de validación y, si se recibe `respuesta`,
+        inserta los detalles por bloques durante la misma pasada.
+        """
+        with self.timer.phase('read'):
+            reader = CotizacionExcelStreamReader(file_obj, self.OFFICIAL_COLUMNS)
+        errors = []
+        warnings = []
+        codigos = set()
+        success_count = 0
+
+        try:
+            if len(reader.header) < len(self.OFFICIAL_COLUMNS):
+                errors.append(f"El archivo debe tener al menos {len(self.OFFICIAL_COLUMNS)} columnas")
                 return {
                     'valid': False,
                     'errors': errors,
                     'warnings': warnings,
-                    'dataframe': None
+                    'codigos': codigos,
+                    'total_filas': 0,
+                    'success_count': 0,
+                    'estadisticas': {}
                 }
-            
-            print(f"\n[3/3] Validando contenido...")
-            # Validar códigos y precios
-            codigo_col_pos = self.OFFICIAL_COLUMNS['CÓDIGO']
-            precio_col_pos = self.OFFICIAL_COLUMNS['PRECIO U.']
-            
-            codigo_vals = df.iloc[:, codigo_col_pos].dropna()
-            precio_vals = df.iloc[:, precio_col_pos].dropna()
-            
-            if codigo_vals.empty:
+
+            total_precios = 0
+            precios_validos = 0
+            chunks = reader.chunks(self.EXCEL_CHUNK_SIZE)
+
+            while True:
+                with self.timer.phase('read'):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                self.timer.count('filas_leidas', len(chunk))
+
+                with self.timer.phase('validate'):
+                    codigos_chunk = self._text_column(chunk, 'CÓDIGO').dropna()
+                    precios_str = self._text_column(chunk, 'PRECIO U.').dropna()
+                    precios = self._numeric_column(precios_str, strip_currency=True)
+
+                    codigos.update(codigos_chunk)
+                    total_precios += len(precios_str)
+                    precios_validos += int((precios > 0).sum())
+
+                # Llena la caché de códigos para que la inserción no repita la consulta
+                self._build_product_code_map(codigos_chunk.unique())
+
+                if respuesta is not None:
+                    success_count += self._process_products_fixed(chunk, respuesta)
+
+                if self.progress_callback:
+                    self.progress_callback(reader.total_filas, success_count, reader.estimated_rows)
+        finally:
+            reader.close()
+
+        total_filas = reader.total_filas
+        codes_in_file = {codigo.upper() for codigo in codigos}
+        matching_codes = {codigo for codigo in codes_in_file if self._code_cache.get(codigo)}
+
+        if total_filas == 0:
+            errors.append("El archivo Excel está vacío")
+        else:
+            if not codes_in_file:
                 warnings.append("La columna CÓDIGO está completamente vacía")
-            
-            if precio_vals.empty:
+            elif not matching_codes:
+                errors.append("No se encontraron códigos de productos válidos en el archivo")
+            elif len(matching_codes) < len(codes_in_file) / 2:
+                warnings.append(f"Solo {len(matching_codes)} de {len(codes_in_file)} códigos son válidos")
+
+            if total_precios == 0:
                 warnings.append("La columna PRECIO U. está completamente vacía")
-            
-            # Validar códigos de productos
-            if not codigo_vals.empty:
-                from apps.ecommerce.products.models import Product
-                valid_codes = set(Product.objects.values_list('code', flat=True))
-                codes_in_file = set(str(code).strip().upper() for code in codigo_vals if str(code).strip().upper() != 'NAN')
-                matching_codes = codes_in_file & valid_codes
-                
-                if not matching_codes:
-                    errors.append("No se encontraron códigos de productos válidos en el archivo")
-                elif len(matching_codes) < len(codes_in_file) / 2:
-                    warnings.append(f"Solo {len(matching_codes)} de {len(codes_in_file)} códigos son válidos")
-            
-            # Validar precios
-            if not precio_vals.empty:
-                precios_validos = sum(1 for precio in precio_vals if self._parse_price_safe(precio) is not None)
-                if precios_validos == 0:
-                    errors.append("No se encontraron precios válidos en el archivo")
-                elif precios_validos < len(precio_vals) / 2:
-                    warnings.append(f"Solo {precios_validos} de {len(precio_vals)} precios son válidos")
-            
-            is_valid = len(errors) == 0
-            print(f"\n=== RESULTADO VALIDACIÓN: {'VÁLIDO' if is_valid else 'INVÁLIDO'} ===")
-            
-            return {
-                'valid': is_valid,
-                'errors': errors,
-                'warnings': warnings,
-                'dataframe': df if is_valid else None
-            }
-            
-        except Exception as e:
-            print(f"\n!!! EXCEPCIÓN DURANTE VALIDACIÓN: {str(e)}")
-            return {
-                'valid': False,
-                'errors': [f"Error leyendo archivo: {str(e)}"],
-                'warnings': [],
-                'dataframe': None
+            elif precios_validos == 0:
+                errors.append("No se encontraron precios válidos en el archivo")
+            elif precios_validos < total_precios / 2:
+                warnings.append(f"Solo {precios_validos} de {total_precios} precios son válidos")
+
+        return {
+            'valid': len(errors) == 0,
+            'errors': errors,
+            'warnings': warnings,
+            'codigos': codigos,
+            'total_filas': total_filas,
+            'success_count': success_count,
+            'estadisticas': {
+                'codigos_validos': len(matching_codes),
+                'codigos_invalidos': len(codes_in_file) - len(matching_codes),
+                'precios_validos': precios_validos,
+                'precios_invalidos': total_precios - precios_validos
             }
+        }
+
     def process_excel_from_memory(self, file_obj):
-        """Procesar archivo Excel directamente desde memoria"""
+        """Procesar archivo Excel directamente desde memoria (validación e inserción en una pasada).
+
+        Los detalles se cargan en una respuesta en preparación (sin envío) y
+        cada bloque se confirma en su propia transacción, así el progreso
+        reportado por `progress_callback` es visible mientras se procesa y no
+        se retiene el bloqueo de escritura durante todo el archivo. Solo si el
+        archivo es válido la respuesta nueva reemplaza a la vigente, en una
+        única transacción; si no, se descarta y la anterior queda intacta.
+        """
         from datetime import datetime
-        
-        print("\n" + "="*50)
-        print("PROCESAMIENTO DE ARCHIVO EXCEL EN MEMORIA")
-        print("="*50)
-        
+
         start_time = datetime.now()
-        
+        respuesta = None
+
         try:
-            # Validar archivo
-            validation_result = self._validate_excel_from_file(file_obj)
-            
-            if not validation_result['valid']:
-                print("\n✖ Validación fallida:")
-                for error in validation_result['errors']:
-                    print(f"  - {error}")
+            # Respuesta en preparación: la vigente no se toca hasta terminar
+            respuesta = self._create_cotizacion_response()
+
+            scan = self._scan_excel_stream(file_obj, respuesta)
+
+            if not scan['valid']:
+                self._discard_response(respuesta)
+                logger.info(f"Excel del envío {self.envio.id} no válido: {scan['errors']}")
                 return {
                     'success': False,
                     'error': 'Archivo no válido',
-                    'validation_errors': validation_result['errors']
-                }
-            
-            df = validation_result['dataframe']
-            
-            # Crear respuesta de cotización
-            print("\nCreando respuesta de cotización...")
-            respuesta = self._create_cotizacion_response()
-            print(f"✔ Respuesta creada con ID: {respuesta.id}")
-            
-            # Procesar productos
-            print("\nProcesando productos...")
-            success_count = self._process_products_fixed(df, respuesta)
-            
-            end_time = datetime.now()
-            processing_time = end_time - start_time
-            
-            print(f"\nTiempo total: {processing_time}")
-            
-            if success_count > 0:
-                print("\n✔ Procesamiento exitoso")
-                return {
-                    'success': True,
-                    'respuesta_id': respuesta.id,
-                    'processed_items': success_count,
-                    'total_items': len(df),
-                    'errors': self.errors,
-                    'warnings': self.warnings
+                    'details': scan['errors'],
+                    'validation_errors': scan['errors'],
+                    'warnings': scan['warnings'],
+                    'estadisticas': scan['estadisticas'],
+                    'metricas': self.timer.as_dict()
                 }
-            else:
-                respuesta.delete()
+
+            if scan['success_count'] == 0:
+                self._discard_response(respuesta)
+                logger.info(f"Excel del envío {self.envio.id}: no se procesaron productos")
                 return {
                     'success': False,
                     'error': 'No se pudo procesar ningún producto',
-                    'details': self.errors
+                    'details': self.errors,
+                    'validation_errors': [],
+                    'warnings': scan['warnings'] + self.warnings,
+                    'estadisticas': scan['estadisticas'],
+                    'metricas': self.timer.as_dict()
                 }
-                
-        except Exception as ex:
-            print(f"\n!!! ERROR: {str(ex)}")
+
+            self._publish_response(respuesta)
+
+            processing_time = datetime.now() - start_time
+            self.timer.log_summary(
+                f"Excel envío {self.envio.id}: {scan['success_count']}/{scan['total_filas']} productos, "
+                f"{len(self.errors)} errores, {len(self.warnings)} advertencias"
+            )
+
             return {
-                'success': False,
-                'error': f'Error inesperado: {str(ex)}'
+                'success': True,
+                'respuesta_id': respuesta.id,
+                'processed_items': scan['success_count'],
+                'total_items': scan['total_filas'],
+                'errors': self.errors,
+                'warnings': scan['warnings'] + self.warnings,
+                'validation_errors': [],
+                'estadisticas': scan['estadisticas'],
+                'metricas': self.timer.as_dict(),
+                'processing_time': str(processing_time)
             }
-    def process_excel_file_with_logging_direct(self, file_path):
-        """Procesar archivo Excel con ruta directa"""
-        from datetime import datetime
-        import os
-        
-        print("\n" + "="*50)
-        print("INICIANDO PROCESAMIENTO DIRECTO DE ARCHIVO EXCEL")
-        print("="*50)
-        
-        start_time = datetime.now()
-        
-        try:
-            # Verificar que el archivo existe
-            if not os.path.exists(file_path):
-                error_msg = f'Archivo no existe en la ruta: {file_path}'
-                print(f"✖ {error_msg}")
-                return {'success': False, 'error': error_msg}
-            
-            print(f"\nArchivo a procesar: {file_path}")
-            print(f"Archivo existe: {os.path.exists(file_path)}")
-            print(f"Tamaño del archivo: {os.path.getsize(file_path)} bytes")
-            
-            validation_result = self._validate_excel_file(file_path)
-            
-            if not validation_result['valid']:
-                print("\n✖ Validación fallida:")
-                for error in validation_result['errors']:
-                    print(f"  - {error}")
-                return {
-                    'success': False, 
-                    'error': 'Archivo no válido',
-                    'details': validation_result['errors'],
-                    'validation_errors': validation_result['errors']
-                }
-            
-            # Si la validación es exitosa, procesar
-            df = validation_result['dataframe']
-            
-            # Crear respuesta de cotización
-            print("\nCreando respuesta de cotización...")
-            respuesta = self._create_cotizacion_response()
-            print(f"✔ Respuesta creada con ID: {respuesta.id}")
-            
-            # Procesar productos
-            print("\nProcesando productos...")
-            success_count = self._process_products_fixed(df, respuesta)
-            
-            end_time = datetime.now()
-            processing_time = end_time - start_time
-            
-            print(f"\nTiempo total de procesamiento: {processing_time}")
-            
-            if success_count > 0:
-                print("\n✔ Procesamiento exitoso")
-                return {
-                    'success': True,
-                    'respuesta_id': respuesta.id,
-                    'processed_items': success_count,
-                    'total_items': len(df),
-                    'errors': self.errors,
-                    'warnings': self.warnings,
-                    'processing_time': str(processing_time)
-                }
-            else:
-                # Si no se procesó ningún producto, eliminar la respuesta creada
-                print("\n✖ No se procesaron productos")
-                respuesta.delete()
-                return {
-                    'success': False,
-                    'error': 'No se pudo procesar ningún producto',
-                    'details': self.errors
-                }
-                
+
         except Exception as ex:
-            end_time = datetime.now()
-            print(f"\n!!! ERROR INESPERADO: {str(ex)}")
             logger.error(f"Error procesando archivo de cotización: {ex}")
+            if respuesta is not None:
+                self._discard_response(respuesta)
             return {
                 'success': False,
-                'error': f'Error inesperado: {str(ex)}'
+                'error': f'Error inesperado: {str(ex)}',
+                'metricas': self.timer.as_dict()
             }
 
-    def _create_cotizacion_response(self):
-        """Crear respuesta de cotización automática"""
+    def _publish_response(self, respuesta):
+        """Reemplazar la respuesta vigente del envío por la recién cargada"""
+        from django.db import transaction
         from .models import RespuestaCotizacion
-        
-        # Verificar si ya existe una respuesta
+
+        with transaction.atomic():
+            anterior = RespuestaCotizacion.objects.filter(envio=self.envio).first()
+            if anterior:
+                logger.debug(f"Reemplazando respuesta anterior {anterior.id} del envío {self.envio.id}")
+                anterior.delete()
+
+            respuesta.envio = self.envio
+            respuesta.save(update_fields=['envio', 'updated_at'])
+
+            if self.on_publish:
+                self.on_publish(respuesta)
+
+    def _discard_response(self, respuesta):
+        """Eliminar una respuesta parcial (los detalles ya confirmados caen en cascada)"""
         try:
-            existing_response = RespuestaCotizacion.objects.filter(envio=self.envio).first()
-            if existing_response:
-                print(f"✖ Ya existe respuesta con ID: {existing_response.id}")
-                existing_response.delete()
-                print("✔ Respuesta anterior eliminada")
+            respuesta.delete()
         except Exception as e:
-            print(f"⚠ Error verificando respuesta anterior: {e}")
-        
+            logger.warning(f"No se pudo eliminar la respuesta parcial {respuesta.id}: {e}")
+
+    def process_excel_file_with_logging_direct(self, file_path):
+        """Procesar archivo Excel con ruta directa"""
+        import os
+
+        # Verificar que el archivo existe
+        if not os.path.exists(file_path):
+            error_msg = f'Archivo no existe en la ruta: {file_path}'
+            logger.warning(error_msg)
+            return {'success': False, 'error': error_msg}
+
+        logger.info(f"Procesando {file_path} ({os.path.getsize(file_path)} bytes)")
+
+        with open(file_path, 'rb') as file_obj:
+            return self.process_excel_from_memory(file_obj)
+
+    def _create_cotizacion_response(self):
+        """Crear la respuesta automática en preparación (sin envío hasta publicarla)"""
+        from .models import RespuestaCotizacion
+
         return RespuestaCotizacion.objects.create(
-            envio=self.envio,
+            envio=None,
             terminos_pago="Por definir",
             tiempo_entrega="Según especificaciones",
             observaciones="Respuesta procesada automáticamente desde Excel",
             procesado_automaticamente=True
         )
 
-        def _validate_excel_from_file(self, file_obj):
-            """Validar archivo Excel directamente desde el objeto file"""
-            print(f"\n=== INICIANDO VALIDACIÓN DE ARCHIVO EN MEMORIA ===")
-            
-            try:
-                # Resetear posición del archivo
-                file_obj.seek(0)
-                
-                print("\n[1/3] Leyendo archivo Excel desde memoria...")
-                df = pd.read_excel(file_obj, engine='openpyxl')
-                print(f"✔ Archivo leído correctamente. Filas: {len(df)}, Columnas: {len(df.columns)}")
-                
-                # NO resetear aquí - mantener posición para que Django pueda leer después
-                
-                errors = []
-                warnings = []
-                
-                print(f"\n[2/3] Validando estructura...")
-                if len(df.columns) < len(self.OFFICIAL_COLUMNS):
-                    error_msg = f"El archivo debe tener al menos {len(self.OFFICIAL_COLUMNS)} columnas"
-                    errors.append(error_msg)
-                    return {
-                        'valid': False,
-                        'errors': errors,
-                        'warnings': warnings,
-                        'dataframe': None
-                    }
-                
-                if len(df) == 0:
-                    errors.append("El archivo Excel está vacío")
-                    return {
-                        'valid': False,
-                        'errors': errors,
-                        'warnings': warnings,
-                        'dataframe': None
-                    }
-                
-                print(f"\n[3/3] Validando contenido...")
-                # Validar códigos y precios
-                codigo_col_pos = self.OFFICIAL_COLUMNS['CÓDIGO']
-                precio_col_pos = self.OFFICIAL_COLUMNS['PRECIO U.']
-                
-                codigo_vals = df.iloc[:, codigo_col_pos].dropna()
-                precio_vals = df.iloc[:, precio_col_pos].dropna()
-                
-                if codigo_vals.empty:
-                    warnings.append("La columna CÓDIGO está completamente vacía")
-                
-                if precio_vals.empty:
-                    warnings.append("La columna PRECIO U. está completamente vacía")
-                
-                # Validar códigos de productos
-                if not codigo_vals.empty:
-                    from apps.ecommerce.products.models import Product
-                    valid_codes = set(Product.objects.values_list('code', flat=True))
-                    codes_in_file = set(str(code).strip().upper() for code in codigo_vals if str(code).strip().upper() != 'NAN')
-                    matching_codes = codes_in_file & valid_codes
-                    
-                    if not matching_codes:
-                        errors.append("No se encontraron códigos de productos válidos en el archivo")
-                    elif len(matching_codes) < len(codes_in_file) / 2:
-                        warnings.append(f"Solo {len(matching_codes)} de {len(codes_in_file)} códigos son válidos")
-                
-                # Validar precios
-                if not precio_vals.empty:
-                    precios_validos = sum(1 for precio in precio_vals if self._parse_price_safe(precio) is not None)
-                    if precios_validos == 0:
-                        errors.append("No se encontraron precios válidos en el archivo")
-                    elif precios_validos < len(precio_vals) / 2:
-                        warnings.append(f"Solo {precios_validos} de {len(precio_vals)} precios son válidos")
-                
-                is_valid = len(errors) == 0
-                print(f"\n=== RESULTADO VALIDACIÓN: {'VÁLIDO' if is_valid else 'INVÁLIDO'} ===")
-                
-                return {
-                    'valid': is_valid,
-                    'errors': errors,
-                    'warnings': warnings,
-                    'dataframe': df if is_valid else None
-                }
-                
-            except Exception as e:
-                print(f"\n!!! EXCEPCIÓN DURANTE VALIDACIÓN: {str(e)}")
-                return {
-                    'valid': False,
-                    'errors': [f"Error leyendo archivo: {str(e)}"],
-                    'warnings': [],
-                    'dataframe': None
-                }
-            
-    def _validate_excel_file(self, file_path):
-        """Validar archivo Excel con estructura oficial"""
-        print(f"\n=== INICIANDO VALIDACIÓN DE ARCHIVO ===")
-        print(f"Ruta del archivo: {file_path}")
-        
-        try:
-            # Leer archivo Excel
-            print("\n[1/5] Intentando leer archivo Excel...")
-            df = self._read_excel_file(file_path)
-            
-            if df is None:
-                print("!!! ERROR: No se pudo leer el archivo Excel")
-                return {
-                    'valid': False,
-                    'errors': ['No se pudo leer el archivo Excel'],
-                    'warnings': [],
-                    'suggestions': [],
-                    'dataframe': None
-                }
-            
-            print(f"✔ Archivo leído correctamente. Filas: {len(df)}, Columnas: {len(df.columns)}")
-            print(f"Columnas detectadas: {list(df.columns)}")
-            
-            errors = []
-            warnings = []
-            suggestions = []
-            
-            # Validar que tenga suficientes columnas
-            print(f"\n[2/5] Validando número de columnas...")
-            print(f"Columnas esperadas: {len(self.OFFICIAL_COLUMNS)}, Columnas encontradas: {len(df.columns)}")
-            
-            if len(df.columns) < len(self.OFFICIAL_COLUMNS):
-                error_msg = f"El archivo debe tener al menos {len(self.OFFICIAL_COLUMNS)} columnas"
-                print(f"!!! ERROR: {error_msg}")
-                errors.append(error_msg)
-                return {
-                    'valid': False,
-                    'errors': errors,
-                    'warnings': warnings,
-                    'suggestions': ['Asegúrese de usar el template oficial'],
-                    'dataframe': None
-                }
-            
-            # Validar estructura de encabezados (primera fila)
-            print(f"\n[3/5] Validando contenido del archivo...")
-            print(f"Filas totales: {len(df)}")
-            
-            if len(df) == 0:
-                error_msg = "El archivo Excel está vacío"
-                print(f"!!! ERROR: {error_msg}")
-                errors.append(error_msg)
-                return {
-                    'valid': False,
-                    'errors': errors,
-                    'warnings': warnings,
-                    'suggestions': [],
-                    'dataframe': None
-                }
-            
-            # Verificar que hay datos más allá de los encabezados
-            if len(df) < 2:
-                warning_msg = "El archivo solo contiene encabezados, no hay productos para procesar"
-                print(f"⚠ ADVERTENCIA: {warning_msg}")
-                warnings.append(warning_msg)
-            
-            # Validar columnas críticas
-            codigo_col_pos = self.OFFICIAL_COLUMNS['CÓDIGO']
-            precio_col_pos = self.OFFICIAL_COLUMNS['PRECIO U.']
-            
-            print(f"\n[4/5] Validando columnas críticas...")
-            print(f"Posición columna CÓDIGO: {codigo_col_pos}")
-            print(f"Posición columna PRECIO U.: {precio_col_pos}")
-            
-            # Verificar que las columnas críticas no estén completamente vacías
-            codigo_vals = df.iloc[:, codigo_col_pos].dropna()
-            precio_vals = df.iloc[:, precio_col_pos].dropna()
-            
-            print(f"Valores en columna CÓDIGO: {len(codigo_vals)}/{len(df)}")
-            print(f"Valores en columna PRECIO U.: {len(precio_vals)}/{len(df)}")
-            
-            if codigo_vals.empty:
-                warning_msg = "La columna CÓDIGO está completamente vacía"
-                print(f"⚠ ADVERTENCIA: {warning_msg}")
-                warnings.append(warning_msg)
-            
-            if precio_vals.empty:
-                warning_msg = "La columna PRECIO U. está completamente vacía"
-                print(f"⚠ ADVERTENCIA: {warning_msg}")
-                warnings.append(warning_msg)
-            
-            # Validar al menos algunos códigos de productos válidos
-            if not codigo_vals.empty:
-                print(f"\n[5/5] Validando códigos de productos...")
-                from apps.ecommerce.products.models import Product
-                valid_codes = set(Product.objects.values_list('code', flat=True))
-                print(f"Códigos válidos en sistema: {len(valid_codes)}")
-                
-                codes_in_file = set(str(code).strip().upper() for code in codigo_vals if str(code).strip().upper() != 'NAN')
-                print(f"Códigos únicos en archivo: {len(codes_in_file)}")
-                
-                matching_codes = codes_in_file & valid_codes
-                print(f"Códigos coincidentes: {len(matching_codes)}")
-                
-                if not matching_codes:
-                    error_msg = "No se encontraron códigos de productos válidos en el archivo"
-                    print(f"!!! ERROR: {error_msg}")
-                    errors.append(error_msg)
-                    suggestions.append("Verifique que los códigos coincidan exactamente con los del sistema")
-                elif len(matching_codes) < len(codes_in_file) / 2:
-                    warning_msg = f"Solo {len(matching_codes)} de {len(codes_in_file)} códigos son válidos"
-                    print(f"⚠ ADVERTENCIA: {warning_msg}")
-                    warnings.append(warning_msg)
-            
-            # Validar formato de precios
-            if not precio_vals.empty:
-                print("\nValidando formatos de precios...")
-                precios_validos = 0
-                for i, precio in enumerate(precio_vals):
-                    parsed = self._parse_price_safe(precio)
-                    if parsed is not None:
-                        precios_validos += 1
-                    else:
-                        print(f"  Precio inválido en fila {i+2}: {precio}")
-                
-                print(f"Precios válidos: {precios_validos}/{len(precio_vals)}")
-                
-                if precios_validos == 0:
-                    error_msg = "No se encontraron precios válidos en el archivo"
-                    print(f"!!! ERROR: {error_msg}")
-                    errors.append(error_msg)
-                    suggestions.append("Los precios deben ser números positivos (ej: 15.50)")
-                elif precios_validos < len(precio_vals) / 2:
-                    warning_msg = f"Solo {precios_validos} de {len(precio_vals)} precios son válidos"
-                    print(f"⚠ ADVERTENCIA: {warning_msg}")
-                    warnings.append(warning_msg)
-            
-            # Determinar si es válido
-            is_valid = len(errors) == 0
-            print(f"\n=== RESULTADO VALIDACIÓN: {'VÁLIDO' if is_valid else 'INVÁLIDO'} ===")
-            print(f"Errores: {errors}")
-            print(f"Advertencias: {warnings}")
-            
-            return {
-                'valid': is_valid,
-                'errors': errors,
-                'warnings': warnings,
-                'suggestions': suggestions,
-                'dataframe': df if is_valid else None
-            }
-            
-        except Exception as e:
-            print(f"\n!!! EXCEPCIÓN DURANTE VALIDACIÓN: {str(e)}")
-            return {
-                'valid': False,
-                'errors': [f"Error leyendo archivo: {str(e)}"],
-                'warnings': [],
-                'suggestions': ['Verifique que el archivo no esté corrupto y sea un Excel válido'],
-                'dataframe': None
-            }
+    def _text_column(self, df, column_name):
+        """Columna como texto limpio (None para celdas vacías)"""
+        position = self.OFFICIAL_COLUMNS[column_name]
+        if column_name in df.columns:
+            column = df[column_name]
+        elif position < len(df.columns):
+            column = df.iloc[:, position]
+        else:
+            return pd.Series([None] * len(df), index=df.index, dtype=object)
 
-    def _read_excel_file(self, file_path):
-        """Leer archivo Excel usando pandas"""
-        print(f"\nIntentando leer archivo: {file_path}")
-        try:
-            # Intentar leer con pandas primero
-            print("  Probando con pandas...")
-            df = pd.read_excel(file_path, engine='openpyxl')
-            print("  ✔ Lectura exitosa con pandas")
-            return df
-        except Exception as ex:
-            print(f"  ✖ Error con pandas: {str(ex)}")
-            logger.error(f"Error leyendo Excel con pandas: {ex}")
-            try:
-                # Fallback: usar openpyxl directamente
-                print("  Probando con openpyxl...")
-                workbook = openpyxl.load_workbook(file_path)
-                worksheet = workbook.active
-                
-                # Convertir a DataFrame manualmente
-                data = []
-                headers = None
-                
-                for row in worksheet.iter_rows(values_only=True):
-                    if headers is None:
-                        headers = [str(cell).strip() if cell else f'Col_{i}' for i, cell in enumerate(row)]
-                    else:
-                        data.append(row)
-                
-                if data:
-                    df = pd.DataFrame(data, columns=headers)
-                    print("  ✔ Lectura exitosa con openpyxl")
-                    return df
-                else:
-                    print("  ✖ No se encontraron datos en el archivo")
-                    return None
-                    
-            except Exception as e2:
-                print(f"  ✖ Error con openpyxl: {str(e2)}")
-                logger.error(f"Error leyendo Excel con openpyxl: {e2}")
-                return None
-    def _get_cell_value(self, row, column_position):
-        """Obtener valor de celda por posición"""
-        try:
-            if column_position < len(row):
-                value = row.iloc[column_position]
-                if pd.isna(value):
-                    return None
-                return str(value).strip()
-            return None
-        except:
-            return None        
-    def _parse_int_safe(self, value_str):
-        """Parsear entero de manera segura"""
-        if not value_str:
+        text = column.astype(str).str.strip()
+        return text.where(column.notna() & (text != ''), None)
+
+    def _numeric_column(self, text, strip_currency=False):
+        """Convertir una columna de texto a números en bloque (NaN si no es válido)"""
+        cleaned = text.fillna('')
+        if strip_currency:
+            cleaned = cleaned.str.replace('S/.', '', regex=False).str.replace('S/', '', regex=False)
+        cleaned = cleaned.str.replace(',', '', regex=False).str.strip()
+        numbers = pd.to_numeric(cleaned, errors='coerce')
+        return numbers.where(np.isfinite(numbers))
+
+    @timed_phase('resolve_codes')
+    def _build_product_code_map(self, codes):
+        """Resolver los códigos con una sola consulta IN (sin distinguir mayúsculas).
+
+        Los resultados quedan en caché, así que cada código se consulta una sola vez
+        por procesamiento aunque aparezca en varios bloques.
+        """
+        from apps.ecommerce.products.models import Product
+        from django.db.models.functions import Upper
+
+        upper_codes = {str(code).upper() for code in codes}
+        pending = upper_codes - self._code_cache.keys()
+
+        if pending:
+            found = dict(
+                Product.objects.annotate(code_upper=Upper('code'))
+                .filter(code_upper__in=pending)
+                .values_list('code_upper', 'id')
+            )
+            for code in pending:
+                self._code_cache[code] = found.get(code)
+
+        return {code: self._code_cache[code] for code in upper_codes if self._code_cache[code] is not None}
+
+    # Límites de DetalleRespuestaCotizacion: precio DecimalField(12, 2), cantidades PositiveIntegerField
+    PRECIO_MAXIMO = Decimal('9999999999.99')
+    CANTIDAD_MAXIMA = 2147483647
+    CODIGO_MAX_LENGTH = 20
+    NOMBRE_MAX_LENGTH = 255
+
+    def _decimal_value(self, text, strip_currency=False):
+        """Convertir un texto a Decimal con 2 decimales sin pasar por float (None si no es válido)"""
+        if text is None:
             return None
-        
+        cleaned = text
+        if strip_currency:
+            cleaned = cleaned.replace('S/.', '').replace('S/', '')
+        cleaned = cleaned.replace(',', '').strip()
         try:
-            clean_value = str(value_str).strip().replace(',', '')
-            return int(float(clean_value))
-        except (ValueError, TypeError):
-            return None
-    def _parse_price_safe(self, price_str):
-        """Parsear precio de manera segura"""
-        if not price_str:
+            value = Decimal(cleaned)
+        except InvalidOperation:
             return None
-        
-        try:
-            # Limpiar el string
-            clean_price = str(price_str).strip()
-            clean_price = clean_price.replace('S/.', '').replace('S/', '')
-            clean_price = clean_price.replace(',', '')
-            clean_price = clean_price.strip()
-            
-            price = float(clean_price)
-            return price if price > 0 else None
-            
-        except (ValueError, TypeError):
+        if not value.is_finite():
             return None
+        return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
     def _process_products_fixed(self, df, respuesta):
-        """Procesar productos usando posiciones fijas de columnas"""
-        print("\n=== INICIANDO PROCESAMIENTO DE PRODUCTOS ===")
+        """Procesar un bloque de productos usando posiciones fijas de columnas.
+
+        Cada fila se valida por separado (precio como Decimal, cantidades y
+        largos dentro de los límites del modelo); una fila inválida se informa
+        sola y no descarta el resto del bloque.
+        """
         from .models import DetalleRespuestaCotizacion
-        from apps.ecommerce.products.models import Product
-        
-        success_count = 0
-        
-        print(f"Total de filas a procesar: {len(df)}")
-        
-        for index, row in df.iterrows():
-            try:
-                print(f"\nProcesando fila {index + 2}...")
-                
-                # Obtener valores usando posiciones fijas
-                codigo = self._get_cell_value(row, self.OFFICIAL_COLUMNS['CÓDIGO'])
-                precio_str = self._get_cell_value(row, self.OFFICIAL_COLUMNS['PRECIO U.'])
-                
-                print(f"  Código: {codigo}")
-                print(f"  Precio (str): {precio_str}")
-                
-                if not codigo or not precio_str:
-                    print("  ✖ Fila omitida: código o precio faltante")
+
+        with self.timer.phase('parse'):
+            # Número de fila en Excel (encabezado en la fila 1, índice como pandas.read_excel)
+            fila = pd.Series(df.index + 2, index=df.index)
+
+            codigos = self._text_column(df, 'CÓDIGO')
+            precios_str = self._text_column(df, 'PRECIO U.')
+            nombres = self._text_column(df, 'PRODUCTO').fillna('')
+            observaciones = self._text_column(df, 'OBSERVACIONES').fillna('')
+
+            # Filas sin código o precio se omiten sin error, igual que antes
+            candidatas = codigos.notna() & precios_str.notna()
+
+            cantidad_solicitada = np.trunc(self._numeric_column(self._text_column(df, 'CANT. SOLICITADA')))
+            cantidad_solicitada = cantidad_solicitada.fillna(0).replace(0, 1)
+            cantidad_disponible = np.trunc(self._numeric_column(self._text_column(df, 'CANT. DISPONIBLE'))).fillna(0)
+
+            filas = []
+            row_errors = []
+            for row_number, codigo, precio_str, solicitada, disponible, observacion, nombre in zip(
+                fila[candidatas].tolist(),
+                codigos[candidatas].tolist(),
+                precios_str[candidatas].tolist(),
+                cantidad_solicitada[candidatas].tolist(),
+                cantidad_disponible[candidatas].tolist(),
+                observaciones[candidatas].tolist(),
+                nombres[candidatas].tolist(),
+            ):
+                precio = self._decimal_value(precio_str, strip_currency=True)
+                if precio is None or precio <= 0:
+                    row_errors.append((row_number, f"Fila {row_number}: Precio inválido '{precio_str}'"))
                     continue
-                    
-                precio_unitario = self._parse_price_safe(precio_str)
-                print(f"  Precio (parsed): {precio_unitario}")
-                
-                if precio_unitario is None or precio_unitario <= 0:
-                    error_msg = f"Fila {index + 2}: Precio inválido '{precio_str}'"
-                    print(f"  ✖ {error_msg}")
-                    self.errors.append(error_msg)
+                if (
+                    precio > self.PRECIO_MAXIMO
+                    or not 0 <= solicitada <= self.CANTIDAD_MAXIMA
+                    or not 0 <= disponible <= self.CANTIDAD_MAXIMA
+                ):
+                    row_errors.append((row_number, f"Fila {row_number}: Error - Valores fuera de rango"))
                     continue
-                
-                # Buscar producto
-                producto = None
-                try:
-                    print(f"  Buscando producto con código: {codigo}")
-                    producto = Product.objects.get(code__iexact=str(codigo).strip())
-                    print(f"  ✔ Producto encontrado: {producto.name}")
-                except Product.DoesNotExist:
-                    warning_msg = f"Fila {index + 2}: Producto con código '{codigo}' no encontrado"
-                    print(f"  ⚠ {warning_msg}")
-                    self.warnings.append(warning_msg)
-                    # Continuar sin producto vinculado
-                
-                # Obtener otros valores
-                cantidad_solicitada = self._parse_int_safe(
-                    self._get_cell_value(row, self.OFFICIAL_COLUMNS['CANT. SOLICITADA'])
-                ) or 1
-                
-                cantidad_disponible = self._parse_int_safe(
-                    self._get_cell_value(row, self.OFFICIAL_COLUMNS['CANT. DISPONIBLE'])
-                ) or 0
-                
-                observaciones = self._get_cell_value(row, self.OFFICIAL_COLUMNS['OBSERVACIONES']) or ""
-                
-                print(f"  Cant. solicitada: {cantidad_solicitada}")
-                print(f"  Cant. disponible: {cantidad_disponible}")
-                print(f"  Observaciones: {observaciones}")
-                
-                # Crear detalle
-                print("  Creando detalle de respuesta...")
-                DetalleRespuestaCotizacion.objects.create(
+                if len(codigo) > self.CODIGO_MAX_LENGTH:
+                    row_errors.append((row_number, f"Fila {row_number}: Código '{codigo}' demasiado largo"))
+                    continue
+
+                filas.append((
+                    row_number, codigo, precio, int(solicitada), int(disponible),
+                    observacion, nombre[:self.NOMBRE_MAX_LENGTH]
+                ))
+
+            self.errors.extend(message for _, message in sorted(row_errors))
+
+        # Resolver todos los códigos de una sola vez
+        code_map = self._build_product_code_map({fila_valida[1] for fila_valida in filas})
+
+        with self.timer.phase('parse'):
+            detalles = []
+            numeros_fila = []
+            no_encontrados = 0
+            for row_number, codigo, precio, solicitada, disponible, observacion, nombre in filas:
+                producto_id = code_map.get(codigo.upper())
+                if producto_id is None:
+                    no_encontrados += 1
+                    self.warnings.append(f"Fila {row_number}: Producto con código '{codigo}' no encontrado")
+
+                numeros_fila.append(row_number)
+                detalles.append(DetalleRespuestaCotizacion(
                     respuesta=respuesta,
-                    producto_code=str(codigo).strip(),
-                    producto=producto,
-                    precio_unitario=precio_unitario,
-                    cantidad_cotizada=cantidad_solicitada,
-                    cantidad_disponible=cantidad_disponible,
-                    observaciones=observaciones,
-                    nombre_producto_proveedor=self._get_cell_value(row, self.OFFICIAL_COLUMNS['PRODUCTO']) or ""
+                    producto_code=codigo,
+                    producto_id=producto_id,
+                    precio_unitario=precio,
+                    cantidad_cotizada=solicitada,
+                    cantidad_disponible=disponible,
+                    observaciones=observacion,
+                    nombre_producto_proveedor=nombre,
+                ))
+
+        self.timer.count('filas_validas', len(detalles))
+        self.timer.count('codigos_no_encontrados', no_encontrados)
+
+        if self.debug:
+            for row_number, detalle in zip(numeros_fila, detalles):
+                logger.debug(
+                    f"Fila {row_number}: código={detalle.producto_code} producto_id={detalle.producto_id} "
+                    f"precio={detalle.precio_unitario} cant={detalle.cantidad_cotizada} "
+                    f"disp={detalle.cantidad_disponible}"
                 )
-                
+
+        with self.timer.phase('insert'):
+            success_count = self._insert_details(detalles, numeros_fila)
+
+        self.timer.count('productos_insertados', success_count)
+        return success_count
+
+    def _insert_details(self, detalles, numeros_fila):
+        """Insertar el bloque con bulk_create; si falla, fila por fila para aislar las que fallan"""
+        from django.db import transaction
+        from .models import DetalleRespuestaCotizacion
+
+        try:
+            with transaction.atomic():
+                DetalleRespuestaCotizacion.objects.bulk_create(detalles, batch_size=500)
+            return len(detalles)
+        except Exception as e:
+            logger.warning(f"Error guardando el bloque de detalles, se reintenta fila por fila: {e}")
+
+        success_count = 0
+        for row_number, detalle in zip(numeros_fila, detalles):
+            try:
+                with transaction.atomic():
+                    detalle.save(force_insert=True)
                 success_count += 1
-                print(f"  ✔ Producto procesado exitosamente (Total: {success_count})")
-                
             except Exception as e:
-                error_msg = f"Fila {index + 2}: Error - {str(e)}"
-                print(f"  ✖ {error_msg}")
+                detalle.pk = None
+                error_msg = f"Fila {row_number}: Error guardando detalle - {str(e)}"
+                logger.error(error_msg)
                 self.errors.append(error_msg)
-                continue
-        
-        print(f"\n=== PROCESAMIENTO COMPLETADO ===")
-        print(f"Productos procesados exitosamente: {success_count}/{len(df)}")
-        print(f"Errores encontrados: {len(self.errors)}")
-        print(f"Advertencias: {len(self.warnings)}")
-        
         return success_count
 
     def process_excel_file_with_logging(self):
-        """Procesar archivo Excel con logging detallado"""
-        from datetime import datetime
-        
-        print("\n" + "="*50)
-        print("INICIANDO PROCESAMIENTO DE ARCHIVO EXCEL")
-        print("="*50)
-        
-        start_time = datetime.now()
-        
-        try:
-            if not self.envio.archivo_respuesta_cliente:
-                error_msg = 'No hay archivo para procesar'
-                print(f"✖ {error_msg}")
-                return {'success': False, 'error': error_msg}
-            
-            # Leer archivo Excel
-            file_path = self.envio.archivo_respuesta_cliente.path
-            print(f"\nArchivo a procesar: {file_path}")
-            
-            validation_result = self._validate_excel_file(file_path)
-            
-            if not validation_result['valid']:
-                print("\n✖ Validación fallida:")
-                for error in validation_result['errors']:
-                    print(f"  - {error}")
-                return {
-                    'success': False, 
-                    'error': 'Archivo no válido',
-                    'details': validation_result['errors'],
-                    'validation_errors': validation_result['errors']
-                }
-            
-            # Si la validación es exitosa, procesar
-            df = validation_result['dataframe']
-            
-            # Crear respuesta de cotización
-            print("\nCreando respuesta de cotización...")
-            respuesta = self._create_cotizacion_response()
-            print(f"✔ Respuesta creada con ID: {respuesta.id}")
-            
-            # Procesar productos
-            print("\nProcesando productos...")
-            success_count = self._process_products_fixed(df, respuesta)
-            
-            end_time = datetime.now()
-            processing_time = end_time - start_time
-            
-            print(f"\nTiempo total de procesamiento: {processing_time}")
-            
-            if success_count > 0:
-                print("\n✔ Procesamiento exitoso")
-                return {
-                    'success': True,
-                    'respuesta_id': respuesta.id,
-                    'processed_items': success_count,
-                    'total_items': len(df),
-                    'errors': self.errors,
-                    'warnings': self.warnings,
-                    'processing_time': str(processing_time)
-                }
-            else:
-                # Si no se procesó ningún producto, eliminar la respuesta creada
-                print("\n✖ No se procesaron productos")
-                respuesta.delete()
-                return {
-                    'success': False,
-                    'error': 'No se pudo procesar ningún producto',
-                    'details': self.errors
-                }
-                
-        except Exception as ex:
-            end_time = datetime.now()
-            print(f"\n!!! ERROR INESPERADO: {str(ex)}")
-            logger.error(f"Error procesando archivo de cotización: {ex}")
-            return {
-                'success': False,
-                'error': f'Error inesperado: {str(ex)}'
-            }
+        """Procesar el archivo de respuesta guardado en el envío"""
+        if not self.envio.archivo_respuesta_cliente:
+            return {'success': False, 'error': 'No hay archivo para procesar'}
+
+        with self.envio.archivo_respuesta_cliente.open('rb') as file_obj:
+            return self.process_excel_from_memory(file_obj)
 
     
 class EmailCotizacionService:
@@ -0,0 +1,107 @@
+# apps/ecommerce/cotizacion/services_excel.py
+from typing import Any, NamedTuple
+
+import openpyxl
+import pandas as pd
+
+
+# Campo del registro -> encabezado oficial del template de cotización
+CAMPOS_COLUMNAS = (
+    ('codigo', 'CÓDIGO'),
+    ('producto', 'PRODUCTO'),
+    ('categoria', 'CATEGORÍA'),
+    ('cantidad_solicitada', 'CANT. SOLICITADA'),
+    ('unidad', 'UNIDAD'),
+    ('cantidad_disponible', 'CANT. DISPONIBLE'),
+    ('precio_unitario', 'PRECIO U.'),
+    ('precio_total', 'PRECIO TOTAL'),
+    ('observaciones', 'OBSERVACIONES'),
+)
+
+
+class FilaCotizacion(NamedTuple):
+    """Fila de productos leída del Excel del proveedor.
+
+    Los textos llegan sin espacios extremos (vacío -> None); números y fechas
+    conservan el tipo nativo que entrega openpyxl.
+    """
+    fila: int
+    codigo: Any
+    producto: Any
+    categoria: Any
+    cantidad_solicitada: Any
+    unidad: Any
+    cantidad_disponible: Any
+    precio_unitario: Any
+    precio_total: Any
+    observaciones: Any
+
+
+class CotizacionExcelStreamReader:
+    """Lector en streaming (read_only) de archivos de respuesta de proveedores.
+
+    Recorre la hoja activa una sola vez sin cargar el libro completo en memoria.
+    """
+
+    def __init__(self, file_obj, columns):
+        file_obj.seek(0)
+        self.workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+        self.columns = columns
+        worksheet = self.workbook.active
+        # Filas declaradas en la dimensión de la hoja (estimación para reportar progreso)
+        self.estimated_rows = max((worksheet.max_row or 1) - 1, 0)
+        self._rows = worksheet.iter_rows(values_only=True)
+        self.header = self._read_header()
+        self.total_filas = 0
+
+    def _read_header(self):
+        header = list(next(self._rows, None) or [])
+        while header and header[-1] is None:
+            header.pop()
+        return [str(cell).strip() if cell is not None else '' for cell in header]
+
+    @staticmethod
+    def _clean(value):
+        if isinstance(value, str):
+            value = value.strip()
+            return value or None
+        return value
+
+    def __iter__(self):
+        """Generar una FilaCotizacion por cada fila con datos (las filas vacías se saltan)"""
+        positions = [self.columns[columna] for _, columna in CAMPOS_COLUMNAS]
+
+        # La fila 1 es el encabezado
+        for numero, row in enumerate(self._rows, start=2):
+            values = [self._clean(row[pos]) if pos < len(row) else None for pos in positions]
+            if all(value is None for value in values):
+                continue
+
+            self.total_filas = numero - 1
+            yield FilaCotizacion(numero, *values)
+
+    def chunks(self, size):
+        """Agrupar las filas en DataFrames de a lo más `size` filas, indexados como pandas.read_excel"""
+        nombres = [columna for _, columna in CAMPOS_COLUMNAS]
+        buffer = []
+
+        for record in self:
+            buffer.append(record)
+            if len(buffer) >= size:
+                yield self._to_dataframe(buffer, nombres)
+                buffer = []
+
+        if buffer:
+            yield self._to_dataframe(buffer, nombres)
+
+    @staticmethod
+    def _to_dataframe(records, nombres):
+        return pd.DataFrame(
+            [record[1:] for record in records],
+            columns=nombres,
+            index=[record.fila - 2 for record in records],
+            dtype=object,
+        )
+
+    def close(self):
+        self.workbook.close()
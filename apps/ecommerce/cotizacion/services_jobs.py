@@ -0,0 +1,238 @@
+# apps/ecommerce/cotizacion/services_jobs.py
+import logging
+import os
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ExcelProcessingJob, ExcelProcessingLog
+
+logger = logging.getLogger(__name__)
+
+
+class ExcelProcessingJobService:
+    """Cola (en base de datos) de procesamiento de respuestas Excel.
+
+    Las vistas solo encolan el trabajo; el comando `process_quotation_jobs`
+    los reclama y ejecuta en un pool de procesos.
+    """
+
+    # Cada cuántos puntos porcentuales se guarda el progreso
+    PROGRESS_STEP = 5
+
+    @staticmethod
+    def enqueue(envio, user=None, tipo='upload', archivo_subido=None):
+        """Registrar un trabajo pendiente.
+
+        Con `archivo_subido` el trabajo procesa ese archivo y solo lo asigna
+        al envío si termina bien; sin él reprocesa el archivo actual del envío.
+        """
+        archivo = archivo_subido or envio.archivo_respuesta_cliente
+
+        try:
+            archivo_tamaño = archivo.size
+        except (OSError, ValueError):
+            archivo_tamaño = 0
+
+        with transaction.atomic():
+            log = ExcelProcessingLog.objects.create(
+                envio=envio,
+                archivo_nombre=os.path.basename(archivo.name) if archivo else '',
+                archivo_tamaño=archivo_tamaño,
+                procesado_por=user if user and user.is_authenticated else None
+            )
+            return ExcelProcessingJob.objects.create(
+                envio=envio,
+                log=log,
+                tipo=tipo,
+                archivo=archivo_subido,
+                creado_por=log.procesado_por
+            )
+
+    @staticmethod
+    def claim_next(worker_name):
+        """Tomar el trabajo pendiente más antiguo.
+
+        El cambio de estado es un UPDATE condicional, así que dos workers
+        nunca reclaman el mismo trabajo.
+        """
+        pending_ids = ExcelProcessingJob.objects.filter(
+            estado='pendiente'
+        ).order_by('created_at').values_list('id', flat=True)[:10]
+
+        for job_id in pending_ids:
+            claimed = ExcelProcessingJob.objects.filter(id=job_id, estado='pendiente').update(
+                estado='procesando',
+                worker=worker_name,
+                started_at=timezone.now(),
+                intentos=F('intentos') + 1
+            )
+            if claimed:
+                return job_id
+
+        return None
+
+    @staticmethod
+    def requeue_stale(timeout_minutes=30, max_attempts=3):
+        """Devolver a la cola los trabajos de workers caídos (o marcarlos fallidos)"""
+        limit = timezone.now() - timedelta(minutes=timeout_minutes)
+        stale = ExcelProcessingJob.objects.filter(estado='procesando', started_at__lt=limit)
+
+        failed = stale.filter(intentos__gte=max_attempts).update(
+            estado='fallido',
+            error='El worker no terminó el procesamiento',
+            finished_at=timezone.now()
+        )
+        requeued = stale.filter(intentos__lt=max_attempts).update(estado='pendiente', worker='', progreso=0)
+
+        # Respuestas en preparación que un worker caído nunca publicó ni descartó
+        from .models import RespuestaCotizacion
+        RespuestaCotizacion.objects.filter(envio__isnull=True, created_at__lt=limit).delete()
+
+        return requeued, failed
+
+    @staticmethod
+    def mark_failed(job_id, error):
+        ExcelProcessingJob.objects.filter(id=job_id).exclude(estado='completado').update(
+            estado='fallido',
+            error=error,
+            finished_at=timezone.now()
+        )
+
+    @classmethod
+    def run(cls, job_id):
+        """Ejecutar un trabajo reclamado (se llama dentro del proceso worker)"""
+        from .services import CotizacionResponseProcessor
+        from .services_notifications import CotizacionNotificationService
+
+        job = ExcelProcessingJob.objects.select_related(
+            'envio__requerimiento', 'envio__proveedor', 'log'
+        ).get(id=job_id)
+        envio = job.envio
+        last_progress = [0]
+
+        def report_progress(filas_leidas, productos_procesados, filas_estimadas):
+            progreso = min(99, int(filas_leidas * 100 / filas_estimadas)) if filas_estimadas else 0
+            if progreso - last_progress[0] < cls.PROGRESS_STEP:
+                return
+            last_progress[0] = progreso
+
+            ExcelProcessingJob.objects.filter(id=job.id).update(progreso=progreso)
+            if job.log_id:
+                ExcelProcessingLog.objects.filter(id=job.log_id).update(
+                    total_filas=filas_leidas,
+                    productos_procesados=productos_procesados
+                )
+
+        archivo_anterior = []
+
+        def publish(respuesta):
+            # Misma transacción que el reemplazo de la respuesta
+            if job.archivo:
+                anterior = envio.archivo_respuesta_cliente.name
+                if anterior and anterior != job.archivo.name:
+                    archivo_anterior.append(anterior)
+                envio.archivo_respuesta_cliente = job.archivo.name
+            envio.respuesta_procesada = True
+            envio.fecha_procesamiento = timezone.now()
+            envio._skip_auto_processing = True
+            envio.save()
+            delattr(envio, '_skip_auto_processing')
+
+        started_at = timezone.now()
+        archivo = job.archivo or envio.archivo_respuesta_cliente
+
+        try:
+            if not archivo:
+                result = {'success': False, 'error': 'No hay archivo para procesar'}
+            else:
+                processor = CotizacionResponseProcessor(
+                    envio, progress_callback=report_progress, on_publish=publish
+                )
+                with archivo.open('rb') as file_obj:
+                    result = processor.process_excel_from_memory(file_obj)
+        except Exception as e:
+            logger.exception(f"Error ejecutando job {job_id}")
+            result = {'success': False, 'error': f'Error inesperado: {str(e)}'}
+
+        finished_at = timezone.now()
+
+        if result['success']:
+            # El archivo reemplazado ya no lo referencia nadie; el subido ahora es del envío
+            cls._delete_file(archivo.storage, archivo_anterior)
+            job.archivo = None
+        elif job.archivo:
+            # El archivo rechazado nunca llegó al envío: el anterior sigue vigente
+            cls._delete_file(job.archivo.storage, [job.archivo.name])
+            job.archivo = None
+
+        try:
+            if result['success']:
+                CotizacionNotificationService.notify_cotizacion_received(envio)
+                CotizacionNotificationService.notify_cotizacion_comparison_ready(envio.requerimiento)
+            else:
+                CotizacionNotificationService.notify_processing_errors(envio, result.get('details', []))
+        except Exception as e:
+            logger.error(f"Error notificando resultado del job {job_id}: {e}")
+
+        if job.log:
+            cls._update_log(job.log, result, finished_at - started_at)
+
+        job.estado = 'completado' if result['success'] else 'fallido'
+        job.progreso = 100
+        job.resultado = result
+        job.error = None if result['success'] else result.get('error')
+        job.finished_at = finished_at
+        job.save(update_fields=['estado', 'progreso', 'resultado', 'error', 'finished_at', 'archivo'])
+
+        return result
+
+    @staticmethod
+    def _delete_file(storage, names):
+        for name in names:
+            try:
+                storage.delete(name)
+            except OSError as e:
+                logger.warning(f"No se pudo eliminar el archivo {name}: {e}")
+
+    @staticmethod
+    def _update_log(log, result, elapsed):
+        validation_errors = result.get('validation_errors') or []
+        row_errors = [] if validation_errors else result.get('errors', result.get('details', []))
+
+        # Solo los resultados que pasaron la validación traen validation_errors == []
+        log.validacion_exitosa = result.get('validation_errors') == []
+        log.estructura_valida = log.validacion_exitosa
+        log.errores_validacion = validation_errors
+        log.advertencias_validacion = result.get('warnings', [])
+        log.procesamiento_exitoso = result['success']
+        log.productos_procesados = result.get('processed_items', 0)
+        log.productos_fallidos = len(row_errors)
+        log.total_filas = result.get('total_items', log.total_filas)
+        log.tiempo_procesamiento = elapsed
+        log.metricas = result.get('metricas', {})
+        for campo, valor in result.get('estadisticas', {}).items():
+            setattr(log, campo, valor)
+        log.errores_detallados = '\n'.join(validation_errors or row_errors) or result.get('error')
+        log.save()
+
+    @staticmethod
+    def serialize(job):
+        return {
+            'job_id': job.id,
+            'envio_id': job.envio_id,
+            'tipo': job.tipo,
+            'estado': job.estado,
+            'progreso': job.progreso,
+            'terminado': job.terminado,
+            'intentos': job.intentos,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+            'duracion': str(job.duracion) if job.duracion else None,
+            'resultado': job.resultado,
+            'error': job.error,
+            'log_id': job.log_id
+        }
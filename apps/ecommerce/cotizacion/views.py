@@ -13,6 +13,7 @@
 from web_project import TemplateLayout
 from django.core.files.storage import default_storage
 from apps.ecommerce.cotizacion.services_notifications import CotizacionNotificationService
+from apps.ecommerce.pagination import KeysetListMixin
 from .models import EnvioCotizacion, RespuestaCotizacion, DetalleRespuestaCotizacion
 from .serializers import (
     EnvioCotizacionSerializer,
@@ -30,8 +31,9 @@
 import logging
 logger = logging.getLogger(__name__)
 
-class EnvioCotizacionListCreateAPIView(generics.ListCreateAPIView):
+class EnvioCotizacionListCreateAPIView(KeysetListMixin, generics.ListCreateAPIView):
     """API para listar y crear envíos de cotización"""
+    stream_filename = 'envios_cotizacion.ndjson'
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -61,11 +63,6 @@ def get_queryset(self):
             queryset = queryset.filter(proveedor_id=supplier_id)
             
         return queryset.order_by('-created_at')
-    
-    def list(self, request):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"data": serializer.data})
 
 
 class EnvioCotizacionViewSet(viewsets.ModelViewSet):
@@ -96,6 +93,7 @@ def processing_logs(self, request, pk=None):
                 'total_filas': log.total_filas,
                 'tasa_exito': log.tasa_exito_productos,
                 'tiempo_procesamiento': str(log.tiempo_procesamiento) if log.tiempo_procesamiento else None,
+                'metricas': log.metricas,
                 'created_at': log.created_at,
                 'errores_validacion': log.errores_validacion,
                 'advertencias_validacion': log.advertencias_validacion,
@@ -183,29 +181,19 @@ def validate_excel(self, request, pk=None):
             }
             
             # Análisis adicional si es válido
-            if validation_result['valid'] and validation_result['dataframe'] is not None:
-                df = validation_result['dataframe']
+            if validation_result['valid']:
                 requirement_codes = set(
                     envio.requerimiento.detalles.values_list('producto__code', flat=True)
                 )
                 
-                codigo_col_pos = processor.OFFICIAL_COLUMNS['CÓDIGO']
-                codes_in_excel = []
-                
-                for index, row in df.iterrows():
-                    try:
-                        codigo = str(row.iloc[codigo_col_pos]).strip() if pd.notna(row.iloc[codigo_col_pos]) else ""
-                        if codigo and codigo.upper() != 'NAN':
-                            codes_in_excel.append(codigo)
-                    except:
-                        continue
+                codes_in_excel = validation_result['codigos']
                 
                 codes_found = set(codes_in_excel) & requirement_codes
                 codes_missing = requirement_codes - set(codes_in_excel)
                 codes_extra = set(codes_in_excel) - requirement_codes
                 
                 response_data['analysis'] = {
-                    'total_rows': len(df),
+                    'total_rows': validation_result['total_filas'],
                     'total_requirement_products': len(requirement_codes),
                     'codes_found': len(codes_found),
                     'codes_missing': len(codes_missing),
@@ -533,82 +521,38 @@ def upload_response(self, request, pk=None):
             )
 
         try:
-            from .services import CotizacionResponseProcessor
             from django.core.files.base import ContentFile
+            from .services import CotizacionResponseProcessor
+            from .services_jobs import ExcelProcessingJobService
             
-            # Leer archivo en memoria una sola vez
-            archivo.seek(0)
-            archivo_content = archivo.read()
-            archivo.seek(0)  # Reset para validación
-            
-            # Validar archivo
-            processor = CotizacionResponseProcessor(envio)
-            validation_result = processor._validate_excel_from_file(archivo)
-            
-            if not validation_result['valid']:
+            # Solo se revisa el encabezado aquí; la validación completa la hace el worker
+            structure_errors = CotizacionResponseProcessor(envio)._validate_structure(archivo)
+            if structure_errors:
                 return Response({
                     "message": "El archivo Excel no es válido",
-                    "validation_errors": validation_result['errors'],
-                    "warnings": validation_result['warnings']
+                    "validation_errors": structure_errors,
+                    "warnings": []
                 }, status=status.HTTP_400_BAD_REQUEST)
-
-            logger.debug("Validación exitosa. Eliminando respuesta anterior si existe...")
             
-            # Eliminar respuesta anterior si existe
-            from .models import RespuestaCotizacion
-            existing_response = RespuestaCotizacion.objects.filter(envio=envio).first()
-            if existing_response:
-                existing_response.delete()
-                logger.debug("Respuesta anterior eliminada")
-            
-            # Crear nuevo archivo desde el contenido en memoria
-            nuevo_archivo = ContentFile(archivo_content, name=archivo.name)
-            
-            # Guardar archivo en el modelo con procesamiento automático deshabilitado
-            envio.archivo_respuesta_cliente = nuevo_archivo
-            envio.respuesta_procesada = False
+            # El archivo queda en el trabajo: solo reemplaza al del envío (y a su
+            # respuesta) si el worker lo procesa completo sin errores
+            archivo.seek(0)
+            job = ExcelProcessingJobService.enqueue(
+                envio, request.user, tipo='upload',
+                archivo_subido=ContentFile(archivo.read(), name=archivo.name)
+            )
+            logger.debug(f"Archivo guardado. Job {job.id} encolado para envio_id={pk}")
             
-            # Guardar sin activar procesamiento automático
-            envio._skip_auto_processing = True
-            envio.save()
-            delattr(envio, '_skip_auto_processing')
-            
-            # Procesar manualmente con el contenido en memoria
-            archivo_memory = ContentFile(archivo_content, name=archivo.name)
-            result = processor.process_excel_from_memory(archivo_memory)
-            
-            if result['success']:
-                envio.respuesta_procesada = True
-                envio.fecha_procesamiento = timezone.now()
-                envio._skip_auto_processing = True
-                envio.save()
-                delattr(envio, '_skip_auto_processing')
-                
-                # Notificar respuesta recibida
-                CotizacionNotificationService.notify_cotizacion_received(envio)
-                
-                # Verificar si hay suficientes respuestas para comparar
-                CotizacionNotificationService.notify_cotizacion_comparison_ready(envio.requerimiento)
-                
-                return Response({
-                    "message": "Archivo subido y procesado exitosamente",
-                    "estado": envio.estado,
-                    "respuesta_id": result.get('respuesta_id')
-                })
-            else:
-                # Notificar errores de procesamiento
-                CotizacionNotificationService.notify_processing_errors(
-                    envio, result.get('details', [])
-                )
-                return Response({
-                    "message": f"Error procesando archivo: {result.get('error')}",
-                    "details": result.get('details', [])
-                }, status=status.HTTP_400_BAD_REQUEST)
+            return Response({
+                "message": "Archivo recibido. El procesamiento continúa en segundo plano",
+                "estado": envio.estado,
+                "job_id": job.id
+            }, status=status.HTTP_202_ACCEPTED)
 
         except Exception as e:
-            logger.exception("Error procesando archivo")
+            logger.exception("Error guardando archivo")
             return Response({
-                "message": f"Error procesando archivo: {str(e)}"
+                "message": f"Error guardando archivo: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
               
     @action(detail=True, methods=['post'])
@@ -623,25 +567,14 @@ def reprocess_response(self, request, pk=None):
             )
         
         try:
-            # Eliminar respuesta anterior si existe
-            if hasattr(envio, 'respuesta') and envio.respuesta:
-                envio.respuesta.delete()
+            from .services_jobs import ExcelProcessingJobService
             
-            # Reprocesar
-            envio.respuesta_procesada = False
-            success = envio.procesar_respuesta_automatica()
-            envio.save()
+            job = ExcelProcessingJobService.enqueue(envio, request.user, tipo='reprocess')
             
-            if success:
-                return Response({
-                    "message": "Archivo reprocesado exitosamente",
-                    "respuesta_id": envio.respuesta.id if hasattr(envio, 'respuesta') else None
-                })
-            else:
-                return Response(
-                    {"error": "Error en el reprocesamiento"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            return Response({
+                "message": "Reprocesamiento encolado",
+                "job_id": job.id
+            }, status=status.HTTP_202_ACCEPTED)
                 
         except Exception as e:
             return Response(
@@ -649,10 +582,38 @@ def reprocess_response(self, request, pk=None):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=True, methods=['get'])
+    def processing_job(self, request, pk=None):
+        """Estado de un trabajo de procesamiento (?job_id=, por defecto el último)"""
+        envio = get_object_or_404(EnvioCotizacion, pk=pk)
+        
+        from .services_jobs import ExcelProcessingJobService
+        
+        jobs = envio.processing_jobs.all()
+        job_id = request.query_params.get('job_id')
+        if job_id:
+            try:
+                job_id = int(job_id)
+            except ValueError:
+                return Response(
+                    {"error": "job_id debe ser un número entero"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        job = jobs.filter(id=job_id).first() if job_id else jobs.order_by('-created_at').first()
+        
+        if not job:
+            return Response(
+                {"error": "Trabajo no encontrado"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response(ExcelProcessingJobService.serialize(job))
+
 
 class RespuestaCotizacionViewSet(viewsets.ModelViewSet):
     """ViewSet para gestión de respuestas de cotización"""
-    queryset = RespuestaCotizacion.objects.all().select_related('envio__proveedor')
+    # Las respuestas en preparación (sin envío) no se exponen
+    queryset = RespuestaCotizacion.objects.filter(envio__isnull=False).select_related('envio__proveedor')
     serializer_class = RespuestaCotizacionSerializer
     
     @action(detail=False, methods=['get'])
@@ -55,22 +55,34 @@ class Meta:
             'last_sale_date'
         ]
     
+    # Las vistas anotan el queryset con CustomerSalesSummaryService.annotate;
+    # sin anotaciones (p. ej. recién creado) se consulta por cliente
+    
     def get_contacts_count(self, obj):
         """Retorna el número de contactos del cliente"""
+        if hasattr(obj, 'contacts_total'):
+            return obj.contacts_total or 0
         return obj.contacts.count()
     
     def get_total_sales(self, obj):
         """Retorna el número total de ventas del cliente"""
+        if hasattr(obj, 'total_sales_count'):
+            return obj.total_sales_count or 0
         return obj.sales.count()
     
     def get_total_sales_amount(self, obj):
         """Retorna el monto total de ventas del cliente"""
-        from django.db.models import Sum
-        total = obj.sales.aggregate(total=Sum('total_amount'))['total']
+        if hasattr(obj, 'total_sales_amount'):
+            total = obj.total_sales_amount
+        else:
+            from django.db.models import Sum
+            total = obj.sales.aggregate(total=Sum('total_amount'))['total']
         return float(total) if total else 0.0
     
     def get_last_sale_date(self, obj):
         """Retorna la fecha de la última venta"""
+        if hasattr(obj, 'last_sale_date'):
+            return obj.last_sale_date
         last_sale = obj.sales.order_by('-sale_date').first()
         return last_sale.sale_date if last_sale else None
     
@@ -218,7 +230,7 @@ class Meta:
         ]
     
     def get_total_sales(self, obj):
-        return getattr(obj, 'total_sales_count', 0)
+        return getattr(obj, 'total_sales_count', 0) or 0
     
     def get_total_sales_amount(self, obj):
         amount = getattr(obj, 'total_sales_amount', 0)
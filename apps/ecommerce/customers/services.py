@@ -223,6 +223,37 @@ def update_customer_from_api(customer_id: int) -> Tuple[bool, Dict]:
             return False, {"error": f"Error interno: {str(e)}"}
 
 
+class CustomerSalesSummaryService:
+    """Resumen de ventas y contactos por cliente, calculado para todo el listado"""
+
+    @staticmethod
+    def annotate(queryset):
+        """Agregar contacts_total, total_sales_count, total_sales_amount y last_sale_date.
+
+        Cada valor es una subconsulta correlacionada: con joins a ventas y
+        contactos a la vez la suma de ventas se multiplicaría por los contactos.
+        """
+        from django.db.models import Count, Max, OuterRef, Subquery, Sum
+        from apps.ecommerce.sales.models import Sale
+        from .models import CustomerContact
+
+        def aggregate(model, expression):
+            return Subquery(
+                model.objects.filter(customer_id=OuterRef('pk'))
+                .order_by()
+                .values('customer_id')
+                .annotate(value=expression)
+                .values('value')
+            )
+
+        return queryset.annotate(
+            contacts_total=aggregate(CustomerContact, Count('id')),
+            total_sales_count=aggregate(Sale, Count('id')),
+            total_sales_amount=aggregate(Sale, Sum('total_amount')),
+            last_sale_date=aggregate(Sale, Max('sale_date')),
+        )
+
+
 class CustomerAnalyticsService:
     """Servicio para analíticas de clientes"""
     
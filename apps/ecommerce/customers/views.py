@@ -7,6 +7,7 @@
 from django.shortcuts import get_object_or_404
 from django.db import models
 from django.db.models import Q, Count, Sum
+from apps.ecommerce.pagination import KeysetListMixin
 from .models import Customer, CustomerContact
 from .serializers import (
     CustomerSerializer, 
@@ -18,8 +19,9 @@
 )
 from .services import *
 from apps.ecommerce.customers.services_notifications import CustomerNotificationService
-class CustomerListCreateAPIView(generics.ListCreateAPIView):
+class CustomerListCreateAPIView(KeysetListMixin, generics.ListCreateAPIView):
     """Lista todos los clientes con filtros y crea nuevos clientes"""
+    stream_filename = 'clientes.ndjson'
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -27,11 +29,8 @@ def get_serializer_class(self):
         return CustomerListSerializer
 
     def get_queryset(self):
-        # AGREGAR las anotaciones que necesita CustomerListSerializer
-        queryset = Customer.objects.all().annotate(
-            total_sales_count=Count('sales'),
-            total_sales_amount=Sum('sales__total_amount')
-        ).prefetch_related('contacts')
+        # Resumen de ventas para todo el listado en una sola consulta
+        queryset = CustomerSalesSummaryService.annotate(Customer.objects.all())
         
         # Filtro por estado activo/inactivo
         status_filter = self.request.query_params.get('status')
@@ -64,12 +63,7 @@ def get_queryset(self):
                 Q(email__icontains=search)
             )
 
-        return queryset.order_by('-created_at')
-
-    def list(self, request):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"data": serializer.data})
+        return queryset.order_by('-created_at', '-id')
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -209,7 +203,6 @@ def list(self, request):
 
 class CustomerViewSet(viewsets.ModelViewSet):
     """ViewSet completo para operaciones CRUD de clientes"""
-    queryset = Customer.objects.all().prefetch_related('contacts', 'sales')
     serializer_class = CustomerSerializer
     parser_classes = [JSONParser, MultiPartParser, FormParser]
     @action(detail=True, methods=['get'])
@@ -243,6 +236,9 @@ def sales_analytics(self, request, pk=None):
                 'monthly_sales': [],
                 'top_products': []
             })
+    def get_queryset(self):
+        return CustomerSalesSummaryService.annotate(Customer.objects.all()).prefetch_related('contacts')
+
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return CustomerUpdateSerializer
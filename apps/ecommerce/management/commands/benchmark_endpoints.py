@@ -0,0 +1,98 @@
+# apps/ecommerce/management/commands/benchmark_endpoints.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.ecommerce.benchmark import ENDPOINTS, seed
+from web_project.query_budget_middleware import QueryRecorder
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de endpoints DRF: siembra N clientes, productos, ventas y cotizaciones en una '
+        'base de datos de prueba y mide el tiempo de cada endpoint. El presupuesto de consultas lo '
+        'verifica `manage.py test apps.ecommerce`'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=200)
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--sales', type=int, default=200)
+        parser.add_argument('--quotations', type=int, default=50)
+        parser.add_argument('--items-per-sale', type=int, default=3)
+        parser.add_argument(
+            '--time-scale', type=float, default=1.0,
+            help='Multiplicador de los límites de tiempo (0 para no verificar tiempos)'
+        )
+        parser.add_argument('--only', help='Endpoints a medir, separados por coma')
+
+    def handle(self, *args, **options):
+        endpoints = ENDPOINTS
+        if options['only']:
+            names = {name.strip() for name in options['only'].split(',')}
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in names]
+            if not endpoints:
+                raise CommandError(f'Ningún endpoint coincide con: {options["only"]}')
+
+        # Base de datos de prueba desechable: nunca siembra sobre los datos reales
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            ids = self.seed(options)
+            failures = self.run(endpoints, ids, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f'{len(failures)} endpoints fuera del tiempo límite: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('Todos los endpoints dentro del tiempo límite'))
+
+    def seed(self, options):
+        started = time.perf_counter()
+        ids = seed(
+            customers=options['customers'], products=options['products'], sales=options['sales'],
+            quotations=options['quotations'], items_per_sale=options['items_per_sale'],
+        )
+        self.stdout.write(
+            f'Sembrado en {time.perf_counter() - started:.1f}s: {options["customers"]} clientes, '
+            f'{options["products"]} productos, {options["sales"]} ventas, {options["quotations"]} cotizaciones'
+        )
+        return ids
+
+    def run(self, endpoints, ids, options):
+        client = Client()
+        client.force_login(ids['user'])
+        failures = []
+
+        for name, url, _max_queries, max_ms in endpoints:
+            url = url.format(**ids)
+            client.get(url)  # Calentar (plantillas, caches de clase, conexiones)
+
+            with QueryRecorder() as recorder:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+
+            problems = []
+            if response.status_code != 200:
+                problems.append(f'HTTP {response.status_code}')
+            if options['time_scale'] and elapsed_ms > max_ms * options['time_scale']:
+                problems.append(f'{elapsed_ms:.0f} ms > {max_ms * options["time_scale"]:.0f} ms')
+
+            line = (
+                f'{name:<26} {recorder.count:>4} consultas ({recorder.repeated} repetidas) '
+                f'{recorder.db_time_ms:>8.1f} ms BD {elapsed_ms:>8.1f} ms total'
+            )
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{line}  <- {"; ".join(problems)}'))
+                for sql, count in recorder.most_repeated():
+                    self.stdout.write(f'    x{count}: {sql[:160]}')
+            else:
+                self.stdout.write(line)
+
+        return failures
@@ -0,0 +1,31 @@
+# apps/ecommerce/management/commands/compact_stock_balances.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.ecommerce.products.services import StockBalanceService
+
+
+class Command(BaseCommand):
+    help = 'Compacta los movimientos de stock de días cerrados en saldos diarios por producto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--until',
+            help='Último día a compactar, YYYY-MM-DD (por defecto: ayer)',
+        )
+
+    def handle(self, *args, **options):
+        until = None
+        if options['until']:
+            until = parse_date(options['until'])
+            if until is None:
+                raise CommandError('Fecha inválida, use el formato YYYY-MM-DD')
+            if until >= timezone.localdate():
+                raise CommandError('Solo se pueden compactar días cerrados: --until debe ser anterior a hoy')
+
+        created = StockBalanceService.compact(until)
+        last = StockBalanceService.last_compacted_date()
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} saldos generados. Última fecha compactada: {last or "-"}'
+        ))
@@ -0,0 +1,120 @@
+# apps/ecommerce/management/commands/process_quotation_jobs.py
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.ecommerce.cotizacion.services_jobs import ExcelProcessingJobService
+
+
+def _init_worker():
+    """Inicializar Django en procesos creados con spawn (en fork ya está listo)"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _run_job(job_id):
+    try:
+        result = ExcelProcessingJobService.run(job_id)
+        return job_id, result['success']
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Worker que procesa en segundo plano las respuestas Excel de cotizaciones encoladas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Número de procesos del pool (por defecto: min(4, CPUs))',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Segundos entre consultas a la cola cuando está vacía',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesar los trabajos pendientes y terminar',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=30,
+            help='Minutos tras los cuales un trabajo "procesando" se considera abandonado',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=3,
+            help='Intentos máximos antes de marcar un trabajo abandonado como fallido',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker_name} iniciado con {workers} procesos'))
+
+        running = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            try:
+                while True:
+                    requeued, failed = ExcelProcessingJobService.requeue_stale(
+                        options['stale_minutes'], options['max_attempts']
+                    )
+                    if requeued or failed:
+                        self.stdout.write(self.style.WARNING(
+                            f'Trabajos abandonados: {requeued} reencolados, {failed} fallidos'
+                        ))
+
+                    while len(running) < workers:
+                        job_id = ExcelProcessingJobService.claim_next(worker_name)
+                        if job_id is None:
+                            break
+                        # Los procesos hijos no deben heredar la conexión abierta del padre
+                        connections.close_all()
+                        running[executor.submit(_run_job, job_id)] = job_id
+                        self.stdout.write(f'Job {job_id} en proceso')
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job_id = running.pop(future)
+                        self._report(future, job_id)
+
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Deteniendo worker, esperando trabajos en curso...'))
+                for future in wait(running).done:
+                    self._report(future, running[future])
+
+        self.stdout.write(self.style.SUCCESS('Worker detenido'))
+
+    def _report(self, future, job_id):
+        try:
+            _, success = future.result()
+        except Exception as e:
+            ExcelProcessingJobService.mark_failed(job_id, str(e))
+            self.stdout.write(self.style.ERROR(f'Job {job_id} terminó con excepción: {e}'))
+            return
+
+        if success:
+            self.stdout.write(self.style.SUCCESS(f'Job {job_id} completado'))
+        else:
+            self.stdout.write(self.style.WARNING(f'Job {job_id} fallido'))
@@ -0,0 +1,15 @@
+# apps/ecommerce/management/commands/rebuild_purchase_stats.py
+from django.core.management.base import BaseCommand
+
+from apps.ecommerce.purchasing.services import ProductPurchaseStatsService
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas de compra por producto (ejecutar tras migrar o para reparar desfases)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Productos recalculados por lote')
+
+    def handle(self, *args, **options):
+        refreshed = ProductPurchaseStatsService.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{refreshed} productos con estadísticas de compra'))
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0015_purchaseorder_history_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExcelProcessingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('upload', 'Carga de Archivo'), ('reprocess', 'Reprocesamiento')], default='upload', max_length=20, verbose_name='Tipo')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('fallido', 'Fallido')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('progreso', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('resultado', models.JSONField(blank=True, default=dict, verbose_name='Resultado')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Creado Por')),
+                ('envio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processing_jobs', to='ecommerce.enviocotizacion', verbose_name='Envío')),
+                ('log', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job', to='ecommerce.excelprocessinglog', verbose_name='Log de Procesamiento')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Procesamiento Excel',
+                'verbose_name_plural': 'Trabajos de Procesamiento Excel',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['estado', 'created_at'], name='ecommerce_e_estado_59dac9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0016_excelprocessingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excelprocessinglog',
+            name='metricas',
+            field=models.JSONField(blank=True, default=dict, help_text='Duración por fase (read, validate, resolve_codes, parse, insert) y conteo de filas', verbose_name='Métricas'),
+        ),
+    ]
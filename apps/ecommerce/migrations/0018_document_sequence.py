@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0017_excelprocessinglog_metricas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10, verbose_name='Prefijo')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Último número asignado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Documentos',
+                'verbose_name_plural': 'Secuencias de Documentos',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentsequence',
+            constraint=models.UniqueConstraint(fields=('prefix', 'fecha'), name='unique_document_sequence_prefix_fecha'),
+        ),
+    ]
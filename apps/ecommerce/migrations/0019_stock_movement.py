@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0018_document_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('sale', 'Venta'), ('sale_cancel', 'Anulación de Venta'), ('purchase_reception', 'Recepción de Compra'), ('adjustment', 'Ajuste Manual')], max_length=20, verbose_name='Tipo de Movimiento')),
+                ('quantity', models.IntegerField(verbose_name='Cantidad')),
+                ('stock_before', models.PositiveIntegerField(verbose_name='Stock Anterior')),
+                ('stock_after', models.PositiveIntegerField(verbose_name='Stock Resultante')),
+                ('reference_type', models.CharField(blank=True, max_length=30, verbose_name='Tipo de Referencia')),
+                ('reference_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='ID de Referencia')),
+                ('notes', models.CharField(blank=True, max_length=255, verbose_name='Observaciones')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Registrado por')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='ecommerce.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock',
+                'verbose_name_plural': 'Movimientos de Stock',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['product', 'created_at'], name='ecommerce_s_product_530995_idx'), models.Index(fields=['reference_type', 'reference_id'], name='ecommerce_s_referen_c56a1b_idx')],
+            },
+        ),
+    ]
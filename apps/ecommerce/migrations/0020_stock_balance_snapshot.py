@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0019_stock_movement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('stock', models.PositiveIntegerField(verbose_name='Stock al cierre')),
+                ('entradas', models.PositiveIntegerField(default=0, verbose_name='Entradas')),
+                ('salidas', models.PositiveIntegerField(default=0, verbose_name='Salidas')),
+                ('movimientos', models.PositiveIntegerField(default=0, verbose_name='Movimientos')),
+                ('last_movement_id', models.PositiveBigIntegerField(verbose_name='Último movimiento incluido')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='ecommerce.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Stock',
+                'verbose_name_plural': 'Saldos de Stock',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='ecommerce_s_fecha_efbb47_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockbalancesnapshot',
+            constraint=models.UniqueConstraint(fields=('product', 'fecha'), name='unique_stock_snapshot_product_fecha'),
+        ),
+    ]
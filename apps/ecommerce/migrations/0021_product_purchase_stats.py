@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:15
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0020_stock_balance_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPurchaseStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_purchase_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('average_purchase_price', models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=14)),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('last_order_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_stats', to='ecommerce.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Estadística de compra de producto',
+                'verbose_name_plural': 'Estadísticas de compra de productos',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ecommerce', '0021_product_purchase_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excelprocessingjob',
+            name='archivo',
+            field=models.FileField(blank=True, help_text='Pasa a ser el archivo del envío solo si el procesamiento termina bien', null=True, upload_to='cotizaciones/respuestas_clientes/', verbose_name='Archivo Subido'),
+        ),
+        migrations.AlterField(
+            model_name='respuestacotizacion',
+            name='envio',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='respuesta', to='ecommerce.enviocotizacion', verbose_name='Envío'),
+        ),
+    ]
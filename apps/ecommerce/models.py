@@ -1,2 +1,3 @@
 from apps.ecommerce.categories.models import Category
 from apps.ecommerce.products.models import Product
+from apps.ecommerce.sequences.models import DocumentSequence
@@ -0,0 +1,86 @@
+# apps/ecommerce/pagination.py
+from itertools import islice
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.notification.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+class KeysetListMixin:
+    """`list()` compartido para las vistas de listado que devuelven {"data": [...]}.
+
+    - Sin parámetros: la respuesta de siempre, todo el queryset en `data`.
+    - `?limit` / `?cursor`: página por (keyset_field, id) como
+      {data, next_cursor, has_more}; `data` sigue sirviendo a DataTables con
+      dataSrc 'data' y el costo no crece con la profundidad de la página.
+    - `?stream=ndjson`: exportación en streaming, un objeto por línea,
+      serializado por bloques sin cargar todo el queryset en memoria.
+    """
+    keyset_field = '-created_at'
+    page_size = 50
+    max_page_size = 500
+    stream_chunk_size = 500
+    stream_filename = 'export.ndjson'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        params = request.query_params
+
+        if params.get('stream') == 'ndjson':
+            return self.stream_ndjson(queryset)
+
+        if 'cursor' in params or 'limit' in params:
+            return self.keyset_page(queryset, params)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response({"data": serializer.data})
+
+    def keyset_page(self, queryset, params):
+        try:
+            limit = int(params.get('limit', self.page_size))
+        except ValueError:
+            limit = self.page_size
+        limit = max(1, min(limit, self.max_page_size))
+
+        field = self.keyset_field.lstrip('-')
+        descending = self.keyset_field.startswith('-')
+        queryset = queryset.order_by(self.keyset_field, '-id' if descending else 'id')
+
+        cursor = params.get('cursor')
+        if cursor:
+            try:
+                value, pk = decode_cursor(cursor, queryset.model._meta.get_field(field).to_python)
+            except InvalidCursorError as e:
+                raise ValidationError({'cursor': str(e)})
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk})
+            )
+
+        items = list(queryset[:limit + 1])
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1], field) if has_more else None
+
+        serializer = self.get_serializer(items, many=True)
+        return Response({'data': serializer.data, 'next_cursor': next_cursor, 'has_more': has_more})
+
+    def stream_ndjson(self, queryset):
+        encoder = JSONEncoder()
+
+        def rows():
+            iterator = queryset.iterator(chunk_size=self.stream_chunk_size)
+            while True:
+                chunk = list(islice(iterator, self.stream_chunk_size))
+                if not chunk:
+                    break
+                for row in self.get_serializer(chunk, many=True).data:
+                    yield encoder.encode(row) + '\n'
+
+        response = StreamingHttpResponse(rows(), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="{self.stream_filename}"'
+        return response
@@ -1,7 +1,7 @@
 
 # apps/ecommerce/products/admin.py
 from django.contrib import admin
-from .models import Product
+from .models import Product, StockMovement
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -9,3 +9,11 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ('is_active', 'category', 'stock_status')
     search_fields = ('code', 'name')
     readonly_fields = ('code',)
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'product', 'movement_type', 'quantity', 'stock_before', 'stock_after', 'reference_type', 'reference_id')
+    list_filter = ('movement_type', 'reference_type')
+    search_fields = ('product__code', 'product__name', 'notes')
+    raw_id_fields = ('product',)
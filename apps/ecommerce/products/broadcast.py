@@ -0,0 +1,113 @@
+# apps/ecommerce/products/broadcast.py
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.notification.realtime import group_send_many
+
+logger = logging.getLogger(__name__)
+
+STOCK_GROUP = 'stock_group'
+LOW_STOCK_GROUP = 'stock_low'
+LOW_STOCK_STATUSES = ('low_stock', 'out_of_stock')
+
+
+def category_group(category_id):
+    return f'stock_category_{category_id}'
+
+
+class StockBroadcaster:
+    """Agrupa los cambios de stock y los envía a `stock_group` en un solo frame.
+
+    Cada cambio reemplaza al anterior del mismo producto; al cerrar la ventana
+    (STOCK_BROADCAST_WINDOW_MS) se envía un único `send_stock_batch` con el
+    último estado de cada producto. Una importación o un POS con mucho
+    movimiento produce así un mensaje por ventana y no uno por cambio.
+    """
+
+    _lock = threading.Lock()
+    _pending = {}
+    _timer = None
+    # Productos anunciados con stock bajo, para avisar a `stock_low` cuando se recuperan
+    _low_ids = set()
+
+    @staticmethod
+    def serialize(product):
+        return {
+            'product_id': product.id,
+            'name': product.name,
+            'category_id': product.category_id,
+            'current_stock': product.stock_current,
+            'stock_minimum': product.stock_minimum,
+            'stock_status': product.stock_status,
+        }
+
+    @classmethod
+    def publish(cls, *products):
+        """Encolar el estado de los productos; se envía al confirmar la transacción"""
+        states = [cls.serialize(product) for product in products]
+        if states:
+            transaction.on_commit(lambda: cls._enqueue(states))
+
+    @classmethod
+    def _enqueue(cls, states):
+        window = getattr(settings, 'STOCK_BROADCAST_WINDOW_MS', 250) / 1000
+
+        with cls._lock:
+            for state in states:
+                cls._pending[state['product_id']] = state
+            if window > 0:
+                if cls._timer is None:
+                    cls._timer = threading.Timer(window, cls.flush)
+                    cls._timer.start()
+                return
+
+        cls.flush()
+
+    @classmethod
+    def flush(cls):
+        """Enviar lo acumulado (también se puede llamar a mano al final de un proceso por lotes)"""
+        with cls._lock:
+            batch, cls._pending = list(cls._pending.values()), {}
+            timer, cls._timer = cls._timer, None
+            topics = cls.topic_batches(batch)
+
+        if timer is not None:
+            timer.cancel()
+        if not batch:
+            return
+
+        try:
+            group_send_many([
+                (group, {'type': 'send_stock_batch', 'data': states})
+                for group, states in topics.items()
+            ])
+        except Exception as e:
+            logger.warning(f"No se pudo enviar la actualización de stock ({len(batch)} productos): {e}")
+
+    @classmethod
+    def topic_batches(cls, batch):
+        """Repartir el lote entre los grupos de cada tema: {grupo: [estados]}.
+
+        `stock_group` recibe todo; cada categoría solo sus filas (los productos
+        sin categoría no tienen grupo propio) y `stock_low` los productos con
+        stock bajo o que acaban de salir de él.
+        """
+        topics = defaultdict(list)
+        topics[STOCK_GROUP] = batch
+
+        for state in batch:
+            if state['category_id'] is not None:
+                topics[category_group(state['category_id'])].append(state)
+
+            if state['stock_status'] in LOW_STOCK_STATUSES:
+                cls._low_ids.add(state['product_id'])
+                topics[LOW_STOCK_GROUP].append(state)
+            elif state['product_id'] in cls._low_ids:
+                cls._low_ids.discard(state['product_id'])
+                topics[LOW_STOCK_GROUP].append(state)
+
+        return topics
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.auth.models import User
 from apps.ecommerce.categories.models import Category
 import uuid
 from django.db.models.signals import pre_save
@@ -91,6 +92,90 @@ def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
 
+
+class StockMovement(models.Model):
+    """Movimiento de stock (libro de inventario, solo se agregan filas)"""
+    MOVEMENT_TYPE_CHOICES = [
+        ('sale', 'Venta'),
+        ('sale_cancel', 'Anulación de Venta'),
+        ('purchase_reception', 'Recepción de Compra'),
+        ('adjustment', 'Ajuste Manual'),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_movements',
+        verbose_name="Producto"
+    )
+    movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPE_CHOICES, verbose_name="Tipo de Movimiento")
+    quantity = models.IntegerField(verbose_name="Cantidad")  # Positiva = entrada, negativa = salida
+    stock_before = models.PositiveIntegerField(verbose_name="Stock Anterior")
+    stock_after = models.PositiveIntegerField(verbose_name="Stock Resultante")
+
+    # Documento que originó el movimiento
+    reference_type = models.CharField(max_length=30, blank=True, verbose_name="Tipo de Referencia")
+    reference_id = models.PositiveIntegerField(blank=True, null=True, verbose_name="ID de Referencia")
+    notes = models.CharField(max_length=255, blank=True, verbose_name="Observaciones")
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Registrado por"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha")
+
+    class Meta:
+        verbose_name = "Movimiento de Stock"
+        verbose_name_plural = "Movimientos de Stock"
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['product', 'created_at']),
+            models.Index(fields=['reference_type', 'reference_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.get_movement_type_display()} {self.quantity:+d}"
+
+
+
+class StockBalanceSnapshot(models.Model):
+    """Saldo de stock de un producto al cierre de un día (compactación de StockMovement).
+
+    Lo genera el comando `compact_stock_balances`; los reportes parten del
+    último saldo y solo recorren los movimientos de los días no compactados.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots',
+        verbose_name="Producto"
+    )
+    fecha = models.DateField(verbose_name="Fecha")
+    stock = models.PositiveIntegerField(verbose_name="Stock al cierre")
+    entradas = models.PositiveIntegerField(default=0, verbose_name="Entradas")
+    salidas = models.PositiveIntegerField(default=0, verbose_name="Salidas")
+    movimientos = models.PositiveIntegerField(default=0, verbose_name="Movimientos")
+    last_movement_id = models.PositiveBigIntegerField(verbose_name="Último movimiento incluido")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Saldo de Stock"
+        verbose_name_plural = "Saldos de Stock"
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'fecha'], name='unique_stock_snapshot_product_fecha'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.fecha}: {self.stock}"
+
+
 # Alternativa con UUID (descomenta si prefieres códigos UUID)
 """
 @receiver(pre_save, sender=Product)
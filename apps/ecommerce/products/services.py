@@ -0,0 +1,257 @@
+# apps/ecommerce/products/services.py
+import logging
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .broadcast import StockBroadcaster
+from .models import Product, StockBalanceSnapshot, StockMovement
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStockError(ValueError):
+    """Alguna línea dejaría el stock en negativo; no se aplicó ningún cambio"""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        detalle = ', '.join(
+            f"{s['product_name']} (disponible: {s['available']}, requerido: {s['requested']})"
+            for s in shortages
+        )
+        super().__init__(f"Stock insuficiente para {detalle}")
+
+
+class StockLedgerService:
+    """Único punto de escritura de Product.stock_current.
+
+    Aplica todas las líneas de un documento en una transacción: bloquea los
+    productos involucrados (select_for_update), descuenta con UPDATEs
+    condicionales sobre F('stock_current') para que nunca quede negativo
+    y registra un StockMovement por línea.
+    """
+
+    @staticmethod
+    def apply(lines, movement_type, reference=None, reference_type='', user=None, notes=''):
+        """Aplicar líneas (product_id, delta) y devolver {product_id: Product} actualizados.
+
+        Lanza InsufficientStockError si alguna salida excede el stock disponible.
+        """
+        lines = [(product_id, int(delta)) for product_id, delta in lines if delta]
+        if not lines:
+            return {}
+
+        totals = OrderedDict()
+        for product_id, delta in lines:
+            totals[product_id] = totals.get(product_id, 0) + delta
+
+        reference_id = getattr(reference, 'pk', reference)
+        reference_type = reference_type or (reference._meta.model_name if hasattr(reference, '_meta') else '')
+
+        with transaction.atomic():
+            products = Product.objects.select_for_update().in_bulk(list(totals))
+
+            shortages = [
+                {
+                    'product_id': product_id,
+                    'product_name': products[product_id].name if product_id in products else product_id,
+                    'available': products[product_id].stock_current if product_id in products else 0,
+                    'requested': -delta,
+                }
+                for product_id, delta in totals.items()
+                if product_id not in products or products[product_id].stock_current + delta < 0
+            ]
+            if shortages:
+                raise InsufficientStockError(shortages)
+
+            for product_id, delta in totals.items():
+                updated = Product.objects.filter(
+                    pk=product_id, stock_current__gte=max(-delta, 0)
+                ).update(stock_current=F('stock_current') + delta)
+                if not updated:
+                    # Otra transacción consumió el stock entre la lectura y el UPDATE
+                    raise InsufficientStockError([{
+                        'product_id': product_id,
+                        'product_name': products[product_id].name,
+                        'available': Product.objects.filter(pk=product_id).values_list('stock_current', flat=True).first(),
+                        'requested': -delta,
+                    }])
+
+            movements = []
+            for product_id, delta in lines:
+                product = products[product_id]
+                stock_before = product.stock_current
+                product.stock_current = stock_before + delta
+                movements.append(StockMovement(
+                    product=product,
+                    movement_type=movement_type,
+                    quantity=delta,
+                    stock_before=stock_before,
+                    stock_after=product.stock_current,
+                    reference_type=reference_type,
+                    reference_id=reference_id,
+                    notes=notes[:255],
+                    created_by=user if user and user.is_authenticated else None,
+                ))
+            StockMovement.objects.bulk_create(movements)
+            StockBroadcaster.publish(*products.values())
+
+        referencia = f" ({reference_type} {reference_id})" if reference_id else ''
+        logger.info(f"Stock {movement_type}: {len(lines)} líneas aplicadas{referencia}")
+        return products
+
+    @classmethod
+    def set_stock(cls, product_id, new_stock, user=None, notes='Ajuste manual'):
+        """Fijar el stock de un producto registrando la diferencia como ajuste"""
+        with transaction.atomic():
+            current = Product.objects.select_for_update().values_list(
+                'stock_current', flat=True
+            ).get(pk=product_id)
+            products = cls.apply([(product_id, new_stock - current)], 'adjustment', user=user, notes=notes)
+
+        return products.get(product_id) or Product.objects.get(pk=product_id)
+
+    @classmethod
+    def apply_sale(cls, sale, user=None):
+        """Descontar el stock de todos los items de una venta"""
+        lines = [(item.product_id, -item.quantity) for item in sale.items.all()]
+        return cls.apply(lines, 'sale', reference=sale, user=user, notes=f"Venta {sale.sale_number}")
+
+    @classmethod
+    def revert_sale(cls, sale, user=None):
+        """Devolver al stock los items de una venta anulada"""
+        lines = [(item.product_id, item.quantity) for item in sale.items.all()]
+        return cls.apply(lines, 'sale_cancel', reference=sale, user=user, notes=f"Anulación {sale.sale_number}")
+
+
+class StockBalanceService:
+    """Saldos compactados por día y reportes de stock a partir del libro"""
+
+    @staticmethod
+    def last_compacted_date():
+        return StockBalanceSnapshot.objects.aggregate(fecha=Max('fecha'))['fecha']
+
+    @classmethod
+    def compact(cls, until=None):
+        """Generar los saldos diarios de los días cerrados aún no compactados (hasta `until`, inclusive).
+
+        `until` se limita a ayer: compactar el día en curso congelaría un saldo
+        parcial y los movimientos posteriores de ese día nunca se compactarían.
+        """
+        yesterday = timezone.localdate() - timedelta(days=1)
+        until = min(until, yesterday) if until else yesterday
+        last = cls.last_compacted_date()
+
+        movements = StockMovement.objects.annotate(fecha=TruncDate('created_at')).filter(fecha__lte=until)
+        if last:
+            movements = movements.filter(fecha__gt=last)
+
+        groups = list(
+            movements.values('product_id', 'fecha').annotate(
+                entradas=Coalesce(Sum('quantity', filter=Q(quantity__gt=0)), 0),
+                salidas=Coalesce(Sum('quantity', filter=Q(quantity__lt=0)), 0),
+                movimientos=Count('id'),
+                last_movement_id=Max('id'),
+            ).order_by()
+        )
+        if not groups:
+            return 0
+
+        closing = dict(StockMovement.objects.filter(
+            id__in=[group['last_movement_id'] for group in groups]
+        ).values_list('id', 'stock_after'))
+
+        StockBalanceSnapshot.objects.bulk_create(
+            [
+                StockBalanceSnapshot(
+                    product_id=group['product_id'],
+                    fecha=group['fecha'],
+                    stock=closing[group['last_movement_id']],
+                    entradas=group['entradas'],
+                    salidas=-group['salidas'],
+                    movimientos=group['movimientos'],
+                    last_movement_id=group['last_movement_id'],
+                )
+                for group in groups
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        logger.info(f"Saldos de stock compactados: {len(groups)} (hasta {until})")
+        return len(groups)
+
+    @classmethod
+    def stock_as_of(cls, fecha, products=None):
+        """Stock de cada producto al cierre de `fecha` -> {product_id: stock}.
+
+        Toma el último saldo compactado <= fecha y, para los días posteriores a
+        la última compactación, el último movimiento del tramo no compactado.
+        """
+        products = products if products is not None else Product.objects.all()
+        last = cls.last_compacted_date()
+
+        snapshot = StockBalanceSnapshot.objects.filter(
+            product=OuterRef('pk'), fecha__lte=fecha
+        ).order_by('-fecha').values('stock')[:1]
+
+        tail = StockMovement.objects.filter(product=OuterRef('pk'), created_at__date__lte=fecha)
+        if last:
+            tail = tail.filter(created_at__date__gt=last)
+        tail = tail.order_by('-id').values('stock_after')[:1]
+
+        # Sin movimientos hasta esa fecha: el stock previo al primer movimiento posterior
+        first_after = StockMovement.objects.filter(
+            product=OuterRef('pk'), created_at__date__gt=fecha
+        ).order_by('id').values('stock_before')[:1]
+
+        return dict(products.annotate(
+            stock_as_of=Coalesce(
+                Subquery(tail, output_field=IntegerField()),
+                Subquery(snapshot, output_field=IntegerField()),
+                Subquery(first_after, output_field=IntegerField()),
+                F('stock_current'),
+                output_field=IntegerField(),
+            )
+        ).values_list('pk', 'stock_as_of'))
+
+    @classmethod
+    def movement_report(cls, start, end, product_ids=None):
+        """Entradas, salidas y número de movimientos por producto entre dos fechas (inclusive)"""
+        last = cls.last_compacted_date()
+        report = {}
+
+        def merge(rows):
+            for row in rows:
+                totals = report.setdefault(row['product_id'], {'entradas': 0, 'salidas': 0, 'movimientos': 0})
+                totals['entradas'] += row['entradas'] or 0
+                totals['salidas'] += row['salidas'] or 0
+                totals['movimientos'] += row['movimientos'] or 0
+
+        if last and start <= last:
+            snapshots = StockBalanceSnapshot.objects.filter(fecha__gte=start, fecha__lte=min(end, last))
+            if product_ids is not None:
+                snapshots = snapshots.filter(product_id__in=product_ids)
+            merge(snapshots.values('product_id').annotate(
+                entradas=Sum('entradas'),
+                salidas=Sum('salidas'),
+                movimientos=Sum('movimientos'),
+            ).order_by())
+
+        tail_start = max(start, last + timedelta(days=1)) if last else start
+        if tail_start <= end:
+            movements = StockMovement.objects.filter(
+                created_at__date__gte=tail_start, created_at__date__lte=end
+            )
+            if product_ids is not None:
+                movements = movements.filter(product_id__in=product_ids)
+            merge(movements.values('product_id').annotate(
+                entradas=Coalesce(Sum('quantity', filter=Q(quantity__gt=0)), 0),
+                salidas=-Coalesce(Sum('quantity', filter=Q(quantity__lt=0)), 0),
+                movimientos=Count('id'),
+            ).order_by())
+
+        return report
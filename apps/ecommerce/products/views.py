@@ -5,27 +5,27 @@
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django.shortcuts import get_object_or_404
 from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from apps.ecommerce.pagination import KeysetListMixin
 from .models import Product
 from .serializers import ProductSerializer
+from .broadcast import StockBroadcaster
+from .services import StockBalanceService, StockLedgerService
 from apps.ecommerce.categories.models import Category
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from apps.notification.services import notification_service
 from apps.notification.models import TipoNotificacion
 from auth.models import Role
-class ActiveProductListAPIView(generics.ListAPIView):
+class ActiveProductListAPIView(KeysetListMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
+    stream_filename = 'productos_activos.ndjson'
 
     def get_queryset(self):
         return Product.objects.filter(is_active=True).select_related('category')
 
-    def list(self, request):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"data": serializer.data})
-
-class ProductListCreateAPIView(generics.ListCreateAPIView):
+class ProductListCreateAPIView(KeysetListMixin, generics.ListCreateAPIView):
     serializer_class = ProductSerializer
+    stream_filename = 'productos.ndjson'
 
     def get_queryset(self):
         queryset = Product.objects.all().select_related('category')
@@ -56,11 +56,6 @@ def get_queryset(self):
 
         return queryset
 
-    def list(self, request):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"data": serializer.data})
-
 class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.all().select_related('category')
     serializer_class = ProductSerializer
@@ -68,19 +63,7 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     def notify_stock_update(self, product):
         """Notifica a través de WebSocket cuando un producto es creado o actualizado."""
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            "stock_group",
-            {
-                "type": "send_stock_update",
-                "data": {
-                    "product_id": product.id,
-                    "name": product.name,
-                    "current_stock": product.stock_current,
-                    "stock_status": product.stock_status,
-                },
-            }
-        )
+        StockBroadcaster.publish(product)
 
     def perform_create(self, serializer):
         product = serializer.save()
@@ -183,11 +166,9 @@ def update_stock(self, request, pk=None):
                     "error": "El stock no puede ser negativo"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            product.stock_current = new_stock
-            product.save()
-            self.notify_stock_update(product)
-
-
+            # Queda registrado en el libro de stock como ajuste manual
+            # El libro de stock publica el cambio en stock_group
+            product = StockLedgerService.set_stock(product.pk, new_stock, user=request.user)
             
             return Response({
                 "message": f"Stock actualizado. Nuevo stock: {product.stock_current}",
@@ -200,6 +181,85 @@ def update_stock(self, request, pk=None):
                 "error": "Cantidad de stock inválida"
             }, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['get'])
+    def stock_movements(self, request, pk=None):
+        """Últimos movimientos de stock del producto"""
+        product = get_object_or_404(Product, pk=pk)
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), 500)
+        except ValueError:
+            limit = 50
+
+        movements = product.stock_movements.select_related('created_by')[:limit]
+        return Response({
+            "product_id": product.id,
+            "current_stock": product.stock_current,
+            "data": [
+                {
+                    "id": movement.id,
+                    "movement_type": movement.movement_type,
+                    "movement_type_display": movement.get_movement_type_display(),
+                    "quantity": movement.quantity,
+                    "stock_before": movement.stock_before,
+                    "stock_after": movement.stock_after,
+                    "reference_type": movement.reference_type,
+                    "reference_id": movement.reference_id,
+                    "notes": movement.notes,
+                    "created_by": movement.created_by.username if movement.created_by else None,
+                    "created_at": movement.created_at,
+                }
+                for movement in movements
+            ]
+        })
+
+    @action(detail=False, methods=['get'])
+    def stock_report(self, request):
+        """Stock al cierre de una fecha y movimientos del período (?start=YYYY-MM-DD&end=YYYY-MM-DD)"""
+        try:
+            end = self._date_param(request, 'end') or timezone.localdate()
+            start = self._date_param(request, 'start') or end
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if start > end:
+            return Response({
+                "error": "La fecha inicial no puede ser posterior a la final"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        products = self.get_queryset()
+        stock = StockBalanceService.stock_as_of(end, products)
+        movements = StockBalanceService.movement_report(start, end, product_ids=list(stock))
+        empty = {'entradas': 0, 'salidas': 0, 'movimientos': 0}
+
+        return Response({
+            "start": start,
+            "end": end,
+            "data": [
+                {
+                    "product_id": product.id,
+                    "code": product.code,
+                    "name": product.name,
+                    "stock": stock.get(product.id),
+                    **movements.get(product.id, empty),
+                }
+                for product in products.select_related(None).only('id', 'code', 'name')
+            ]
+        })
+
+    @staticmethod
+    def _date_param(request, name):
+        """Fecha YYYY-MM-DD del query string (None si no viene); ValueError si no es válida"""
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValueError(f"Fecha inválida en '{name}', use el formato YYYY-MM-DD")
+        return parsed
+
     @action(detail=False, methods=['get'])
     def stock_alerts(self, request):
         """Obtener productos con stock bajo o agotado"""
@@ -5,6 +5,8 @@
 from apps.ecommerce.products.models import Product
 from decimal import Decimal
 from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 
 class PurchaseOrder(models.Model):
     """
@@ -64,24 +66,9 @@ def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
     def _generate_po_number(self):
-        from datetime import date
-        today = date.today()
-        prefix = f"PO{today.strftime('%Y%m%d')}"
-
-        last_po = PurchaseOrder.objects.filter(
-            po_number__startswith=prefix
-        ).order_by('-po_number').first()
-
-        if last_po:
-            try:
-                last_number = int(last_po.po_number[-3:])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = 1
-        else:
-            new_number = 1
+        from apps.ecommerce.sequences.services import DocumentSequenceService
 
-        return f"{prefix}{new_number:03d}"
+        return DocumentSequenceService.next_number('PO', 3, model=PurchaseOrder, field='po_number')
 
 
 class PurchaseOrderItem(models.Model):
@@ -156,3 +143,49 @@ def reception_status(self):
     def can_receive_more(self):
         """Si se pueden recibir más unidades"""
         return self.quantity_received < self.quantity_ordered
+
+
+class ProductPurchaseStats(models.Model):
+    """Historial de precios de compra de un producto, materializado.
+
+    Lo mantiene ProductPurchaseStatsService.refresh cada vez que se crean o
+    reemplazan items de órdenes de compra, o cambia el estado o la fecha de
+    la orden; los selectores de productos lo leen con select_related en
+    lugar de agregar purchaseorderitem por fila. Las órdenes canceladas no
+    cuentan.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='purchase_stats',
+        verbose_name="Producto"
+    )
+    last_purchase_price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    average_purchase_price = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal('0.0000'))
+    total_orders = models.PositiveIntegerField(default=0)
+    last_order_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estadística de compra de producto"
+        verbose_name_plural = "Estadísticas de compra de productos"
+
+    def __str__(self):
+        return f"{self.product_id}: {self.last_purchase_price} ({self.total_orders} órdenes)"
+
+
+@receiver(post_save, sender=PurchaseOrder)
+def refresh_purchase_stats(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Recalcular las estadísticas de sus productos al editar la orden.
+
+    Al crearla todavía no tiene items; los guardados que solo tocan
+    totales o notas no cambian nada de lo que se materializa.
+    """
+    if created or raw:
+        return
+    if update_fields is not None and not {'status', 'order_date'} & set(update_fields):
+        return
+
+    from .services import ProductPurchaseStatsService
+
+    ProductPurchaseStatsService.refresh(instance.items.values_list('product_id', flat=True))
@@ -1,10 +1,10 @@
 # apps/ecommerce/purchasing/serializers.py
 from rest_framework import serializers
-from .models import PurchaseOrder, PurchaseOrderItem
+from .models import PurchaseOrder, PurchaseOrderItem, ProductPurchaseStats
 from apps.ecommerce.products.models import Product
 from apps.ecommerce.suppliers.models import Supplier
 from django.contrib.auth.models import User
-from django.db.models import Avg, Sum
+from django.db.models import Sum
 
 class PurchasingSupplierSerializer(serializers.ModelSerializer):
     """Serializer específico para suppliers en purchasing"""
@@ -37,19 +37,29 @@ class Meta:
             'is_preferred', 'total_orders', 'total_spent', 'last_order_date'
         ]
 
+    # Las vistas anotan el queryset con SupplierPurchaseStatsService.annotate;
+    # sin anotaciones se cae a las consultas por proveedor
+
     def get_total_orders(self, obj):
         """Número total de órdenes de compra"""
+        if hasattr(obj, 'purchase_order_count'):
+            return obj.purchase_order_count
         return obj.purchaseorder_set.count()
 
     def get_total_spent(self, obj):
         """Total gastado con este proveedor"""
-        total = obj.purchaseorder_set.aggregate(
-            total=Sum('total_amount')
-        )['total']
+        if hasattr(obj, 'purchase_total_spent'):
+            total = obj.purchase_total_spent
+        else:
+            total = obj.purchaseorder_set.aggregate(
+                total=Sum('total_amount')
+            )['total']
         return float(total) if total else 0.0
 
     def get_last_order_date(self, obj):
         """Fecha de la última orden"""
+        if hasattr(obj, 'purchase_last_order_date'):
+            return obj.purchase_last_order_date
         last_order = obj.purchaseorder_set.order_by('-order_date').first()
         return last_order.order_date if last_order else None
 
@@ -92,26 +102,34 @@ class Meta:
             'total_orders', 'last_order_date'
         ]
 
+    # Las estadísticas salen de ProductPurchaseStats (select_related('purchase_stats'));
+    # un producto sin fila nunca se ha comprado
+
+    def _purchase_stats(self, obj):
+        try:
+            return obj.purchase_stats
+        except ProductPurchaseStats.DoesNotExist:
+            return None
+
     def get_last_purchase_price(self, obj):
         """Último precio de compra"""
-        last_item = obj.purchaseorderitem_set.order_by('-created_at').first()
-        return float(last_item.unit_price) if last_item else 0.0
+        stats = self._purchase_stats(obj)
+        return float(stats.last_purchase_price) if stats else 0.0
 
     def get_average_purchase_price(self, obj):
         """Precio promedio de compra"""
-        avg_price = obj.purchaseorderitem_set.aggregate(
-            avg=Avg('unit_price')
-        )['avg']
-        return float(avg_price) if avg_price else 0.0
+        stats = self._purchase_stats(obj)
+        return float(stats.average_purchase_price) if stats else 0.0
 
     def get_total_orders(self, obj):
         """Total de órdenes donde aparece este producto"""
-        return obj.purchaseorderitem_set.values('purchase_order').distinct().count()
+        stats = self._purchase_stats(obj)
+        return stats.total_orders if stats else 0
 
     def get_last_order_date(self, obj):
         """Fecha de la última orden"""
-        last_item = obj.purchaseorderitem_set.order_by('-created_at').first()
-        return last_item.purchase_order.order_date if last_item else None
+        stats = self._purchase_stats(obj)
+        return stats.last_order_date if stats else None
 
 class PurchaseOrderItemSerializer(serializers.ModelSerializer):
     """Serializer para items de orden de compra con información de recepción"""
@@ -5,6 +5,7 @@
 from django.core.exceptions import ValidationError
 from .models import *
 from apps.ecommerce.products.models import Product
+from apps.ecommerce.products.services import StockLedgerService
 from apps.ecommerce.suppliers.models import Supplier
 from typing import List, Dict, Any
 import logging
@@ -158,6 +159,7 @@ def create_purchase_order(self, data: Dict[str, Any], created_by) -> PurchaseOrd
 
         # Calcular totales
         PurchaseOrderCalculationService.update_po_totals(purchase_order)
+        ProductPurchaseStatsService.refresh(item['product_id'] for item in items_data)
 
         logger.info(f"Purchase Order {purchase_order.po_number} created by {created_by.username}")
 
@@ -183,6 +185,7 @@ def update_purchase_order(self, purchase_order: PurchaseOrder, data: Dict[str, A
                 raise ValidationError(item_errors)
 
             # Eliminar items existentes
+            previous_product_ids = set(purchase_order.items.values_list('product_id', flat=True))
             purchase_order.items.all().delete()
 
             # Crear nuevos items
@@ -197,6 +200,9 @@ def update_purchase_order(self, purchase_order: PurchaseOrder, data: Dict[str, A
 
             # Recalcular totales
             PurchaseOrderCalculationService.update_po_totals(purchase_order)
+            ProductPurchaseStatsService.refresh(
+                previous_product_ids | {item['product_id'] for item in items_data}
+            )
 
         return purchase_order
 
@@ -245,8 +251,12 @@ def receive_items(self, purchase_order: PurchaseOrder, received_items: List[Dict
                 po_item.save()
 
                 # Actualizar stock del producto
-                po_item.product.stock_current += quantity_received
-                po_item.product.save(update_fields=['stock_current'])
+                StockLedgerService.apply(
+                    [(po_item.product_id, quantity_received)],
+                    'purchase_reception',
+                    reference=purchase_order,
+                    notes=f"Recepción PO {purchase_order.po_number}"
+                )
 
             except PurchaseOrderItem.DoesNotExist:
                 raise ValidationError(f"Item {item_id} no encontrado")
@@ -297,6 +307,92 @@ def get_po_analytics():
             'status_statistics': list(status_stats),
             'top_suppliers': list(supplier_stats)
         }
+
+
+class SupplierPurchaseStatsService:
+    """
+    Estadísticas de compra por proveedor
+    Se calculan con anotaciones para toda la página en una sola consulta
+    """
+
+    @staticmethod
+    def annotate(queryset):
+        """Agregar purchase_order_count, purchase_total_spent y purchase_last_order_date"""
+        from django.db.models import Count, Max, Sum
+
+        return queryset.annotate(
+            purchase_order_count=Count('purchaseorder'),
+            purchase_total_spent=Sum('purchaseorder__total_amount'),
+            purchase_last_order_date=Max('purchaseorder__order_date'),
+        )
+
+    @staticmethod
+    def performance(supplier: Supplier) -> Dict[str, Any]:
+        """Estadísticas de rendimiento a partir de un proveedor anotado con `annotate`"""
+        total_orders = supplier.purchase_order_count
+        total_spent = supplier.purchase_total_spent or 0
+
+        return {
+            'total_orders': total_orders,
+            'on_time_delivery_rate': 0,  # Calcular cuando tengas delivery_date
+            'average_order_value': float(total_spent / total_orders) if total_orders else 0,
+            'total_spent': float(total_spent)
+        }
+
+
+class ProductPurchaseStatsService:
+    """
+    Mantiene ProductPurchaseStats (último precio, promedio, órdenes y última fecha)
+    Se recalcula por lote de productos con un número fijo de consultas,
+    sin contar las órdenes canceladas
+    """
+
+    @staticmethod
+    def refresh(product_ids) -> int:
+        """Recalcular las estadísticas de los productos indicados desde sus items"""
+        from django.db.models import Avg, Count, Max, OuterRef, Subquery
+
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0
+
+        items = PurchaseOrderItem.objects.exclude(purchase_order__status='cancelled')
+        last_items = items.filter(product_id=OuterRef('product_id')).order_by('-created_at', '-id')
+        rows = items.filter(product_id__in=product_ids).values('product_id').annotate(
+            average_purchase_price=Avg('unit_price'),
+            total_orders=Count('purchase_order', distinct=True),
+            last_purchase_price=Subquery(last_items.values('unit_price')[:1]),
+            last_order_date=Max('purchase_order__order_date'),
+        )
+
+        stats = [ProductPurchaseStats(**row) for row in rows]
+        ProductPurchaseStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['last_purchase_price', 'average_purchase_price', 'total_orders', 'last_order_date', 'updated_at'],
+        )
+
+        # Productos que ya no aparecen en ninguna orden
+        ProductPurchaseStats.objects.filter(
+            product_id__in=product_ids - {row.product_id for row in stats}
+        ).delete()
+        return len(stats)
+
+    @staticmethod
+    def rebuild(batch_size: int = 500) -> int:
+        """Recalcular todas las estadísticas (backfill o reparación)"""
+        ProductPurchaseStats.objects.exclude(
+            product_id__in=PurchaseOrderItem.objects.values('product_id')
+        ).delete()
+
+        product_ids = list(PurchaseOrderItem.objects.values_list('product_id', flat=True).distinct().order_by('product_id'))
+        refreshed = 0
+        for start in range(0, len(product_ids), batch_size):
+            refreshed += ProductPurchaseStatsService.refresh(product_ids[start:start + batch_size])
+        return refreshed
+
+
 class PurchaseOrderPDFService:
     """Servicio para generar PDFs de órdenes de compra"""
 
@@ -466,7 +562,7 @@ def create_po_from_cotizacion(cotizacion_id, expected_delivery, user, notes=""):
         from apps.ecommerce.cotizacion.models import RespuestaCotizacion
 
         try:
-            cotizacion = RespuestaCotizacion.objects.get(id=cotizacion_id)
+            cotizacion = RespuestaCotizacion.objects.get(id=cotizacion_id, envio__isnull=False)
 
             # Preparar datos
             po_data = {
@@ -666,20 +762,13 @@ def _process_single_item(purchase_order: PurchaseOrder, item_data: Dict, update_
         # Actualizar inventario si se solicita
         if update_inventory and po_item.product:
             try:
-                po_item.product.stock_current += quantity_to_receive
-                po_item.product.save(update_fields=['stock_current'])
-
-                # Opcional: Crear registro de movimiento de inventario
-                # InventoryMovement.objects.create(
-                #     product=po_item.product,
-                #     movement_type='IN',
-                #     quantity=quantity_to_receive,
-                #     reference_type='PO_RECEPTION',
-                #     reference_id=purchase_order.id,
-                #     notes=f"Recepción PO {purchase_order.po_number}",
-                #     created_by=user
-                # )
-
+                StockLedgerService.apply(
+                    [(po_item.product_id, quantity_to_receive)],
+                    'purchase_reception',
+                    reference=purchase_order,
+                    user=user,
+                    notes=f"Recepción PO {purchase_order.po_number}"
+                )
             except Exception as e:
                 logger.error(f"Error updating inventory for product {po_item.product.id}: {str(e)}")
                 # No fallar la recepción por error de inventario
@@ -47,7 +47,9 @@
     PurchaseOrderManagementService,
     PurchaseOrderCalculationService,
     PurchaseOrderReceptionService,
-    PurchaseOrderReportService
+    PurchaseOrderReportService,
+    SupplierPurchaseStatsService,
+    ProductPurchaseStatsService
 )
 
 logger = logging.getLogger(__name__)
@@ -127,6 +129,12 @@ def get_serializer_class(self):
             return PurchaseOrderListSerializer
         return PurchaseOrderSerializer
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        product_ids = set(instance.items.values_list('product_id', flat=True))
+        instance.delete()
+        ProductPurchaseStatsService.refresh(product_ids)
+
     # ================================
     # ACCIÓN DE RECEPCIÓN DE ITEMS
     # ================================
@@ -366,6 +374,7 @@ def _handle_duplicate_order(self, purchase_order, data, user):
 
             # Recalcular totales
             PurchaseOrderCalculationService.update_po_totals(new_po)
+            ProductPurchaseStatsService.refresh(new_po.items.values_list('product_id', flat=True))
 
             # Registrar en historial de la orden original
             self._add_to_history(
@@ -897,7 +906,7 @@ class PurchasingSuppliersAPIView(generics.ListAPIView):
     serializer_class = PurchasingSupplierSerializer
 
     def get_queryset(self):
-        queryset = Supplier.objects.filter(is_active=True).select_related()
+        queryset = SupplierPurchaseStatsService.annotate(Supplier.objects.filter(is_active=True))
 
         # Filtro por búsqueda
         search = self.request.query_params.get('search')
@@ -953,7 +962,7 @@ def list(self, request, *args, **kwargs):
 
 class PurchasingSupplierDetailAPIView(generics.RetrieveAPIView):
     """API para obtener detalles de un supplier específico"""
-    queryset = Supplier.objects.all()
+    queryset = SupplierPurchaseStatsService.annotate(Supplier.objects.all())
     serializer_class = PurchasingSupplierSerializer
 
     def retrieve(self, request, *args, **kwargs):
@@ -987,32 +996,7 @@ def get_recent_orders(self, supplier):
 
     def get_performance_stats(self, supplier):
         """Calcular estadísticas de rendimiento"""
-        orders = supplier.purchaseorder_set.all()
-        total_orders = orders.count()
-
-        if total_orders == 0:
-            return {
-                'total_orders': 0,
-                'on_time_delivery_rate': 0,
-                'average_order_value': 0,
-                'total_spent': 0
-            }
-
-        # Calcular métricas
-        completed_orders = orders.filter(status='completed')
-        # on_time_orders = completed_orders.filter(
-        #     delivery_date__lte=F('expected_delivery')
-        # ).count()
-
-        total_spent = orders.aggregate(total=Sum('total_amount'))['total'] or 0
-        avg_order_value = orders.aggregate(avg=Avg('total_amount'))['avg'] or 0
-
-        return {
-            'total_orders': total_orders,
-            'on_time_delivery_rate': 0,  # Calcular cuando tengas delivery_date
-            'average_order_value': float(avg_order_value),
-            'total_spent': float(total_spent)
-        }
+        return SupplierPurchaseStatsService.performance(supplier)
 
 # ================================
 # VISTAS PARA PRODUCTS
@@ -1023,7 +1007,7 @@ class PurchasingProductsAPIView(generics.ListAPIView):
     serializer_class = PurchasingProductSerializer
 
     def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True).select_related('category')
+        queryset = Product.objects.filter(is_active=True).select_related('category', 'purchase_stats')
 
         # Filtro por búsqueda
         search = self.request.query_params.get('search')
@@ -1077,7 +1061,7 @@ def list(self, request, *args, **kwargs):
 
 class PurchasingProductDetailAPIView(generics.RetrieveAPIView):
     """API para obtener detalles de un producto específico"""
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('category', 'purchase_stats')
     serializer_class = PurchasingProductSerializer
 
     def retrieve(self, request, *args, **kwargs):
@@ -10,6 +10,7 @@
 from django.db.models import Q, Count, Sum
 from django.contrib.auth.models import User
 from datetime import date, timedelta
+from apps.ecommerce.pagination import KeysetListMixin
 from .models import *
 from django.http import HttpResponse, FileResponse
 from django.template.loader import get_template
@@ -20,8 +21,9 @@
 from .services import *
 from .serializers import *
 from apps.ecommerce.requirements.services_notifications import RequirementNotificationService
-class RequirementListCreateAPIView(generics.ListCreateAPIView):
+class RequirementListCreateAPIView(KeysetListMixin, generics.ListCreateAPIView):
     """Lista todos los requerimientos con filtros y crea nuevos requerimientos"""
+    stream_filename = 'requerimientos.ndjson'
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -66,11 +68,6 @@ def get_queryset(self):
             )
         
         return queryset
-    
-    def list(self, request):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"data": serializer.data})
 
 class RequirementViewSet(viewsets.ModelViewSet):
     """ViewSet completo para operaciones CRUD de requerimientos"""
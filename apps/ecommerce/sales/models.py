@@ -1,13 +1,40 @@
 # apps/ecommerce/sales/models.py
-from django.db import models
+from contextlib import contextmanager
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 import uuid
-from datetime import date
 from apps.ecommerce.products.models import Product
 from apps.ecommerce.customers.models import Customer
 
+TOTAL_FIELDS = ['subtotal', 'tax_amount', 'total_amount']
+
+
+class SaleManager(models.Manager):
+    def create_with_items(self, items, **sale_fields):
+        """Crear la venta y sus items en lote.
+
+        `items` son instancias SaleItem sin guardar (o dicts con sus campos).
+        Los totales se calculan una sola vez en Python y los items se insertan
+        con bulk_create: unas pocas consultas sin importar el número de líneas.
+        """
+        sale = self.model(**sale_fields)
+        sale_items = [item if isinstance(item, SaleItem) else SaleItem(**item) for item in items]
+
+        for item in sale_items:
+            item.apply_price_defaults()
+        sale.calculate_totals(items=sale_items)
+
+        with transaction.atomic(), sale.deferred_totals(recalculate=False):
+            sale.save()
+            for item in sale_items:
+                item.sale = sale
+            SaleItem.objects.bulk_create(sale_items)
+
+        return sale
+
+
 class Sale(models.Model):
     PAYMENT_METHOD_CHOICES = [
         ('efectivo', 'Efectivo'),
@@ -172,6 +199,8 @@ class Sale(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = SaleManager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Venta"
@@ -208,6 +237,9 @@ def customer_document_display(self):
     @property
     def total_items(self):
         """Total de items en la venta"""
+        # Con prefetch_related('items') (listados) se suma en memoria, sin una consulta por venta
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum(item.quantity for item in self.items.all())
         return self.items.aggregate(
             total=models.Sum('quantity')
         )['total'] or 0
@@ -267,45 +299,62 @@ def save(self, *args, **kwargs):
         # Solo llamar super().save() primero
         super().save(*args, **kwargs)
         
+        # Guardar solo los totales o estar en una escritura en lote no requiere recalcular
+        update_fields = kwargs.get('update_fields')
+        if self._totals_deferred or (update_fields and set(update_fields) <= set(TOTAL_FIELDS)):
+            return
+
         # Calcular totales DESPUÉS de guardar si hay items
         if self.pk and self.items.exists():
             self.calculate_totals()
             # Llamar super().save() nuevamente solo para actualizar totales
-            super().save(update_fields=['subtotal', 'tax_amount', 'total_amount'])
+            super().save(update_fields=TOTAL_FIELDS)
+
+    @property
+    def _totals_deferred(self):
+        return getattr(self, '_defer_totals', False)
+
+    @contextmanager
+    def deferred_totals(self, recalculate=True):
+        """Suspender el recálculo de totales mientras se escriben varios items.
+
+        Al salir se recalcula una sola vez (si `recalculate`) y se guardan los totales.
+        """
+        self._defer_totals = True
+        try:
+            yield self
+        finally:
+            self._defer_totals = False
+
+        if recalculate and self.pk:
+            self.calculate_totals()
+            self.save(update_fields=TOTAL_FIELDS)
         
     def generate_sale_number(self):
-        """Generar número único de venta"""
-        today = date.today()
-        prefix = f"V{today.strftime('%Y%m%d')}"
-        
-        # Buscar el último número del día
-        last_sale = Sale.objects.filter(
-            sale_number__startswith=prefix
-        ).order_by('-sale_number').first()
-        
-        if last_sale:
-            try:
-                last_number = int(last_sale.sale_number[-4:])
-                new_number = last_number + 1
-            except (ValueError, IndexError):
-                new_number = 1
-        else:
-            new_number = 1
-        
-        return f"{prefix}{new_number:04d}"
+        """Generar número único de venta (contador diario atómico)"""
+        from apps.ecommerce.sequences.services import DocumentSequenceService
+
+        return DocumentSequenceService.next_number('V', 4, model=Sale, field='sale_number')
     
-    def calculate_totals(self):
-        """Calcular totales de la venta"""
+    def calculate_totals(self, items=None):
+        """Calcular totales de la venta.
+
+        Con `items` (los SaleItem ya en memoria) el subtotal se suma en Python
+        en lugar de consultar la base de datos.
+        """
         from django.db.models import Sum, F
         from decimal import Decimal
         
-        # Obtener items relacionados y calcular subtotal
-        items_total = self.items.aggregate(
-            total=Sum(
-                F('quantity') * F('unit_price'),
-                output_field=models.DecimalField(max_digits=12, decimal_places=2)
-            )
-        )['total']
+        if items is not None:
+            items_total = sum((item.subtotal for item in items), Decimal('0'))
+        else:
+            # Obtener items relacionados y calcular subtotal
+            items_total = self.items.aggregate(
+                total=Sum(
+                    F('quantity') * F('unit_price'),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2)
+                )
+            )['total']
         
         # Convertir a Decimal y manejar None
         items_subtotal = Decimal(str(items_total or 0))
@@ -324,42 +373,45 @@ def calculate_totals(self):
             self.total_amount = self.subtotal + self.tax_amount
     
     def confirm_sale(self, user=None):
-        """Confirmar la venta y actualizar stock"""
+        """Confirmar la venta y descontar stock.
+
+        Devuelve {product_id: Product} con el stock resultante. Si alguna línea
+        excede el stock disponible lanza InsufficientStockError (ValueError)
+        sin aplicar ningún descuento.
+        """
+        from apps.ecommerce.products.services import StockLedgerService
+
         if not self.can_confirm:
             raise ValueError("La venta no puede ser confirmada en su estado actual")
         
-        # Verificar stock antes de confirmar
-        for item in self.items.all():
-            if item.product.stock_current < item.quantity:
-                raise ValueError(f"Stock insuficiente para {item.product.name}")
-        
-        # Actualizar stock
-        for item in self.items.all():
-            item.product.stock_current -= item.quantity
-            item.product.save()
-        
-        # Cambiar estado
-        self.status = 'confirmed'
-        if user:
-            self.updated_by = user
-        self.save()
+        with transaction.atomic():
+            products = StockLedgerService.apply_sale(self, user=user)
+            
+            # Cambiar estado
+            self.status = 'confirmed'
+            if user:
+                self.updated_by = user
+            self.save()
+
+        return products
     
     def cancel_sale(self, user=None, restore_stock=True):
         """Cancelar la venta y restaurar stock si es necesario"""
         if not self.can_cancel:
             raise ValueError("La venta no puede ser cancelada en su estado actual")
         
-        # Restaurar stock si la venta estaba confirmada
-        if restore_stock and self.status in ['confirmed', 'invoiced', 'delivered']:
-            for item in self.items.all():
-                item.product.stock_current += item.quantity
-                item.product.save()
-        
-        # Cambiar estado
-        self.status = 'cancelled'
-        if user:
-            self.updated_by = user
-        self.save()
+        from apps.ecommerce.products.services import StockLedgerService
+
+        with transaction.atomic():
+            # Restaurar stock si la venta estaba confirmada
+            if restore_stock and self.status in ['confirmed', 'invoiced', 'delivered']:
+                StockLedgerService.revert_sale(self, user=user)
+            
+            # Cambiar estado
+            self.status = 'cancelled'
+            if user:
+                self.updated_by = user
+            self.save()
 
 
 class SaleItem(models.Model):
@@ -448,21 +500,26 @@ def has_sufficient_stock(self):
         """Verifica si hay stock suficiente"""
         return self.stock_available >= self.quantity
     
-    def save(self, *args, **kwargs):
+    def apply_price_defaults(self):
+        """Completar precio y monto de descuento (también se usa antes de bulk_create)"""
         # Usar precio del producto si no se especifica
         if not self.unit_price:
             self.unit_price = self.product.price
         
         # Calcular descuento en monto si se especifica porcentaje
         if self.discount_percentage and not self.discount_amount:
-            self.discount_amount = (self.subtotal * self.discount_percentage / Decimal('100')).quantize(Decimal('0.01'))
+            self.discount_amount = (self.subtotal * Decimal(str(self.discount_percentage)) / Decimal('100')).quantize(Decimal('0.01'))
+
+    def save(self, *args, **kwargs):
+        self.apply_price_defaults()
         
         super().save(*args, **kwargs)
         
         # Recalcular totales de la venta SOLO si la venta ya existe y tiene ID
-        if self.sale_id and self.sale.pk:
+        # (dentro de Sale.deferred_totals() se recalcula una vez al final)
+        if self.sale_id and self.sale.pk and not self.sale._totals_deferred:
             self.sale.calculate_totals()
-            self.sale.save(update_fields=['subtotal', 'tax_amount', 'total_amount'])
+            self.sale.save(update_fields=TOTAL_FIELDS)
 
 
 class SalePayment(models.Model):
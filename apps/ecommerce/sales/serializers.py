@@ -4,6 +4,7 @@
 from decimal import Decimal
 from .models import Sale, SaleItem, SalePayment
 from apps.ecommerce.products.models import Product
+from apps.ecommerce.products.services import StockLedgerService, InsufficientStockError
 from apps.ecommerce.customers.models import Customer
 import logging
 logger = logging.getLogger(__name__)
@@ -178,8 +179,6 @@ class Meta:
 
 
     def create(self, validated_data):
-        from django.db import transaction
-        
         items_data = validated_data.pop('items_data', [])
         customer_document = validated_data.pop('customer_document', None)
         customer_name = validated_data.pop('customer_name', None)
@@ -203,19 +202,21 @@ def create(self, validated_data):
             elif customer_name:
                 validated_data['guest_customer_name'] = customer_name
             
-            # Crear venta SIN calcular totales automáticamente
-            sale = Sale(**validated_data)
-            sale.save()  # Guardar primero para obtener ID
+            products = {
+                str(pk): product
+                for pk, product in Product.objects.in_bulk(
+                    [item_data.get('product_id') for item_data in items_data if item_data.get('product_id')]
+                ).items()
+            }
             
-            # Crear los items DESPUÉS de que sale tenga ID
+            sale_items = []
             for item_data in items_data:
                 product_id = item_data.get('product_id')
                 if not product_id:
                     raise serializers.ValidationError("product_id es requerido en cada item")
                 
-                try:
-                    product = Product.objects.get(id=product_id)
-                except Product.DoesNotExist:
+                product = products.get(str(product_id))
+                if product is None:
                     raise serializers.ValidationError(f"Producto con ID {product_id} no existe")
                 
                 # Verificar stock
@@ -225,19 +226,17 @@ def create(self, validated_data):
                         f"Stock insuficiente para {product.name}. Stock disponible: {product.stock_current}"
                     )
                 
-                SaleItem.objects.create(
-                    sale=sale,  # Ahora sale ya tiene ID
+                sale_items.append(SaleItem(
                     product=product,
                     quantity=quantity,
                     unit_price=item_data.get('unit_price', product.price),
                     discount_percentage=item_data.get('discount_percentage', 0),
                     discount_amount=item_data.get('discount_amount', 0),
                     notes=item_data.get('notes', '')
-                )
+                ))
             
-            # Recalcular totales DESPUÉS de crear todos los items
-            sale.calculate_totals()
-            sale.save(update_fields=['subtotal', 'tax_amount', 'total_amount'])
+            # Venta + items en lote, totales calculados una sola vez
+            sale = Sale.objects.create_with_items(sale_items, **validated_data)
             
             return sale
     def _get_or_create_customer(self, document_number, customer_name=None):
@@ -402,9 +401,6 @@ def validate_items(self, value):
 
     def create(self, validated_data):
         """Crear venta rápida con debug"""
-        from django.db import transaction
-        from decimal import Decimal
-        
         try:
             logger.info(f"Datos recibidos: {validated_data}")
             
@@ -463,12 +459,15 @@ def create(self, validated_data):
                 
                 logger.info(f"Datos de venta preparados: {sale_data}")
                 
-                # Crear venta
-                sale = Sale(**sale_data)
-                sale.save()
-                logger.info(f"Venta creada con ID: {sale.id}")
+                products = {
+                    str(pk): product
+                    for pk, product in Product.objects.in_bulk(
+                        [item_data['product_id'] for item_data in items_data]
+                    ).items()
+                }
                 
-                # Crear items
+                # Preparar items
+                sale_items = []
                 for i, item_data in enumerate(items_data):
                     logger.info(f"Procesando item {i+1}: {item_data}")
                     
@@ -476,12 +475,11 @@ def create(self, validated_data):
                     quantity = int(item_data['quantity'])
                     
                     # Obtener producto
-                    try:
-                        product = Product.objects.get(id=product_id)
-                        logger.info(f"Producto encontrado: {product.name}, precio: {product.price}")
-                    except Product.DoesNotExist:
+                    product = products.get(str(product_id))
+                    if product is None:
                         logger.error(f"Producto no encontrado: {product_id}")
                         raise serializers.ValidationError(f"Producto {product_id} no existe")
+                    logger.info(f"Producto encontrado: {product.name}, precio: {product.price}")
                     
                     # Convertir precio a Decimal
                     unit_price = item_data.get('unit_price', product.price)
@@ -497,25 +495,22 @@ def create(self, validated_data):
                         logger.error(f"Stock insuficiente: {product.stock_current} < {quantity}")
                         raise serializers.ValidationError(f"Stock insuficiente para {product.name}")
                     
-                    # Crear item
-                    sale_item = SaleItem.objects.create(
-                        sale=sale,
+                    sale_items.append(SaleItem(
                         product=product,
                         quantity=quantity,
                         unit_price=unit_price
-                    )
-                    logger.info(f"Item creado: {sale_item}")
-                    
-                    # Actualizar stock
-                    product.stock_current -= quantity
-                    product.save()
-                    logger.info(f"Stock actualizado para {product.name}: {product.stock_current}")
+                    ))
                 
-                # Calcular totales
-                logger.info("Calculando totales...")
-                sale.calculate_totals()
-                sale.save(update_fields=['subtotal', 'tax_amount', 'total_amount'])
-                logger.info(f"Venta finalizada - Total: {sale.total_amount}")
+                # Crear venta e items en lote (totales calculados una sola vez)
+                sale = Sale.objects.create_with_items(sale_items, **sale_data)
+                logger.info(f"Venta creada con ID: {sale.id} - Total: {sale.total_amount}")
+                
+                # Descontar stock (rechaza la venta completa si algún producto ya no alcanza)
+                try:
+                    StockLedgerService.apply_sale(sale, user=sale.created_by)
+                except InsufficientStockError as e:
+                    raise serializers.ValidationError(str(e))
+                logger.info(f"Stock actualizado para {len(sale_items)} productos")
                 
                 return sale
                 
@@ -133,16 +133,6 @@ def get_customer_analytics():
 class StockMovementService:
     """Servicio para movimientos de stock por ventas"""
     
-    @staticmethod
-    def record_sale_movement(sale, movement_type='sale'):
-        """Registrar movimiento de stock por venta"""
-        from apps.ecommerce.products.models import Product
-        
-        for item in sale.items.all():
-            # Aquí podrías registrar en una tabla de movimientos de stock
-            # Por ahora solo actualizamos el stock del producto
-            pass
-    
     @staticmethod
     def check_stock_availability(items_data):
         """Verificar disponibilidad de stock para una lista de items"""
@@ -9,6 +9,7 @@
 from django.db.models import Q, Count, Sum, Avg
 from django.http import HttpResponse
 from datetime import date, timedelta
+from apps.ecommerce.pagination import KeysetListMixin
 from .models import Sale, SaleItem, SalePayment
 from .serializers import (
     SaleSerializer,
@@ -21,8 +22,9 @@
 )
 from .services import SalesAnalyticsService, StockMovementService, SaleReportService
 from apps.ecommerce.sales.services_notifications import SalesNotificationService
-class SaleListCreateAPIView(generics.ListCreateAPIView):
+class SaleListCreateAPIView(KeysetListMixin, generics.ListCreateAPIView):
     """Lista todas las ventas con filtros y crea nuevas ventas"""
+    stream_filename = 'ventas.ndjson'
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -78,11 +80,6 @@ def get_queryset(self):
             )
         
         return queryset.order_by('-created_at')
-    
-    def list(self, request):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"data": serializer.data})
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -140,14 +137,14 @@ def confirm(self, request, pk=None):
         
         try:
             with transaction.atomic():
-                # Verificar stock y productos que quedarán bajos
-                low_stock_products = []
-                for item in sale.items.all():
-                    if item.product.stock_current - item.quantity <= item.product.stock_minimum:
-                        low_stock_products.append(item.product)
+                # Descuenta el stock y registra los movimientos en una sola transacción
+                products = sale.confirm_sale(user=request.user)
                 
-                sale.confirm_sale(user=request.user)
-                StockMovementService.record_sale_movement(sale, 'sale')
+                # Productos que quedaron con stock bajo
+                low_stock_products = [
+                    product for product in products.values()
+                    if product.stock_current <= product.stock_minimum
+                ]
                 
                 # Notificar venta confirmada
                 SalesNotificationService.notify_sale_confirmed(sale, request.user)
@@ -197,9 +194,7 @@ def quick_sale(self, request):
         if serializer.is_valid():
             try:
                 with transaction.atomic():
-                    sale = serializer.save()
-                    sale.created_by = request.user
-                    sale.save()
+                    sale = serializer.save(created_by=request.user)
                     
                     response_serializer = SaleSerializer(sale)
                     return Response({
@@ -388,21 +383,24 @@ def dashboard_analytics(self, request):
     @action(detail=True, methods=['get'])
     def items_with_stock(self, request, pk=None):
         """Obtener items de la venta con información de stock"""
-        sale = get_object_or_404(Sale, pk=pk)
+        sale = get_object_or_404(
+            Sale.objects.select_related('customer', 'created_by').prefetch_related('items__product__category'),
+            pk=pk
+        )
         
         # Serializar la venta completa
         sale_data = SaleSerializer(sale).data
         
-        # Agregar información adicional de stock para cada item
+        # Los productos ya vienen cargados con los items: no volver a consultarlos
+        products = {item.product_id: item.product for item in sale.items.all()}
         for item in sale_data['items']:
-            try:
-                from apps.ecommerce.products.models import Product
-                product = Product.objects.get(id=item['product'])
+            product = products.get(item['product'])
+            if product is not None:
                 item['current_stock'] = product.stock_current
                 item['stock_status'] = product.stock_status
                 item['stock_minimum'] = product.stock_minimum
                 item['stock_maximum'] = product.stock_maximum
-            except Product.DoesNotExist:
+            else:
                 item['current_stock'] = 0
                 item['stock_status'] = 'unknown'
         
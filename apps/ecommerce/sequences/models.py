@@ -0,0 +1,24 @@
+# apps/ecommerce/sequences/models.py
+from django.db import models
+
+
+class DocumentSequence(models.Model):
+    """Contador de numeración de documentos por prefijo y día.
+
+    Cada asignación es un único UPDATE (last_value = last_value + n) sobre la
+    fila del día, que queda bloqueada hasta el fin de la transacción.
+    """
+    prefix = models.CharField(max_length=10, verbose_name="Prefijo")
+    fecha = models.DateField(verbose_name="Fecha")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="Último número asignado")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+
+    class Meta:
+        verbose_name = "Secuencia de Documentos"
+        verbose_name_plural = "Secuencias de Documentos"
+        constraints = [
+            models.UniqueConstraint(fields=['prefix', 'fecha'], name='unique_document_sequence_prefix_fecha'),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix} {self.fecha:%Y-%m-%d}: {self.last_value}"
@@ -0,0 +1,106 @@
+# apps/ecommerce/sequences/services.py
+import logging
+import threading
+from datetime import date
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import DocumentSequence
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentSequenceService:
+    """Asignación atómica de números de documento (ventas, órdenes de compra).
+
+    Con DOCUMENT_SEQUENCE_BLOCK_SIZE > 1 cada proceso reserva bloques de
+    números y los reparte en memoria: menos escrituras sobre la fila del
+    contador, a cambio de numeración no correlativa entre workers y huecos si
+    el proceso termina sin consumir su bloque.
+    """
+
+    _blocks = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def next_number(cls, prefix, width, model=None, field=None, day=None):
+        """Devolver el siguiente número formateado, p. ej. V202601150001.
+
+        `model` y `field` indican dónde buscar el último número emitido con el
+        esquema anterior; solo se consulta al crear el contador del día.
+        """
+        day = day or date.today()
+        block_size = getattr(settings, 'DOCUMENT_SEQUENCE_BLOCK_SIZE', 1)
+
+        # Un bloque reservado dentro de una transacción que luego se revierte
+        # volvería a entregarse a otro proceso: en ese caso se asigna de a uno.
+        if block_size > 1 and not connection.in_atomic_block:
+            value = cls._next_from_block(prefix, day, block_size, model, field, width)
+        else:
+            value = cls.allocate(prefix, day, 1, model, field, width)
+
+        return f"{prefix}{day.strftime('%Y%m%d')}{value:0{width}d}"
+
+    @classmethod
+    def allocate(cls, prefix, day, count=1, model=None, field=None, width=None):
+        """Reservar `count` números consecutivos y devolver el primero"""
+        with transaction.atomic():
+            cls._ensure_sequence(prefix, day, model, field, width)
+
+            DocumentSequence.objects.filter(prefix=prefix, fecha=day).update(
+                last_value=F('last_value') + count
+            )
+            last_value = DocumentSequence.objects.filter(
+                prefix=prefix, fecha=day
+            ).values_list('last_value', flat=True).get()
+
+        return last_value - count + 1
+
+    @classmethod
+    def _next_from_block(cls, prefix, day, block_size, model, field, width):
+        key = (prefix, day)
+        with cls._lock:
+            block = cls._blocks.get(key)
+            if block is None or block[0] > block[1]:
+                start = cls.allocate(prefix, day, block_size, model, field, width)
+                block = [start, start + block_size - 1]
+                cls._blocks = {k: v for k, v in cls._blocks.items() if k[1] == day}
+                cls._blocks[key] = block
+                logger.debug(f"Bloque {prefix}{day:%Y%m%d} reservado: {block[0]}-{block[1]}")
+
+            value = block[0]
+            block[0] += 1
+            return value
+
+    @classmethod
+    def _ensure_sequence(cls, prefix, day, model, field, width):
+        if DocumentSequence.objects.filter(prefix=prefix, fecha=day).exists():
+            return
+
+        initial = cls._legacy_last_value(prefix, day, model, field, width)
+        try:
+            with transaction.atomic():
+                DocumentSequence.objects.create(prefix=prefix, fecha=day, last_value=initial)
+        except IntegrityError:
+            # Otro proceso creó el contador al mismo tiempo
+            pass
+
+    @staticmethod
+    def _legacy_last_value(prefix, day, model, field, width):
+        """Último número del día emitido antes de existir el contador"""
+        if model is None or field is None:
+            return 0
+
+        full_prefix = f"{prefix}{day.strftime('%Y%m%d')}"
+        last = model.objects.filter(
+            **{f'{field}__startswith': full_prefix}
+        ).order_by(f'-{field}').values_list(field, flat=True).first()
+
+        if not last:
+            return 0
+        try:
+            return int(last[-width:])
+        except (ValueError, TypeError):
+            return 0
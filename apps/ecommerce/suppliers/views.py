@@ -7,6 +7,7 @@
 from django.shortcuts import get_object_or_404
 from django.db import models
 from django.db.models import Q, Count
+from apps.ecommerce.pagination import KeysetListMixin
 from .models import Supplier, SupplierContact
 from .serializers import (
     SupplierSerializer, 
@@ -27,8 +28,10 @@ def list(self, request):
         serializer = self.get_serializer(queryset, many=True)
         return Response({"data": serializer.data})
 
-class SupplierListCreateAPIView(generics.ListCreateAPIView):
+class SupplierListCreateAPIView(KeysetListMixin, generics.ListCreateAPIView):
     """Lista todos los proveedores con filtros y crea nuevos proveedores"""
+    keyset_field = 'company_name'
+    stream_filename = 'proveedores.ndjson'
     serializer_class = SupplierListSerializer
 
     def get_queryset(self):
@@ -65,11 +68,6 @@ def get_queryset(self):
 
         return queryset
 
-    def list(self, request):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"data": serializer.data})
-
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return SupplierCreateUpdateSerializer
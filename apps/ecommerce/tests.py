@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from web_project.query_budget_middleware import QueryRecorder
+
+from .benchmark import ENDPOINTS, seed
+
+
+class EndpointQueryBudgetTests(TestCase):
+    """Presupuesto de consultas de los endpoints de listado y detalle.
+
+    Con decenas de filas sembradas, un N+1 supera cualquier presupuesto fijo.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = seed(customers=30, products=30, sales=30, quotations=20)
+
+    def setUp(self):
+        self.client.force_login(self.ids['user'])
+
+    def test_query_budgets(self):
+        for name, url, max_queries, _max_ms in ENDPOINTS:
+            with self.subTest(endpoint=name):
+                url = url.format(**self.ids)
+                self.client.get(url)  # Calentar (plantillas, caches de clase)
+
+                with QueryRecorder() as recorder:
+                    response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(
+                    recorder.count, max_queries,
+                    f'{name}: {recorder.count} consultas. Más repetidas: {recorder.most_repeated()}'
+                )
@@ -0,0 +1,171 @@
+# apps/notification/cache.py
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationCounterCache:
+    """Conteo de notificaciones no leídas por usuario en el cache de Django.
+
+    Las escrituras (creación, marcar leída, marcar todas) actualizan el valor
+    en su lugar; las páginas solo leen la clave. Si la clave no existe o
+    expiró, se recalcula con un COUNT y se vuelve a guardar.
+
+    El alias NOTIFICATION_CACHE_ALIAS debe ser compartido entre procesos:
+    los workers crean notificaciones fuera del servidor web y con un cache
+    local al proceso sus incrementos nunca llegarían a él. Con un backend
+    sin incr atómico (archivos, base de datos) un incremento concurrente
+    puede perderse; el desfase dura como mucho NOTIFICATION_COUNTER_TIMEOUT.
+    """
+
+    KEY = 'notificaciones:no_leidas:{}'
+    STATS_KEY = 'notificaciones:estadisticas:{}'
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, 'NOTIFICATION_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def _timeout():
+        return getattr(settings, 'NOTIFICATION_COUNTER_TIMEOUT', 300)
+
+    @classmethod
+    def get_unread(cls, user_id):
+        cache = cls._cache()
+        key = cls.KEY.format(user_id)
+
+        count = cache.get(key)
+        if count is None:
+            from .models import Notificacion
+
+            count = Notificacion.objects.filter(usuario_id=user_id, leida=False).count()
+            cache.add(key, count, cls._timeout())
+        return count
+
+    @classmethod
+    async def aget_unread(cls, user_id):
+        """Versión async de get_unread para los consumers"""
+        cache = cls._cache()
+        key = cls.KEY.format(user_id)
+
+        count = await cache.aget(key)
+        if count is None:
+            from .models import Notificacion
+
+            count = await Notificacion.objects.filter(usuario_id=user_id, leida=False).acount()
+            await cache.aadd(key, count, cls._timeout())
+        return count
+
+    @classmethod
+    def get_stats(cls, user_id):
+        """Total, leídas, no leídas y conteo por tipo con una sola consulta agrupada"""
+        cache = cls._cache()
+        key = cls.STATS_KEY.format(user_id)
+
+        stats = cache.get(key)
+        if stats is None:
+            stats = cls._compute_stats(user_id)
+            cache.set(key, stats, cls._timeout())
+            # Aprovechar la consulta para refrescar también el contador
+            cache.set(cls.KEY.format(user_id), stats['no_leidas'], cls._timeout())
+        return stats
+
+    @staticmethod
+    def _compute_stats(user_id):
+        from django.db.models import Count
+        from .models import Notificacion, TipoNotificacion
+
+        por_tipo = {tipo: 0 for tipo in TipoNotificacion.values}
+        total = no_leidas = 0
+
+        filas = Notificacion.objects.filter(usuario_id=user_id).values(
+            'tipo_notificacion', 'leida'
+        ).annotate(total=Count('id')).order_by()
+
+        for fila in filas:
+            total += fila['total']
+            por_tipo[fila['tipo_notificacion']] = por_tipo.get(fila['tipo_notificacion'], 0) + fila['total']
+            if not fila['leida']:
+                no_leidas += fila['total']
+
+        return {
+            'total': total,
+            'leidas': total - no_leidas,
+            'no_leidas': no_leidas,
+            'por_tipo': por_tipo,
+        }
+
+    @classmethod
+    def _incr(cls, user_id, delta):
+        cls._cache().delete(cls.STATS_KEY.format(user_id))
+        try:
+            if cls._cache().incr(cls.KEY.format(user_id), delta) < 0:
+                cls.invalidate(user_id)
+        except ValueError:
+            pass  # Sin valor en cache: la próxima lectura hace el COUNT
+
+    @classmethod
+    def on_created(cls, user_ids):
+        """Una notificación nueva (no leída) por cada id de la lista"""
+        for user_id in user_ids:
+            cls._incr(user_id, 1)
+
+    @classmethod
+    def on_read(cls, user_id, count=1):
+        if count:
+            cls._incr(user_id, -count)
+
+    @classmethod
+    def on_all_read(cls, user_id):
+        cls._cache().set(cls.KEY.format(user_id), 0, cls._timeout())
+        cls._cache().delete(cls.STATS_KEY.format(user_id))
+
+    @classmethod
+    def on_pruned(cls, user_ids):
+        """Se eliminaron notificaciones leídas: el contador no cambia, las estadísticas sí"""
+        cls._cache().delete_many([cls.STATS_KEY.format(user_id) for user_id in user_ids])
+
+    @classmethod
+    def invalidate(cls, user_id):
+        cls._cache().delete_many([cls.KEY.format(user_id), cls.STATS_KEY.format(user_id)])
+
+
+class LocalSnapshotCache:
+    """Cache en memoria del proceso con expiración corta.
+
+    La usan los consumers para responder sin ir a la base de datos cuando un
+    mismo usuario abre o reabre varios sockets seguidos (p. ej. tras un
+    deploy). Solo guarda datos que toleran unos segundos de atraso.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) > 10000:
+                now = time.monotonic()
+                self._data = {k: v for k, v in self._data.items() if v[0] >= now}
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
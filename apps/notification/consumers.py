@@ -1,13 +1,31 @@
 # apps/notifications/consumers.py
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from .cache import LocalSnapshotCache, NotificationCounterCache
 from .models import Notificacion
+from .pagination import InvalidCursorError, asince_cursor, encode_cursor
+from .protocol import PROTOCOL_VERSION, dumps, encode, hello_message, negotiate_version
+from .realtime import bind_server_loop
+from .services import notification_service
+from auth.models import Profile
 
 User = get_user_model()
 
+# Snapshots por usuario compartidos por todos los sockets del proceso
+unread_snapshots = LocalSnapshotCache(getattr(settings, 'NOTIFICATION_SNAPSHOT_TTL', 5))
+role_snapshots = LocalSnapshotCache(getattr(settings, 'NOTIFICATION_ROLE_TTL', 60))
+
+# Campos que viajan por el socket (el tiempo transcurrido lo calcula el cliente con fecha_hora)
+SOCKET_FIELDS = (
+    'id', 'titulo', 'mensaje', 'tipo_notificacion', 'icono', 'color', 'url_accion',
+    'fecha_hora', 'leida', 'datos_adicionales'
+)
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         # Verificar que el usuario esté autenticado
@@ -16,6 +34,8 @@ async def connect(self):
             return
         
         self.user = self.scope["user"]
+        bind_server_loop(asyncio.get_running_loop())
+        self.protocol_version = negotiate_version(self.scope)
         self.user_group_name = f"notifications_{self.user.id}"
         
         # Unirse al grupo de notificaciones del usuario
@@ -26,6 +46,10 @@ async def connect(self):
         
         await self.accept()
         
+        # Formato compacto: tabla de tipos una sola vez por conexión
+        if self.compact:
+            await self.send(text_data=dumps(hello_message()))
+        
         # Enviar notificaciones no leídas al conectarse
         await self.send_unread_notifications()
 
@@ -43,8 +67,16 @@ async def receive(self, text_data):
             text_data_json = json.loads(text_data)
             message_type = text_data_json.get('type')
             
+            if message_type in ('mark_as_read', 'get_data'):
+                notification_id = self._notification_id(text_data_json.get('notification_id'))
+                if notification_id is None:
+                    await self.send(text_data=dumps({
+                        'type': 'error',
+                        'message': 'notification_id inválido'
+                    }))
+                    return
+
             if message_type == 'mark_as_read':
-                notification_id = text_data_json.get('notification_id')
                 await self.mark_notification_as_read(notification_id)
             
             elif message_type == 'mark_all_as_read':
@@ -52,88 +84,150 @@ async def receive(self, text_data):
                 
             elif message_type == 'get_unread_count':
                 await self.send_unread_count()
+            
+            elif message_type == 'get_since':
+                await self.send_notifications_since(text_data_json.get('cursor'))
+            
+            elif message_type == 'get_data':
+                await self.send_notification_data(notification_id)
                 
         except json.JSONDecodeError:
-            await self.send(text_data=json.dumps({
+            await self.send(text_data=dumps({
                 'type': 'error',
                 'message': 'Formato JSON inválido'
             }))
 
+    @staticmethod
+    def _notification_id(value):
+        """Id entero positivo enviado por el cliente (None si no es válido)"""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, str) and value.isdigit():
+            value = int(value)
+        if isinstance(value, int) and value > 0:
+            return value
+        return None
+
     async def send_notification(self, event):
         """Enviar notificación al cliente"""
-        await self.send(text_data=json.dumps({
+        unread_snapshots.invalidate(self.user.id)
+        await self.send(text_data=dumps({
             'type': 'notification',
-            'data': event['data']
+            'data': self._encode(event['data'])
         }))
 
     async def send_unread_count(self):
         """Enviar conteo de notificaciones no leídas"""
         count = await self.get_unread_notifications_count()
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps({
             'type': 'unread_count',
             'count': count
         }))
 
     async def send_unread_notifications(self):
         """Enviar todas las notificaciones no leídas"""
-        notifications = await self.get_unread_notifications()
-        await self.send(text_data=json.dumps({
+        snapshot = await self.get_unread_snapshot()
+        await self.send(text_data=dumps({
             'type': 'unread_notifications',
-            'notifications': notifications
+            'notifications': [self._encode(notif) for notif in snapshot['notifications']],
+            'cursor': snapshot['cursor']
         }))
 
-    @database_sync_to_async
-    def get_unread_notifications_count(self):
+    async def send_notifications_since(self, cursor):
+        """Enviar solo las notificaciones posteriores al cursor (reconexión)"""
+        try:
+            notifications, has_more = await asince_cursor(
+                Notificacion.objects.filter(usuario_id=self.user.id).only(*SOCKET_FIELDS),
+                cursor
+            )
+        except InvalidCursorError as e:
+            await self.send(text_data=dumps({
+                'type': 'error',
+                'message': str(e)
+            }))
+            return
+        
+        notifications = [self._serialize(notif) for notif in notifications]
+        await self.send(text_data=dumps({
+            'type': 'notifications_since',
+            'notifications': [self._encode(notif) for notif in notifications],
+            'cursor': notifications[-1]['cursor'] if notifications else cursor,
+            'has_more': has_more
+        }))
+
+    async def send_notification_data(self, notification_id):
+        """Enviar los datos_adicionales que el formato compacto omitió por tamaño"""
+        datos = await Notificacion.objects.filter(
+            id=notification_id,
+            usuario_id=self.user.id
+        ).values_list('datos_adicionales', flat=True).afirst()
+        await self.send(text_data=dumps({
+            'type': 'notification_data',
+            'id': notification_id,
+            'data': datos
+        }))
+
+    @property
+    def compact(self):
+        return getattr(self, 'protocol_version', 1) >= PROTOCOL_VERSION
+
+    def _encode(self, notification):
+        return encode(notification) if self.compact else notification
+
+    async def get_unread_notifications_count(self):
         """Obtener el conteo de notificaciones no leídas"""
-        return Notificacion.objects.filter(
-            usuario=self.user,
-            leida=False
-        ).count()
+        return await NotificationCounterCache.aget_unread(self.user.id)
 
-    @database_sync_to_async
-    def get_unread_notifications(self):
-        """Obtener notificaciones no leídas"""
-        notifications = Notificacion.objects.filter(
-            usuario=self.user,
-            leida=False
-        ).order_by('-fecha_hora')[:10]  # Últimas 10
-        
-        return [
-            {
-                'id': notif.id,
-                'titulo': notif.titulo,
-                'mensaje': notif.mensaje,
-                'tipo': notif.tipo_notificacion,
-                'icono': notif.icono,
-                'color': notif.color,
-                'url_accion': notif.url_accion,
-                'fecha_hora': notif.fecha_hora.isoformat(),
-                'tiempo_transcurrido': notif.tiempo_transcurrido,
-                'datos_adicionales': notif.datos_adicionales
+    async def get_unread_snapshot(self):
+        """Últimas 10 no leídas y cursor más reciente, reutilizados unos segundos por usuario"""
+        snapshot = unread_snapshots.get(self.user.id)
+        if snapshot is None:
+            queryset = Notificacion.objects.filter(usuario_id=self.user.id).only(*SOCKET_FIELDS)
+            notifications = [
+                self._serialize(notif)
+                async for notif in queryset.filter(leida=False).order_by('-fecha_hora', '-id')[:10]
+            ]
+            latest = await queryset.order_by('-fecha_hora', '-id').afirst()
+            snapshot = {
+                'notifications': notifications,
+                'cursor': encode_cursor(latest) if latest else None
             }
-            for notif in notifications
-        ]
+            unread_snapshots.set(self.user.id, snapshot)
+        return snapshot
 
-    @database_sync_to_async
-    def mark_notification_as_read(self, notification_id):
+    @staticmethod
+    def _serialize(notif):
+        return {
+            'id': notif.id,
+            'titulo': notif.titulo,
+            'mensaje': notif.mensaje,
+            'tipo': notif.tipo_notificacion,
+            'icono': notif.icono,
+            'color': notif.color,
+            'url_accion': notif.url_accion,
+            'fecha_hora': notif.fecha_hora.isoformat(),
+            'leida': notif.leida,
+            'datos_adicionales': notif.datos_adicionales,
+            'cursor': encode_cursor(notif)
+        }
+
+    async def mark_notification_as_read(self, notification_id):
         """Marcar una notificación como leída"""
-        try:
-            notification = Notificacion.objects.get(
-                id=notification_id,
-                usuario=self.user
-            )
-            notification.marcar_como_leida()
-            return True
-        except Notificacion.DoesNotExist:
-            return False
+        updated = await Notificacion.objects.filter(
+            id=notification_id,
+            usuario_id=self.user.id,
+            leida=False
+        ).aupdate(leida=True)
+        unread_snapshots.invalidate(self.user.id)
+        if updated:
+            await database_sync_to_async(NotificationCounterCache.on_read)(self.user.id, updated)
+        return bool(updated)
 
     @database_sync_to_async
     def mark_all_notifications_as_read(self):
         """Marcar todas las notificaciones como leídas"""
-        Notificacion.objects.filter(
-            usuario=self.user,
-            leida=False
-        ).update(leida=True)
+        unread_snapshots.invalidate(self.user.id)
+        notification_service.marcar_todas_como_leidas(self.user)
 
 
 class RoleNotificationConsumer(AsyncWebsocketConsumer):
@@ -145,6 +239,7 @@ async def connect(self):
             return
         
         self.user = self.scope["user"]
+        bind_server_loop(asyncio.get_running_loop())
         
         # Obtener el rol del usuario
         user_role = await self.get_user_role()
@@ -174,15 +269,15 @@ async def receive(self, text_data):
 
     async def send_role_notification(self, event):
         """Enviar notificación por rol al cliente"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps({
             'type': 'role_notification',
             'data': event['data']
         }))
 
-    @database_sync_to_async
-    def get_user_role(self):
-        """Obtener el rol del usuario"""
-        try:
-            return self.user.profile.role
-        except:
-            return None
\ No newline at end of file
+    async def get_user_role(self):
+        """Obtener el rol del usuario (cacheado por usuario en el proceso)"""
+        role = role_snapshots.get(self.user.id)
+        if role is None:
+            role = await Profile.objects.filter(user_id=self.user.id).values_list('role', flat=True).afirst()
+            role_snapshots.set(self.user.id, role or '')
+        return role or None
@@ -0,0 +1,136 @@
+# apps/notification/dispatcher.py
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import NotificacionGrupal
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """Distribución fuera de la petición de las notificaciones grupales pendientes.
+
+    La petición solo inserta la NotificacionGrupal (estado 'pendiente') dentro
+    de su transacción. Tras el commit, el envío a cada usuario y por WebSocket
+    lo hace el comando `dispatch_notifications` o, si no hay worker
+    configurado (NOTIFICATION_OUTBOX_WORKER=False), un único hilo de larga
+    duración por proceso.
+
+    El hilo drena la bandeja en orden, una notificación a la vez, así que la
+    concurrencia no crece con el número de notificaciones y los escritores
+    no compiten por el bloqueo de SQLite. Cada NOTIFICATION_RECOVERY_INTERVAL
+    segundos (o al despertar tras ese tiempo) también reencola las filas
+    'procesando' abandonadas y toma las 'pendiente' que quedaron tras un
+    reinicio.
+    """
+
+    _wakeup = threading.Event()
+    _worker = None
+    _worker_lock = threading.Lock()
+
+    @classmethod
+    def schedule(cls, notificacion_grupal_id):
+        """Llamado en transaction.on_commit tras crear la notificación grupal"""
+        if getattr(settings, 'NOTIFICATION_OUTBOX_WORKER', False):
+            return  # El worker la tomará en su siguiente consulta
+
+        cls._ensure_worker()
+        cls._wakeup.set()
+
+    @classmethod
+    def _ensure_worker(cls):
+        with cls._worker_lock:
+            if cls._worker is None or not cls._worker.is_alive():
+                cls._worker = threading.Thread(
+                    target=cls._run_worker,
+                    name='notificaciones-bandeja',
+                    daemon=True,
+                )
+                cls._worker.start()
+
+    @classmethod
+    def _run_worker(cls):
+        """Bucle del hilo: despierta con cada `schedule` o por tiempo y drena lo pendiente"""
+        interval = getattr(settings, 'NOTIFICATION_RECOVERY_INTERVAL', 60)
+        stale_minutes = getattr(settings, 'NOTIFICATION_STALE_MINUTES', 10)
+        last_recovery = None
+
+        while True:
+            cls._wakeup.wait(timeout=interval)
+            # Limpiar antes de drenar: un schedule durante el drenado provoca otra vuelta
+            cls._wakeup.clear()
+            try:
+                if last_recovery is None or time.monotonic() - last_recovery >= interval:
+                    last_recovery = time.monotonic()
+                    requeued, failed = cls.requeue_stale(stale_minutes)
+                    if requeued or failed:
+                        logger.warning(f"Notificaciones abandonadas: {requeued} reencoladas, {failed} fallidas")
+                cls.drain()
+            except Exception:
+                logger.exception("Error en el hilo de la bandeja de notificaciones")
+            finally:
+                connection.close()
+
+    @classmethod
+    def drain(cls, batch_size=50):
+        """Despachar todas las pendientes, de la más antigua a la más reciente"""
+        enviadas = 0
+        while True:
+            claimed = cls.claim_batch(batch_size)
+            if not claimed:
+                return enviadas
+            for notificacion_grupal_id in claimed:
+                enviadas += cls.dispatch(notificacion_grupal_id)
+
+    @staticmethod
+    def claim(notificacion_grupal_id):
+        """Pasar a 'procesando' con un UPDATE condicional (un solo despachador por fila)"""
+        return NotificacionGrupal.objects.filter(
+            id=notificacion_grupal_id, estado_envio='pendiente'
+        ).update(estado_envio='procesando', intentos=F('intentos') + 1, procesado_en=timezone.now())
+
+    @classmethod
+    def claim_batch(cls, limit=50):
+        pending_ids = NotificacionGrupal.objects.filter(
+            estado_envio='pendiente'
+        ).order_by('fecha_hora').values_list('id', flat=True)[:limit]
+        return [pk for pk in pending_ids if cls.claim(pk)]
+
+    @staticmethod
+    def dispatch(notificacion_grupal_id):
+        """Crear las notificaciones individuales y enviarlas por WebSocket"""
+        from .services import notification_service
+
+        notificacion_grupal = NotificacionGrupal.objects.get(id=notificacion_grupal_id)
+        try:
+            enviadas = notification_service.despachar_notificacion_grupal(notificacion_grupal)
+        except Exception as e:
+            logger.exception(f"Error distribuyendo notificación grupal {notificacion_grupal_id}")
+            NotificacionGrupal.objects.filter(id=notificacion_grupal_id).update(
+                estado_envio='fallido', error_envio=str(e), procesado_en=timezone.now()
+            )
+            return 0
+
+        NotificacionGrupal.objects.filter(id=notificacion_grupal_id).update(
+            estado_envio='enviado', error_envio=None, procesado_en=timezone.now()
+        )
+        return enviadas
+
+    @staticmethod
+    def requeue_stale(timeout_minutes=10, max_attempts=3):
+        """Reencolar las notificaciones que quedaron en 'procesando' (despachador caído)"""
+        limit = timezone.now() - timedelta(minutes=timeout_minutes)
+        stale = NotificacionGrupal.objects.filter(estado_envio='procesando', procesado_en__lt=limit)
+
+        failed = stale.filter(intentos__gte=max_attempts).update(
+            estado_envio='fallido', error_envio='El despachador no terminó el envío'
+        )
+        requeued = stale.filter(intentos__lt=max_attempts).update(estado_envio='pendiente')
+        return requeued, failed
@@ -0,0 +1,150 @@
+# apps/notification/management/commands/benchmark_websockets.py
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import path
+
+from apps.ecommerce.consumers import StockConsumer
+from apps.ecommerce.products.broadcast import StockBroadcaster
+from apps.ecommerce.products.models import Product
+from apps.notification.consumers import NotificationConsumer, RoleNotificationConsumer
+from apps.notification.models import NotificacionGrupal
+from apps.notification.services import notification_service
+
+BENCHMARK_USERNAME = 'benchmark_ws'
+CONSUMERS = ('notification', 'role', 'stock')
+
+# Las mismas rutas de config/asgi.py, sin AuthMiddlewareStack (el usuario va directo en el scope)
+application = URLRouter([
+    path('ws/stock/', StockConsumer.as_asgi()),
+    path('ws/notifications/', NotificationConsumer.as_asgi()),
+    path('ws/notifications/role/', RoleNotificationConsumer.as_asgi()),
+])
+
+PATHS = {
+    'notification': '/ws/notifications/',
+    'role': '/ws/notifications/role/',
+    'stock': '/ws/stock/',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de WebSockets: abre N clientes en proceso contra los consumers, '
+        'envía M mensajes y reporta latencia de entrega (p50/p99) y memoria por conexión'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100, help='Sockets simultáneos por consumer')
+        parser.add_argument('--messages', type=int, default=20, help='Mensajes enviados por consumer')
+        parser.add_argument(
+            '--consumers',
+            default=','.join(CONSUMERS),
+            help=f'Consumers a medir, separados por coma ({", ".join(CONSUMERS)})',
+        )
+        parser.add_argument('--timeout', type=float, default=10.0, help='Segundos máximos de espera por mensaje')
+
+    def handle(self, *args, **options):
+        consumers = [name.strip() for name in options['consumers'].split(',') if name.strip()]
+        unknown = set(consumers) - set(CONSUMERS)
+        if unknown:
+            raise CommandError(f'Consumers desconocidos: {", ".join(sorted(unknown))}')
+        if 'stock' in consumers and not Product.objects.exists():
+            raise CommandError('El benchmark de stock necesita al menos un producto')
+
+        # Usuario inactivo: recibe por socket pero no entra en las notificaciones grupales reales
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME, defaults={'is_active': False})
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        self.role = user.profile.role
+
+        try:
+            # Sin ventana de agrupación, cada publicación de stock es un frame
+            with override_settings(STOCK_BROADCAST_WINDOW_MS=0):
+                for name in consumers:
+                    result = asyncio.run(self.run_consumer(name, user, options))
+                    self.report(name, result, options)
+        finally:
+            user.delete()
+
+    async def run_consumer(self, name, user, options):
+        clients, messages = options['clients'], options['messages']
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        communicators = []
+        for _ in range(clients):
+            communicator = WebsocketCommunicator(application, PATHS[name])
+            communicator.scope['user'] = user
+            connected, _ = await communicator.connect(timeout=options['timeout'])
+            if not connected:
+                raise CommandError(f'No se pudo conectar al consumer {name}')
+            communicators.append(communicator)
+
+        if name == 'notification':
+            # Descartar el envío inicial de no leídas
+            await asyncio.gather(*(c.receive_json_from(options['timeout']) for c in communicators))
+        memory = (tracemalloc.get_traced_memory()[0] - before) / clients
+        tracemalloc.stop()
+
+        async def received_at(communicator):
+            await communicator.receive_json_from(options['timeout'])
+            return time.perf_counter()
+
+        latencies = []
+        lost = 0
+        for seq in range(messages):
+            sent_at = time.perf_counter()
+            await self.fire(name, user, seq)
+            arrivals = await asyncio.gather(*(received_at(c) for c in communicators), return_exceptions=True)
+            for arrival in arrivals:
+                if isinstance(arrival, Exception):
+                    lost += 1
+                else:
+                    latencies.append(arrival - sent_at)
+
+        for communicator in communicators:
+            await communicator.disconnect()
+
+        return {'latencies': latencies, 'lost': lost, 'memory': memory}
+
+    async def fire(self, name, user, seq):
+        """Enviar un mensaje por el mismo camino que usa la aplicación"""
+        if name == 'notification':
+            await sync_to_async(notification_service.enviar_notificacion_usuario)(
+                user, f'Benchmark {seq}', titulo='Benchmark'
+            )
+        elif name == 'role':
+            # Solo el envío por socket: no crea notificaciones para los usuarios reales del rol
+            grupal = NotificacionGrupal(
+                id=seq, roles_destinatarios=[self.role], titulo='Benchmark', mensaje=f'Benchmark {seq}'
+            )
+            await sync_to_async(notification_service._send_websocket_notifications)(
+                [], notificacion_grupal=grupal, roles=[self.role]
+            )
+        else:
+            product = await Product.objects.order_by('id').afirst()
+            await sync_to_async(StockBroadcaster.publish)(product)
+
+    def report(self, name, result, options):
+        latencies = sorted(result['latencies'])
+        expected = options['clients'] * options['messages']
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {options["clients"]} clientes, {options["messages"]} mensajes'))
+        self.stdout.write(f'  Memoria por conexión: {result["memory"] / 1024:.1f} KiB')
+
+        style = self.style.SUCCESS if not result['lost'] else self.style.ERROR
+        self.stdout.write(style(f'  Entregados: {len(latencies)}/{expected}'))
+        if latencies:
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f'  Latencia ms: p50={statistics.median(latencies) * 1000:.2f} '
+                f'p99={p99 * 1000:.2f} max={latencies[-1] * 1000:.2f}'
+            )
@@ -0,0 +1,108 @@
+# apps/notification/management/commands/channel_layer_loadtest.py
+import asyncio
+import multiprocessing
+import queue
+import statistics
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _worker(group, clients, expected, timeout, ready, results):
+    """Proceso receptor: abre `clients` canales en el grupo y mide cuándo llega cada mensaje"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+    async def main():
+        layer = get_channel_layer()
+        channels = [await layer.new_channel() for _ in range(clients)]
+        for channel in channels:
+            await layer.group_add(group, channel)
+        ready.put(True)
+
+        latencies = []
+
+        async def consume(channel):
+            for _ in range(expected):
+                message = await layer.receive(channel)
+                latencies.append(time.time() - message['sent_at'])
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*(consume(c) for c in channels)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for channel in channels:
+                await layer.group_discard(group, channel)
+        return latencies
+
+    results.put(asyncio.run(main()))
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga del channel layer: entrega de group_send a consumers en varios procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Procesos receptores')
+        parser.add_argument('--clients', type=int, default=25, help='Canales (sockets simulados) por proceso')
+        parser.add_argument('--messages', type=int, default=50, help='Mensajes enviados al grupo')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Segundos máximos de espera por proceso')
+
+    def handle(self, *args, **options):
+        backend = settings.CHANNEL_LAYERS['default']['BACKEND']
+        if backend.endswith('InMemoryChannelLayer'):
+            raise CommandError(
+                'InMemoryChannelLayer no comparte mensajes entre procesos; '
+                'use CHANNEL_LAYER_BACKEND=sqlite o redis'
+            )
+
+        workers, clients, messages = options['workers'], options['clients'], options['messages']
+        group = f'loadtest_{uuid.uuid4().hex[:8]}'
+        context = multiprocessing.get_context('spawn')
+        ready, results = context.Queue(), context.Queue()
+
+        processes = [
+            context.Process(target=_worker, args=(group, clients, messages, options['timeout'], ready, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get(timeout=options['timeout'])
+
+        self.stdout.write(f'{backend}: {workers} procesos x {clients} canales, {messages} mensajes')
+
+        layer = get_channel_layer()
+        started = time.time()
+        for seq in range(messages):
+            async_to_sync(layer.group_send)(group, {'type': 'loadtest.message', 'seq': seq, 'sent_at': time.time()})
+        send_seconds = time.time() - started
+
+        latencies = []
+        for _ in processes:
+            try:
+                latencies.extend(results.get(timeout=options['timeout'] + 10))
+            except queue.Empty:
+                pass
+        for process in processes:
+            process.join()
+
+        expected = workers * clients * messages
+        self.stdout.write(f'Envío: {send_seconds:.3f}s ({messages / send_seconds:.0f} group_send/s)')
+        style = self.style.SUCCESS if len(latencies) == expected else self.style.ERROR
+        self.stdout.write(style(f'Entregados: {len(latencies)}/{expected}'))
+
+        if latencies:
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f'Latencia ms: p50={statistics.median(latencies) * 1000:.1f} '
+                f'p99={p99 * 1000:.1f} max={latencies[-1] * 1000:.1f}'
+            )
@@ -0,0 +1,70 @@
+# apps/notification/management/commands/dispatch_notifications.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.notification.dispatcher import NotificationDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Worker que distribuye las notificaciones grupales pendientes (bandeja de salida)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Notificaciones grupales reclamadas por consulta',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Segundos entre consultas a la bandeja cuando está vacía',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Distribuir las pendientes y terminar',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_STALE_MINUTES', 10),
+            help='Minutos tras los cuales una notificación "procesando" se considera abandonada',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=3,
+            help='Intentos máximos antes de marcarla como fallida',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Despachador de notificaciones iniciado'))
+
+        try:
+            while True:
+                requeued, failed = NotificationDispatcher.requeue_stale(
+                    options['stale_minutes'], options['max_attempts']
+                )
+                if requeued or failed:
+                    self.stdout.write(self.style.WARNING(
+                        f'Notificaciones abandonadas: {requeued} reencoladas, {failed} fallidas'
+                    ))
+
+                claimed = NotificationDispatcher.claim_batch(options['batch_size'])
+                for notificacion_grupal_id in claimed:
+                    enviadas = NotificationDispatcher.dispatch(notificacion_grupal_id)
+                    self.stdout.write(f'Notificación grupal {notificacion_grupal_id}: {enviadas} destinatarios')
+
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Deteniendo despachador...'))
+
+        self.stdout.write(self.style.SUCCESS('Despachador detenido'))
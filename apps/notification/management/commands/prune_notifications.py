@@ -0,0 +1,68 @@
+# apps/notification/management/commands/prune_notifications.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.notification.models import TipoNotificacion
+from apps.notification.retention import NotificationRetentionService
+
+
+class Command(BaseCommand):
+    help = 'Archiva y elimina por lotes las notificaciones leídas que superan su período de retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archive',
+            choices=['table', 'file', 'none'],
+            default='table',
+            help='Destino de las filas eliminadas: tabla de archivo, archivo .jsonl.gz o ninguno',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            help='Directorio de los archivos .jsonl.gz (por defecto: BASE_DIR/archive/notifications)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Filas eliminadas por transacción (por defecto: NOTIFICATION_PRUNE_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--keep',
+            action='append',
+            default=[],
+            metavar='TIPO=DIAS',
+            help='Sobrescribir la retención de un tipo (o "default"); se puede repetir',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar las filas que se eliminarían',
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        for item in options['keep']:
+            tipo, _, dias = item.partition('=')
+            if tipo != 'default' and tipo not in TipoNotificacion.values:
+                raise CommandError(f'Tipo de notificación desconocido: {tipo}')
+            if not dias.isdigit():
+                raise CommandError(f'Días inválidos en "{item}", use TIPO=DIAS')
+            overrides[tipo] = int(dias)
+
+        result = NotificationRetentionService.prune(
+            archive=options['archive'],
+            archive_dir=options['archive_dir'],
+            batch_size=options['batch_size'],
+            overrides=overrides,
+            dry_run=options['dry_run'],
+        )
+
+        verbo = 'a eliminar' if options['dry_run'] else 'eliminadas'
+        for tipo, count in result['por_tipo'].items():
+            if count:
+                self.stdout.write(f'{tipo}: {count} notificaciones {verbo}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(result['por_tipo'].values())} notificaciones {verbo}, "
+            f"{result['entregas']} entregas y {result['grupales']} notificaciones grupales"
+        ))
+        if result.get('archivo'):
+            self.stdout.write(f"Archivo: {result['archivo']}")
@@ -9,10 +9,10 @@ def process_template_response(self, request, response):
             # Agregar conteo de notificaciones no leídas al contexto
             unread_count = notification_service.obtener_conteo_no_leidas(request.user)
             
-            # Agregar notificaciones recientes
+            # Agregar notificaciones recientes (queryset perezoso; sin no leídas no hay consulta)
             recent_notifications = notification_service.obtener_notificaciones_usuario(
                 request.user, no_leidas_solo=True
-            )[:5]  # Últimas 5 no leídas
+            )[:5] if unread_count else []  # Últimas 5 no leídas
             
             if response.context_data:
                 response.context_data['notifications_unread_count'] = unread_count
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-17 20:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_as_sent(apps, schema_editor):
+    # Las notificaciones grupales existentes ya fueron distribuidas
+    NotificacionGrupal = apps.get_model('notification', 'NotificacionGrupal')
+    NotificacionGrupal.objects.update(estado_envio='enviado')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0002_alter_notificacion_tipo_notificacion_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificaciongrupal',
+            name='error_envio',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificaciongrupal',
+            name='estado_envio',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_as_sent, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='notificaciongrupal',
+            name='intentos',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notificaciongrupal',
+            name='procesado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notificaciongrupal',
+            index=models.Index(fields=['estado_envio', 'fecha_hora'], name='notificatio_estado__e50554_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0003_notificaciongrupal_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notificacion',
+            name='notificatio_usuario_18fc50_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['usuario', 'leida', '-fecha_hora', '-id'], name='notificatio_usuario_33eeb6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['usuario', '-fecha_hora', '-id'], name='notificatio_usuario_a1e1f5_idx'),
+        ),
+    ]
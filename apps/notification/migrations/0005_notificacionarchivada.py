@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-17 21:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0004_notificacion_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacionArchivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notificacion_id', models.BigIntegerField(help_text='ID original de la notificación')),
+                ('tipo_notificacion', models.CharField(choices=[('ALERTA_STOCK', 'Alerta de Stock'), ('APROBACION_PENDIENTE', 'Aprobación Pendiente'), ('ESTADO_PEDIDO', 'Estado de Pedido'), ('PRODUCTO_ACTUALIZADO', 'Producto Actualizado'), ('CATEGORIA_NUEVA', 'Nueva Categoría'), ('SISTEMA', 'Sistema'), ('USUARIO_ESTADO_CAMBIADO', 'Estado de Usuario Cambiado'), ('USUARIO_CREADO', 'Usuario Creado')], max_length=50)),
+                ('titulo', models.CharField(blank=True, max_length=200, null=True)),
+                ('mensaje', models.TextField()),
+                ('fecha_hora', models.DateTimeField()),
+                ('datos', models.JSONField(blank=True, null=True)),
+                ('archivada_en', models.DateTimeField(auto_now_add=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones_archivadas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Notificación Archivada',
+                'verbose_name_plural': 'Notificaciones Archivadas',
+                'ordering': ['-fecha_hora'],
+                'indexes': [models.Index(fields=['usuario', '-fecha_hora'], name='notificatio_usuario_aab379_idx')],
+            },
+        ),
+    ]
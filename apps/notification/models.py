@@ -73,7 +73,8 @@ class Meta:
         verbose_name = "Notificación"
         verbose_name_plural = "Notificaciones"
         indexes = [
-            models.Index(fields=['usuario', 'leida']),
+            models.Index(fields=['usuario', 'leida', '-fecha_hora', '-id']),
+            models.Index(fields=['usuario', '-fecha_hora', '-id']),
             models.Index(fields=['fecha_hora']),
             models.Index(fields=['tipo_notificacion']),
         ]
@@ -82,9 +83,15 @@ def __str__(self):
         return f"{self.titulo or self.tipo_notificacion} - {self.usuario.username}"
 
     def marcar_como_leida(self):
-        """Marca la notificación como leída"""
+        """Marca la notificación como leída (y descuenta el contador en cache)"""
+        from .cache import NotificationCounterCache
+
+        if self.leida:
+            return
+        updated = Notificacion.objects.filter(pk=self.pk, leida=False).update(leida=True)
         self.leida = True
-        self.save(update_fields=['leida'])
+        if updated:
+            NotificationCounterCache.on_read(self.usuario_id)
 
     @property
     def tiempo_transcurrido(self):
@@ -130,6 +137,18 @@ class NotificacionGrupal(models.Model):
         related_name='notificaciones_enviadas'
     )
 
+    # Estado del envío (la notificación grupal es también la fila de la bandeja de salida)
+    ESTADO_ENVIO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+    estado_envio = models.CharField(max_length=20, choices=ESTADO_ENVIO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    procesado_en = models.DateTimeField(null=True, blank=True)
+    error_envio = models.TextField(blank=True, null=True)
+
     # Control de entrega
     usuarios_notificados = models.ManyToManyField(
         User,
@@ -141,46 +160,77 @@ class Meta:
         ordering = ['-fecha_hora']
         verbose_name = "Notificación Grupal"
         verbose_name_plural = "Notificaciones Grupales"
+        indexes = [
+            models.Index(fields=['estado_envio', 'fecha_hora']),
+        ]
 
     def __str__(self):
         roles = ', '.join(self.roles_destinatarios) if self.roles_destinatarios else 'Sin roles'
         return f"{self.titulo} - Roles: {roles}"
 
     def crear_notificaciones_individuales(self):
-        """Crea notificaciones individuales para usuarios con los roles especificados"""
+        """Crea notificaciones individuales para usuarios con los roles especificados.
+
+        Las entregas existentes se leen en una sola consulta y las nuevas
+        entregas y notificaciones se insertan con bulk_create. Como otro
+        despachador puede insertar las mismas entregas a la vez (y
+        ignore_conflicts no dice cuáles se descartaron), las notificaciones
+        solo se crean para las entregas que esta llamada realmente insertó,
+        reconocidas por su `fecha_entrega`.
+        """
         from django.contrib.auth.models import User
+        from django.db import transaction
 
         # Obtener usuarios con los roles especificados
-        usuarios_objetivo = User.objects.filter(
+        usuarios_objetivo = set(User.objects.filter(
             profile__role__in=self.roles_destinatarios,
             is_active=True
-        ).distinct()
+        ).values_list('id', flat=True))
 
-        notificaciones_creadas = []
+        # Usuarios a los que ya se les envió esta notificación grupal
+        ya_entregados = set(EntregaNotificacion.objects.filter(
+            notificacion_grupal=self,
+            usuario_id__in=usuarios_objetivo
+        ).values_list('usuario_id', flat=True))
 
-        for usuario in usuarios_objetivo:
-            # Verificar si ya se le envió esta notificación grupal
-            entrega, created = EntregaNotificacion.objects.get_or_create(
-                notificacion_grupal=self,
-                usuario=usuario,
-                defaults={'fecha_entrega': timezone.now()}
+        nuevos = sorted(usuarios_objetivo - ya_entregados)
+        if not nuevos:
+            return []
+
+        ahora = timezone.now()
+        with transaction.atomic():
+            EntregaNotificacion.objects.bulk_create(
+                [
+                    EntregaNotificacion(notificacion_grupal=self, usuario_id=usuario_id, fecha_entrega=ahora)
+                    for usuario_id in nuevos
+                ],
+                batch_size=500,
+                ignore_conflicts=True
             )
 
-            if created:
-                # Crear notificación individual
-                notificacion = Notificacion.objects.create(
-                    usuario=usuario,
-                    mensaje=self.mensaje,
-                    titulo=self.titulo,
-                    tipo_notificacion=self.tipo_notificacion,
-                    icono=self.icono,
-                    color=self.color,
-                    url_accion=self.url_accion,
-                    datos_adicionales=self.datos_adicionales
-                )
-                notificaciones_creadas.append(notificacion)
-
-        return notificaciones_creadas
+            insertados = sorted(EntregaNotificacion.objects.filter(
+                notificacion_grupal=self,
+                usuario_id__in=nuevos,
+                fecha_entrega=ahora
+            ).values_list('usuario_id', flat=True))
+
+            return Notificacion.objects.bulk_create(
+                [
+                    Notificacion(
+                        usuario_id=usuario_id,
+                        mensaje=self.mensaje,
+                        titulo=self.titulo,
+                        tipo_notificacion=self.tipo_notificacion,
+                        fecha_hora=ahora,
+                        icono=self.icono,
+                        color=self.color,
+                        url_accion=self.url_accion,
+                        datos_adicionales=self.datos_adicionales
+                    )
+                    for usuario_id in insertados
+                ],
+                batch_size=500
+            )
 
 class EntregaNotificacion(models.Model):
     """Modelo intermedio para tracking de entrega de notificaciones grupales"""
@@ -194,3 +244,30 @@ class Meta:
         unique_together = ['notificacion_grupal', 'usuario']
         verbose_name = "Entrega de Notificación"
         verbose_name_plural = "Entregas de Notificaciones"
+
+class NotificacionArchivada(models.Model):
+    """Copia compacta de notificaciones leídas retiradas por `prune_notifications`"""
+    notificacion_id = models.BigIntegerField(help_text="ID original de la notificación")
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notificaciones_archivadas'
+    )
+    tipo_notificacion = models.CharField(max_length=50, choices=TipoNotificacion.choices)
+    titulo = models.CharField(max_length=200, blank=True, null=True)
+    mensaje = models.TextField()
+    fecha_hora = models.DateTimeField()
+    # icono, color, url_accion y datos_adicionales de la notificación original
+    datos = models.JSONField(blank=True, null=True)
+    archivada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-fecha_hora']
+        verbose_name = "Notificación Archivada"
+        verbose_name_plural = "Notificaciones Archivadas"
+        indexes = [
+            models.Index(fields=['usuario', '-fecha_hora']),
+        ]
+
+    def __str__(self):
+        return f"{self.titulo or self.tipo_notificacion} - {self.fecha_hora:%Y-%m-%d}"
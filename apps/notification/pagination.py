@@ -0,0 +1,123 @@
+# apps/notification/pagination.py
+import base64
+import binascii
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no es válido"""
+
+
+def encode_cursor(obj, field='fecha_hora'):
+    """Cursor opaco (base64 de 'valor|id') para paginar por (field, id).
+
+    Las fechas van en isoformat completo: recortar los microsegundos dejaría
+    huecos entre páginas.
+    """
+    value = getattr(obj, field)
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = f"{value}|{obj.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, to_python=parse_datetime):
+    """Devolver (valor, id) de un cursor generado con `encode_cursor`.
+
+    `to_python` convierte el texto del valor (por defecto, una fecha y hora);
+    para otros campos puede pasarse `field.to_python` del modelo.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        value, pk = raw.rsplit('|', 1)
+        value = to_python(value)
+        pk = int(pk)
+    except (AttributeError, ValueError, TypeError, binascii.Error, UnicodeDecodeError, DjangoValidationError):
+        raise InvalidCursorError('Cursor inválido')
+
+    if value is None:
+        raise InvalidCursorError('Cursor inválido')
+    return value, pk
+
+
+def keyset_page(queryset, cursor=None, limit=20):
+    """Página de notificaciones más antiguas que el cursor, de la más reciente a la más antigua.
+
+    Filtra por (fecha_hora, id) en lugar de usar OFFSET, así que el costo no
+    crece con la profundidad de la página. Devuelve (items, next_cursor);
+    next_cursor es None en la última página.
+    """
+    queryset = queryset.order_by('-fecha_hora', '-id')
+    if cursor:
+        fecha_hora, notificacion_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(fecha_hora__lt=fecha_hora) | Q(fecha_hora=fecha_hora, id__lt=notificacion_id)
+        )
+
+    items = list(queryset[:limit + 1])
+    has_more = len(items) > limit
+    items = items[:limit]
+    return items, (encode_cursor(items[-1]) if has_more else None)
+
+
+def _since_queryset(queryset, cursor):
+    fecha_hora, notificacion_id = decode_cursor(cursor)
+    return queryset.filter(
+        Q(fecha_hora__gt=fecha_hora) | Q(fecha_hora=fecha_hora, id__gt=notificacion_id)
+    ).order_by('fecha_hora', 'id')
+
+
+def since_cursor(queryset, cursor, limit=100):
+    """Notificaciones posteriores al cursor, de la más antigua a la más reciente.
+
+    Lo usan los clientes WebSocket al reconectarse para pedir solo lo que se
+    perdieron. Devuelve (items, has_more).
+    """
+    items = list(_since_queryset(queryset, cursor)[:limit + 1])
+    return items[:limit], len(items) > limit
+
+
+async def asince_cursor(queryset, cursor, limit=100):
+    """Versión async de `since_cursor` (ORM async de Django)"""
+    items = [item async for item in _since_queryset(queryset, cursor)[:limit + 1]]
+    return items[:limit], len(items) > limit
+
+
+class NotificacionCursorPagination(BasePagination):
+    """Paginación por cursor para las APIs de notificaciones.
+
+    Solo se activa si la petición trae `cursor` o `limit`; sin ellos la vista
+    conserva su respuesta sin paginar.
+    """
+    default_limit = 20
+    max_limit = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if 'cursor' not in params and 'limit' not in params:
+            return None
+
+        try:
+            limit = int(params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        try:
+            items, self.next_cursor = keyset_page(queryset, params.get('cursor'), limit)
+        except InvalidCursorError as e:
+            raise ValidationError({'cursor': str(e)})
+        return items
+
+    def get_paginated_response(self, data):
+        return Response({
+            'data': data,
+            'next_cursor': self.next_cursor,
+            'has_more': self.next_cursor is not None
+        })
@@ -0,0 +1,109 @@
+# apps/notification/protocol.py
+"""Formato compacto (v2) de las notificaciones enviadas por WebSocket.
+
+v1 (por defecto) envía cada notificación como el diccionario completo.
+Los clientes que se conectan con `?v=2` reciben al conectarse un mensaje
+`hello` con la tabla de tipos y, después, cada notificación con claves
+cortas:
+
+    i: id              k: índice del tipo en la tabla     h: título
+    m: mensaje         f: fecha_hora (ISO)                r: 1 si está leída
+    u: url_accion      c: color (se omite si es 'info')   ic: icono (se omite si es el del tipo)
+    d: datos_adicionales pequeños    x: 1 si los datos son grandes y se piden con `get_data`
+    cu: cursor
+"""
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import TipoNotificacion
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+PROTOCOL_VERSION = 2
+DEFAULT_COLOR = 'info'
+
+# Iconos por defecto de cada tipo (también los usa NotificationService al crear)
+DEFAULT_ICONS = {
+    TipoNotificacion.ALERTA_STOCK: 'ri-alert-line',
+    TipoNotificacion.APROBACION_PENDIENTE: 'ri-time-line',
+    TipoNotificacion.ESTADO_PEDIDO: 'ri-shopping-cart-line',
+    TipoNotificacion.PRODUCTO_ACTUALIZADO: 'ri-edit-box-line',
+    TipoNotificacion.CATEGORIA_NUEVA: 'ri-folder-add-line',
+    TipoNotificacion.SISTEMA: 'ri-notification-line',
+}
+FALLBACK_ICON = 'ri-notification-line'
+
+TYPE_CODES = {tipo: index for index, tipo in enumerate(TipoNotificacion.values)}
+
+
+def dumps(payload):
+    """Serializar a texto JSON con orjson si está instalado"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_orjson_default).decode()
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def _orjson_default(value):
+    return DjangoJSONEncoder().default(value)
+
+
+def negotiate_version(scope):
+    """Versión pedida en la query string (`?v=2`); 1 si no se pide o no se soporta"""
+    query = scope.get('query_string', b'').decode()
+    for part in query.split('&'):
+        name, _, value = part.partition('=')
+        if name == 'v' and value.isdigit():
+            return PROTOCOL_VERSION if int(value) >= PROTOCOL_VERSION else 1
+    return 1
+
+
+def hello_message():
+    """Metadatos estáticos por tipo, enviados una vez al conectar"""
+    return {
+        'type': 'hello',
+        'v': PROTOCOL_VERSION,
+        'types': [
+            [tipo, label, DEFAULT_ICONS.get(tipo, FALLBACK_ICON)]
+            for tipo, label in TipoNotificacion.choices
+        ],
+    }
+
+
+def inline_data_limit():
+    return getattr(settings, 'NOTIFICATION_INLINE_DATA_BYTES', 512)
+
+
+def encode(notification):
+    """Pasar una notificación serializada (dict v1) al formato compacto"""
+    tipo = notification.get('tipo')
+    compact = {
+        'i': notification['id'],
+        'k': TYPE_CODES.get(tipo, TYPE_CODES[TipoNotificacion.SISTEMA]),
+        'm': notification.get('mensaje'),
+        'f': notification.get('fecha_hora'),
+    }
+    if notification.get('titulo'):
+        compact['h'] = notification['titulo']
+    if notification.get('leida'):
+        compact['r'] = 1
+    if notification.get('url_accion'):
+        compact['u'] = notification['url_accion']
+    if notification.get('color') and notification['color'] != DEFAULT_COLOR:
+        compact['c'] = notification['color']
+    if notification.get('icono') and notification['icono'] != DEFAULT_ICONS.get(tipo, FALLBACK_ICON):
+        compact['ic'] = notification['icono']
+    if notification.get('cursor'):
+        compact['cu'] = notification['cursor']
+
+    datos = notification.get('datos_adicionales')
+    if datos:
+        if len(dumps(datos)) > inline_data_limit():
+            compact['x'] = 1
+        else:
+            compact['d'] = datos
+    return compact
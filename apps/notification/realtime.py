@@ -0,0 +1,53 @@
+# apps/notification/realtime.py
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+# Event loop del servidor ASGI; lo registran los consumers al conectarse
+_server_loop = None
+
+
+def bind_server_loop(loop):
+    global _server_loop
+    _server_loop = loop
+
+
+def group_send_many(messages):
+    """Enviar [(grupo, mensaje)] al channel layer desde código síncrono.
+
+    Si en el proceso corre el servidor ASGI, los envíos se programan en su
+    event loop: con InMemoryChannelLayer es la única forma de que lleguen a
+    los consumers cuando se llama desde un hilo propio (timers, despachador
+    de notificaciones). Fuera del servidor (comandos, workers) se usa
+    async_to_sync. Todos los group_send del lote van en un solo gather.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not messages:
+        return
+
+    async def send_all():
+        await asyncio.gather(*(channel_layer.group_send(group, message) for group, message in messages))
+
+    loop = _server_loop
+    if loop is None or not loop.is_running():
+        async_to_sync(send_all)()
+        return
+
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    if running is loop:
+        loop.create_task(send_all())
+    else:
+        asyncio.run_coroutine_threadsafe(send_all(), loop).add_done_callback(_log_send_error)
+
+
+def _log_send_error(future):
+    if not future.cancelled() and future.exception():
+        logger.warning(f"Error enviando mensajes al channel layer: {future.exception()}")
@@ -0,0 +1,173 @@
+# apps/notification/retention.py
+import gzip
+import json
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import NotificationCounterCache
+from .models import (
+    EntregaNotificacion, Notificacion, NotificacionArchivada, NotificacionGrupal, TipoNotificacion
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'usuario_id', 'tipo_notificacion', 'titulo', 'mensaje', 'fecha_hora',
+    'icono', 'color', 'url_accion', 'datos_adicionales'
+)
+
+
+class TableArchiver:
+    """Archiva las filas en NotificacionArchivada"""
+
+    def write(self, rows):
+        NotificacionArchivada.objects.bulk_create([
+            NotificacionArchivada(
+                notificacion_id=row['id'],
+                usuario_id=row['usuario_id'],
+                tipo_notificacion=row['tipo_notificacion'],
+                titulo=row['titulo'],
+                mensaje=row['mensaje'],
+                fecha_hora=row['fecha_hora'],
+                datos={
+                    'icono': row['icono'],
+                    'color': row['color'],
+                    'url_accion': row['url_accion'],
+                    'datos_adicionales': row['datos_adicionales'],
+                }
+            )
+            for row in rows
+        ])
+
+    def close(self):
+        pass
+
+
+class FileArchiver:
+    """Archiva las filas como JSON por línea en un archivo .jsonl.gz"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"notificaciones-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz")
+        self._file = gzip.open(self.path, 'at', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            self._file.write('\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class NotificationRetentionService:
+    """Retención de notificaciones leídas según la política de cada tipo.
+
+    Las filas vencidas se copian al archivo y se borran por lotes de a lo más
+    `batch_size` ids, cada lote en su propia transacción, para no bloquear la
+    base de datos con un DELETE masivo.
+    """
+
+    @staticmethod
+    def policies(overrides=None):
+        """Días de retención por tipo: NOTIFICATION_RETENTION_DAYS más los overrides"""
+        configured = dict(getattr(settings, 'NOTIFICATION_RETENTION_DAYS', {}))
+        configured.update(overrides or {})
+        default = configured.get('default', 90)
+        return {tipo: int(configured.get(tipo, default)) for tipo in TipoNotificacion.values}
+
+    @staticmethod
+    def get_archiver(archive, archive_dir=None):
+        if archive == 'table':
+            return TableArchiver()
+        if archive == 'file':
+            return FileArchiver(archive_dir or os.path.join(settings.BASE_DIR, 'archive', 'notifications'))
+        return None
+
+    @classmethod
+    def prune(cls, archive='table', archive_dir=None, batch_size=None, overrides=None, dry_run=False, now=None):
+        """Aplicar la retención. Devuelve {'por_tipo': {...}, 'entregas': n, 'grupales': n}"""
+        batch_size = batch_size or getattr(settings, 'NOTIFICATION_PRUNE_BATCH_SIZE', 1000)
+        now = now or timezone.now()
+        policies = cls.policies(overrides)
+        archiver = None if dry_run else cls.get_archiver(archive, archive_dir)
+
+        result = {'por_tipo': {}, 'entregas': 0, 'grupales': 0}
+        try:
+            for tipo, days in policies.items():
+                expired = Notificacion.objects.filter(
+                    tipo_notificacion=tipo,
+                    leida=True,
+                    fecha_hora__lt=now - timedelta(days=days)
+                )
+                if dry_run:
+                    result['por_tipo'][tipo] = expired.count()
+                else:
+                    result['por_tipo'][tipo] = cls._prune_queryset(expired, archiver, batch_size)
+
+            # Las entregas solo sirven mientras pueden existir sus notificaciones individuales
+            cutoff = now - timedelta(days=max(policies.values()))
+            if dry_run:
+                result['entregas'] = EntregaNotificacion.objects.filter(
+                    notificacion_grupal__fecha_hora__lt=cutoff,
+                    notificacion_grupal__estado_envio__in=['enviado', 'fallido']
+                ).count()
+            else:
+                result['entregas'], result['grupales'] = cls._prune_grupales(cutoff, batch_size)
+        finally:
+            if archiver:
+                archiver.close()
+
+        if isinstance(archiver, FileArchiver):
+            result['archivo'] = archiver.path
+        return result
+
+    @staticmethod
+    def _prune_queryset(queryset, archiver, batch_size):
+        total = 0
+        while True:
+            with transaction.atomic():
+                rows = list(queryset.order_by('id').values(*ARCHIVE_FIELDS)[:batch_size])
+                if not rows:
+                    break
+                if archiver:
+                    archiver.write(rows)
+                Notificacion.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+            NotificationCounterCache.on_pruned({row['usuario_id'] for row in rows})
+            total += len(rows)
+            logger.debug(f"Retención: {total} notificaciones eliminadas")
+        return total
+
+    @staticmethod
+    def _prune_grupales(cutoff, batch_size):
+        """Borrar por lotes las entregas y luego las notificaciones grupales ya distribuidas"""
+        entregas = grupales = 0
+
+        while True:
+            ids = list(EntregaNotificacion.objects.filter(
+                notificacion_grupal__fecha_hora__lt=cutoff,
+                notificacion_grupal__estado_envio__in=['enviado', 'fallido']
+            ).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            entregas += EntregaNotificacion.objects.filter(id__in=ids).delete()[0]
+
+        while True:
+            ids = list(NotificacionGrupal.objects.filter(
+                fecha_hora__lt=cutoff,
+                estado_envio__in=['enviado', 'fallido']
+            ).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            NotificacionGrupal.objects.filter(id__in=ids).delete()
+            grupales += len(ids)
+
+        return entregas, grupales
@@ -1,8 +1,13 @@
 # apps/notifications/services.py
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from django.contrib.auth.models import User
+from django.db import transaction
+from .cache import NotificationCounterCache
+from .dispatcher import NotificationDispatcher
 from .models import Notificacion, NotificacionGrupal, TipoNotificacion
+from .pagination import encode_cursor
+from .protocol import DEFAULT_ICONS, FALLBACK_ICON
+from .realtime import group_send_many
 from auth.models import Role
 from typing import List, Optional, Dict, Any
 import json
@@ -39,8 +44,12 @@ def enviar_notificacion_usuario(
             datos_adicionales=datos_adicionales
         )
         
-        # Enviar por WebSocket
-        self._send_websocket_notification(usuario.id, notificacion)
+        # Actualizar contador y enviar por WebSocket una vez confirmada la transacción
+        def al_confirmar():
+            NotificationCounterCache.on_created([usuario.id])
+            self._send_websocket_notification(usuario.id, notificacion)
+        
+        transaction.on_commit(al_confirmar)
         
         return notificacion
     
@@ -57,9 +66,13 @@ def enviar_notificacion_roles(
         enviado_por: User = None
     ) -> NotificacionGrupal:
         """
-        Envía notificaciones a usuarios con roles específicos
+        Envía notificaciones a usuarios con roles específicos.
+
+        Solo registra la notificación grupal (bandeja de salida); la creación de
+        las notificaciones por usuario y el envío por WebSocket se hacen fuera de
+        la petición, después del commit (ver NotificationDispatcher).
         """
-        # Crear notificación grupal
+        # Crear notificación grupal pendiente de distribución
         notificacion_grupal = NotificacionGrupal.objects.create(
             roles_destinatarios=roles,
             mensaje=mensaje,
@@ -72,17 +85,22 @@ def enviar_notificacion_roles(
             enviado_por=enviado_por
         )
         
-        # Crear notificaciones individuales y enviar por WebSocket
-        notificaciones_individuales = notificacion_grupal.crear_notificaciones_individuales()
+        transaction.on_commit(lambda: NotificationDispatcher.schedule(notificacion_grupal.id))
         
-        for notificacion in notificaciones_individuales:
-            self._send_websocket_notification(notificacion.usuario.id, notificacion)
+        return notificacion_grupal
+    
+    def despachar_notificacion_grupal(self, notificacion_grupal: NotificacionGrupal) -> int:
+        """Crea las notificaciones individuales (en lote) y las envía por WebSocket"""
+        notificaciones_individuales = notificacion_grupal.crear_notificaciones_individuales()
+        NotificationCounterCache.on_created([n.usuario_id for n in notificaciones_individuales])
         
-        # También enviar notificación por canales de rol
-        for rol in roles:
-            self._send_role_notification(rol, notificacion_grupal)
+        self._send_websocket_notifications(
+            notificaciones_individuales,
+            notificacion_grupal,
+            notificacion_grupal.roles_destinatarios or []
+        )
         
-        return notificacion_grupal
+        return len(notificaciones_individuales)
     
     def notificar_stock_bajo(self, producto):
         """Notificación específica para stock bajo"""
@@ -186,50 +204,78 @@ def obtener_notificaciones_usuario(self, usuario: User, no_leidas_solo: bool = F
     
     def marcar_todas_como_leidas(self, usuario: User) -> int:
         """Marca todas las notificaciones de un usuario como leídas"""
-        return Notificacion.objects.filter(
+        count = Notificacion.objects.filter(
             usuario=usuario,
             leida=False
         ).update(leida=True)
+        NotificationCounterCache.on_all_read(usuario.id)
+        return count
     
     def obtener_conteo_no_leidas(self, usuario: User) -> int:
-        """Obtiene el conteo de notificaciones no leídas"""
-        return Notificacion.objects.filter(
-            usuario=usuario,
-            leida=False
-        ).count()
+        """Obtiene el conteo de notificaciones no leídas (desde el cache por usuario)"""
+        return NotificationCounterCache.get_unread(usuario.id)
+    
+    def obtener_estadisticas(self, usuario: User) -> Dict[str, Any]:
+        """Total, leídas, no leídas y conteo por tipo (cacheado por usuario)"""
+        return NotificationCounterCache.get_stats(usuario.id)
     
     def _send_websocket_notification(self, user_id: int, notificacion: Notificacion):
         """Envía notificación por WebSocket a un usuario específico"""
         if not self.channel_layer:
             return
         
-        notification_data = {
-            'id': notificacion.id,
-            'titulo': notificacion.titulo,
-            'mensaje': notificacion.mensaje,
-            'tipo': notificacion.tipo_notificacion,
-            'icono': notificacion.icono,
-            'color': notificacion.color,
-            'url_accion': notificacion.url_accion,
-            'fecha_hora': notificacion.fecha_hora.isoformat(),
-            'tiempo_transcurrido': notificacion.tiempo_transcurrido,
-            'datos_adicionales': notificacion.datos_adicionales
-        }
+        notification_data = self._serialize_notification(notificacion)
         
-        async_to_sync(self.channel_layer.group_send)(
+        group_send_many([(
             f"notifications_{user_id}",
             {
                 "type": "send_notification",
                 "data": notification_data
             }
-        )
+        )])
     
-    def _send_role_notification(self, rol: str, notificacion_grupal: NotificacionGrupal):
-        """Envía notificación por WebSocket a un canal de rol"""
+    def _send_websocket_notifications(self, notificaciones, notificacion_grupal=None, roles=()):
+        """Envía en un solo lote los mensajes WebSocket de un envío masivo.
+
+        Todos los group_send se despachan juntos en un solo lote en lugar
+        de una llamada async_to_sync por usuario.
+        """
         if not self.channel_layer:
             return
         
-        notification_data = {
+        mensajes = [
+            (f"notifications_{notificacion.usuario_id}", {
+                "type": "send_notification",
+                "data": self._serialize_notification(notificacion)
+            })
+            for notificacion in notificaciones
+        ]
+        if notificacion_grupal is not None:
+            role_data = self._serialize_role_notification(notificacion_grupal)
+            mensajes.extend(
+                (f"role_notifications_{rol}", {"type": "send_role_notification", "data": role_data})
+                for rol in roles
+            )
+        
+        group_send_many(mensajes)
+    
+    def _serialize_notification(self, notificacion: Notificacion) -> Dict[str, Any]:
+        return {
+            'id': notificacion.id,
+            'titulo': notificacion.titulo,
+            'mensaje': notificacion.mensaje,
+            'tipo': notificacion.tipo_notificacion,
+            'icono': notificacion.icono,
+            'color': notificacion.color,
+            'url_accion': notificacion.url_accion,
+            'fecha_hora': notificacion.fecha_hora.isoformat(),
+            'leida': notificacion.leida,
+            'datos_adicionales': notificacion.datos_adicionales,
+            'cursor': encode_cursor(notificacion)
+        }
+    
+    def _serialize_role_notification(self, notificacion_grupal: NotificacionGrupal) -> Dict[str, Any]:
+        return {
             'id': notificacion_grupal.id,
             'titulo': notificacion_grupal.titulo,
             'mensaje': notificacion_grupal.mensaje,
@@ -241,26 +287,25 @@ def _send_role_notification(self, rol: str, notificacion_grupal: NotificacionGru
             'roles_destinatarios': notificacion_grupal.roles_destinatarios,
             'datos_adicionales': notificacion_grupal.datos_adicionales
         }
+    
+    def _send_role_notification(self, rol: str, notificacion_grupal: NotificacionGrupal):
+        """Envía notificación por WebSocket a un canal de rol"""
+        if not self.channel_layer:
+            return
+        
+        notification_data = self._serialize_role_notification(notificacion_grupal)
         
-        async_to_sync(self.channel_layer.group_send)(
+        group_send_many([(
             f"role_notifications_{rol}",
             {
                 "type": "send_role_notification",
                 "data": notification_data
             }
-        )
+        )])
     
     def _get_default_icon(self, tipo: str) -> str:
         """Obtiene el icono por defecto según el tipo de notificación"""
-        icons = {
-            TipoNotificacion.ALERTA_STOCK: 'ri-alert-line',
-            TipoNotificacion.APROBACION_PENDIENTE: 'ri-time-line',
-            TipoNotificacion.ESTADO_PEDIDO: 'ri-shopping-cart-line',
-            TipoNotificacion.PRODUCTO_ACTUALIZADO: 'ri-edit-box-line',
-            TipoNotificacion.CATEGORIA_NUEVA: 'ri-folder-add-line',
-            TipoNotificacion.SISTEMA: 'ri-notification-line'
-        }
-        return icons.get(tipo, 'ri-notification-line')
+        return DEFAULT_ICONS.get(tipo, FALLBACK_ICON)
 
 
 # Instancia global del servicio
@@ -12,6 +12,8 @@
 from django.shortcuts import get_object_or_404
 from .models import Notificacion, NotificacionGrupal, TipoNotificacion
 from .serializers import NotificacionSerializer, NotificacionGrupalSerializer
+from .cache import NotificationCounterCache
+from .pagination import InvalidCursorError, NotificacionCursorPagination, keyset_page
 from .services import notification_service
 from web_project import TemplateLayout
 from auth.models import Role
@@ -20,6 +22,7 @@ class NotificacionListView(generics.ListAPIView):
     """API para listar notificaciones del usuario autenticado"""
     serializer_class = NotificacionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificacionCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -38,7 +41,7 @@ def get_queryset(self):
         if tipo:
             queryset = queryset.filter(tipo_notificacion=tipo)
 
-        return queryset.order_by('-fecha_hora')
+        return queryset.order_by('-fecha_hora', '-id')
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -63,10 +66,23 @@ class NotificacionViewSet(viewsets.ModelViewSet):
     """ViewSet completo para gestionar notificaciones"""
     serializer_class = NotificacionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificacionCursorPagination
 
     def get_queryset(self):
         return Notificacion.objects.filter(usuario=self.request.user)
 
+    def perform_create(self, serializer):
+        notificacion = serializer.save()
+        NotificationCounterCache.invalidate(notificacion.usuario_id)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        NotificationCounterCache.invalidate(self.request.user.id)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        NotificationCounterCache.invalidate(self.request.user.id)
+
     @action(detail=True, methods=['patch'])
     def marcar_leida(self, request, pk=None):
         """Marca una notificación como leída"""
@@ -97,28 +113,7 @@ def conteo_no_leidas(self, request):
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Obtiene estadísticas de notificaciones del usuario"""
-        user = request.user
-
-        total = Notificacion.objects.filter(usuario=user).count()
-        no_leidas = Notificacion.objects.filter(usuario=user, leida=False).count()
-        leidas = total - no_leidas
-
-        # Estadísticas por tipo
-        tipos_stats = {}
-        for tipo_choice in TipoNotificacion.choices:
-            tipo_key = tipo_choice[0]
-            count = Notificacion.objects.filter(
-                usuario=user,
-                tipo_notificacion=tipo_key
-            ).count()
-            tipos_stats[tipo_key] = count
-
-        return Response({
-            'total': total,
-            'leidas': leidas,
-            'no_leidas': no_leidas,
-            'por_tipo': tipos_stats
-        })
+        return Response(notification_service.obtener_estadisticas(request.user))
 
 class NotificacionGrupalViewSet(viewsets.ModelViewSet):
     """ViewSet para gestionar notificaciones grupales (solo admin)"""
@@ -145,7 +140,8 @@ def notificaciones_json(request):
 
     # Parámetros de consulta
     limit = int(request.GET.get('limit', 10))
-    offset = int(request.GET.get('offset', 0))
+    cursor = request.GET.get('cursor')
+    offset = request.GET.get('offset')
     only_unread = request.GET.get('only_unread', 'false').lower() == 'true'
 
     # Consulta base
@@ -154,9 +150,24 @@ def notificaciones_json(request):
     if only_unread:
         queryset = queryset.filter(leida=False)
 
-    # Paginación manual
-    total = queryset.count()
-    notifications = queryset.order_by('-fecha_hora')[offset:offset + limit]
+    # Los totales salen de los contadores cacheados, no de un COUNT por página
+    estadisticas = notification_service.obtener_estadisticas(user)
+    unread_count = estadisticas['no_leidas']
+    total = unread_count if only_unread else estadisticas['total']
+
+    next_cursor = None
+    if offset is not None and not cursor:
+        # Paginación por offset (compatibilidad con clientes anteriores)
+        offset = int(offset)
+        notifications = queryset.order_by('-fecha_hora', '-id')[offset:offset + limit]
+        has_more = (offset + limit) < total
+    else:
+        # Paginación por cursor sobre (fecha_hora, id)
+        try:
+            notifications, next_cursor = keyset_page(queryset, cursor, limit)
+        except InvalidCursorError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        has_more = next_cursor is not None
 
     # Serializar datos
     data = []
@@ -175,13 +186,12 @@ def notificaciones_json(request):
             'datos_adicionales': notif.datos_adicionales
         })
 
-    unread_count = Notificacion.objects.filter(usuario=user, leida=False).count()
-
     return JsonResponse({
         'data': data,
         'total': total,
         'unread_count': unread_count,
-        'has_more': (offset + limit) < total
+        'has_more': has_more,
+        'next_cursor': next_cursor
     })
 
 @login_required
@@ -218,9 +228,10 @@ def get_context_data(self, **kwargs):
 
         user = self.request.user
 
-        # Estadísticas básicas
-        total_notificaciones = Notificacion.objects.filter(usuario=user).count()
-        no_leidas = Notificacion.objects.filter(usuario=user, leida=False).count()
+        # Estadísticas básicas (una consulta agrupada, cacheada por usuario)
+        estadisticas = notification_service.obtener_estadisticas(user)
+        total_notificaciones = estadisticas['total']
+        no_leidas = estadisticas['no_leidas']
 
         # Últimas notificaciones
         ultimas_notificaciones = Notificacion.objects.filter(
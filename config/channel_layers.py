@@ -0,0 +1,254 @@
+# config/channel_layers.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    """Channel layer entre procesos de un mismo host respaldado por un archivo SQLite.
+
+    Sustituto local de channels_redis para despliegues de un solo servidor:
+    todos los workers (gunicorn/daphne y los comandos de management) abren el
+    mismo archivo, así que un group_send hecho en un proceso llega a los
+    consumers de los demás.
+
+    Cada proceso lee sus canales específicos ("...!xxxx") con un único poller
+    que trae en una consulta los mensajes de todos ellos, en lugar de una
+    consulta por socket.
+    """
+
+    extensions = ['groups', 'flush']
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS channel_message ('
+        ' id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, process TEXT NOT NULL,'
+        ' payload TEXT NOT NULL, expires REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS channel_message_process ON channel_message (process, id)',
+        'CREATE INDEX IF NOT EXISTS channel_message_expires ON channel_message (expires)',
+        'CREATE TABLE IF NOT EXISTS channel_group ('
+        ' grp TEXT NOT NULL, channel TEXT NOT NULL, joined REAL NOT NULL, PRIMARY KEY (grp, channel))',
+    )
+
+    def __init__(self, path='channels.sqlite3', expiry=60, group_expiry=86400, capacity=100,
+                 channel_capacity=None, poll_interval=0.05, cleanup_interval=30, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+        self.path = str(path)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.cleanup_interval = cleanup_interval
+        self.client_prefix = uuid.uuid4().hex[:12]
+        self._last_cleanup = 0
+        self._schema_ready = False
+        self._local = threading.local()
+        self._reset_receive_state(None)
+
+    # Conexión
+
+    def _connection(self):
+        """Una conexión por hilo del pool de asyncio.to_thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            if not self._schema_ready:
+                for statement in self.SCHEMA:
+                    connection.execute(statement)
+                self._schema_ready = True
+            self._local.connection = connection
+        return connection
+
+    def _run(self, func, *args):
+        """Ejecutar `func(connection, *args)` en una transacción y fuera del event loop"""
+        def work():
+            connection = self._connection()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(connection, *args)
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+            return result
+        return asyncio.to_thread(work)
+
+    @staticmethod
+    def _process_of(channel):
+        """Proceso dueño de un canal específico ("prefijo.<proceso>!xxxx")"""
+        if '!' not in channel:
+            return channel
+        return channel[:channel.find('!')].rsplit('.', 1)[-1]
+
+    @staticmethod
+    def _dumps(message):
+        return json.dumps(message, cls=DjangoJSONEncoder)
+
+    # API del channel layer
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        assert '__asgi_channel__' not in message
+
+        def insert(connection):
+            pending = connection.execute(
+                'SELECT COUNT(*) FROM channel_message WHERE channel = ? AND expires >= ?',
+                (channel, time.time())
+            ).fetchone()[0]
+            if pending >= self.get_capacity(channel):
+                raise ChannelFull(channel)
+            connection.execute(
+                'INSERT INTO channel_message (channel, process, payload, expires) VALUES (?, ?, ?, ?)',
+                (channel, self._process_of(channel), self._dumps(message), time.time() + self.expiry)
+            )
+
+        await self._run(insert)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+
+        if '!' not in channel:
+            return await self._receive_single(channel)
+
+        self._ensure_poller()
+        queue = self._queues.setdefault(channel, asyncio.Queue())
+        try:
+            return await queue.get()
+        finally:
+            if queue.empty():
+                self._queues.pop(channel, None)
+
+    async def new_channel(self, prefix='specific.'):
+        return f'{prefix}{self.client_prefix}!{uuid.uuid4().hex[:12]}'
+
+    async def flush(self):
+        def clear(connection):
+            connection.execute('DELETE FROM channel_message')
+            connection.execute('DELETE FROM channel_group')
+
+        await self._run(clear)
+        self._reset_receive_state(None)
+
+    async def close(self):
+        if self._poller and not self._poller.done():
+            self._poller.cancel()
+
+    # Grupos
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+
+        def add(connection):
+            connection.execute(
+                'INSERT OR REPLACE INTO channel_group (grp, channel, joined) VALUES (?, ?, ?)',
+                (group, channel, time.time())
+            )
+
+        await self._run(add)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_channel_name(channel)
+        self.require_valid_group_name(group)
+
+        def discard(connection):
+            connection.execute('DELETE FROM channel_group WHERE grp = ? AND channel = ?', (group, channel))
+
+        await self._run(discard)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        payload = self._dumps(message)
+
+        def fan_out(connection):
+            now = time.time()
+            self._clean_expired(connection, now)
+            channels = [row[0] for row in connection.execute(
+                'SELECT channel FROM channel_group WHERE grp = ? AND joined >= ?',
+                (group, now - self.group_expiry)
+            )]
+            connection.executemany(
+                'INSERT INTO channel_message (channel, process, payload, expires) VALUES (?, ?, ?, ?)',
+                [(channel, self._process_of(channel), payload, now + self.expiry) for channel in channels]
+            )
+
+        await self._run(fan_out)
+
+    # Recepción
+
+    def _reset_receive_state(self, loop):
+        self._loop = loop
+        self._queues = {}
+        self._poller = None
+
+    def _ensure_poller(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # async_to_sync crea loops nuevos; las colas solo valen en el loop que las creó
+            self._reset_receive_state(loop)
+        if self._poller is None or self._poller.done():
+            self._poller = loop.create_task(self._poll_process_channels())
+
+    async def _poll_process_channels(self):
+        """Traer de una vez los mensajes de todos los canales específicos de este proceso"""
+        def take(connection):
+            return connection.execute(
+                'DELETE FROM channel_message WHERE process = ? AND expires >= ? RETURNING id, channel, payload',
+                (self.client_prefix, time.time())
+            ).fetchall()
+
+        while self._queues:
+            try:
+                rows = await self._run(take)
+            except sqlite3.Error as e:
+                logger.warning(f"Error leyendo el channel layer SQLite: {e}")
+                rows = []
+
+            for _, channel, payload in sorted(rows):
+                self._queues.setdefault(channel, asyncio.Queue()).put_nowait(json.loads(payload))
+            if not rows:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _receive_single(self, channel):
+        def take(connection):
+            return connection.execute(
+                'DELETE FROM channel_message WHERE id = ('
+                ' SELECT id FROM channel_message WHERE channel = ? AND expires >= ? ORDER BY id LIMIT 1'
+                ') RETURNING payload',
+                (channel, time.time())
+            ).fetchone()
+
+        while True:
+            row = await self._run(take)
+            if row:
+                return json.loads(row[0])
+            await asyncio.sleep(self.poll_interval)
+
+    def _clean_expired(self, connection, now):
+        """Cada `cleanup_interval` segundos: borrar mensajes vencidos y sacar de los grupos a sus canales"""
+        if now - self._last_cleanup < self.cleanup_interval:
+            return
+        self._last_cleanup = now
+
+        connection.execute(
+            'DELETE FROM channel_group WHERE joined < ? OR channel IN ('
+            ' SELECT DISTINCT channel FROM channel_message WHERE expires < ?)',
+            (now - self.group_expiry, now)
+        )
+        connection.execute('DELETE FROM channel_message WHERE expires < ?', (now,))
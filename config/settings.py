@@ -10,8 +10,11 @@
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+import sys
+from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.translation import gettext_lazy as _
 from dotenv import load_dotenv
 
@@ -86,6 +89,7 @@
 ASGI_APPLICATION = "config.asgi.application"
 
 MIDDLEWARE = [
+    "web_project.query_budget_middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -102,11 +106,42 @@
 ]
 
 ROOT_URLCONF = "config.urls"
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+
+# Channel layer: "memory" (un solo proceso), "sqlite" (varios procesos en un mismo
+# host, archivo compartido) o "redis" (varios hosts, requiere requirements-redis.txt)
+CHANNEL_LAYER_BACKEND = os.environ.get("CHANNEL_LAYER_BACKEND", "memory").lower()
+
+if CHANNEL_LAYER_BACKEND == "redis":
+    if find_spec("channels_redis") is None:
+        raise ImproperlyConfigured(
+            "CHANNEL_LAYER_BACKEND=redis requiere el paquete channels-redis: "
+            "instálelo con `pip install -r requirements-redis.txt` o use 'memory' o 'sqlite'"
+        )
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [os.environ.get("CHANNEL_REDIS_URL", "redis://127.0.0.1:6379/0")],
+            },
+        }
     }
-}
+elif CHANNEL_LAYER_BACKEND == "sqlite":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "config.channel_layers.SQLiteChannelLayer",
+            "CONFIG": {
+                "path": os.environ.get("CHANNEL_SQLITE_PATH", str(BASE_DIR / "channels.sqlite3")),
+                "poll_interval": float(os.environ.get("CHANNEL_SQLITE_POLL_INTERVAL", 0.05)),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -159,6 +194,33 @@
 #     }
 # }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Debe ser compartido por todos los procesos: los contadores de notificaciones
+# no leídas los actualizan también los workers (dispatch_notifications,
+# process_quotation_jobs), así que un cache en memoria del proceso (LocMemCache)
+# dejaría contadores desactualizados en el servidor web. Por defecto se usa un
+# cache en archivos dentro del proyecto (ligado a su base de datos, no compartido
+# con otras copias); en producción puede usarse Redis o el cache en base de datos:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", str(BASE_DIR / ".django_cache")),
+    }
+}
+
+# `manage.py test` corre en un solo proceso sobre una base de datos propia: cache
+# aislado para no mezclar contadores con los de la base de desarrollo
+if sys.argv[1:2] == ["test"]:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "web-project-tests",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -194,8 +256,65 @@
 # Moneda por defecto
 DEFAULT_CURRENCY = "PEN"  # Soles peruanos
 
+# Configuración de cotizaciones
+# ------------------------------------------------------------------------------
+
+# Registrar el detalle fila por fila al procesar respuestas Excel (solo para depurar)
+COTIZACION_EXCEL_DEBUG = os.environ.get("COTIZACION_EXCEL_DEBUG", 'False').lower() in ['true', 'yes', '1']
+
+# Configuración de numeración de documentos
+# ------------------------------------------------------------------------------
+
+# Números de venta / orden de compra que cada proceso reserva por vez (1 = correlativo estricto)
+DOCUMENT_SEQUENCE_BLOCK_SIZE = int(os.environ.get("DOCUMENT_SEQUENCE_BLOCK_SIZE", 1))
+
+# Configuración de notificaciones
+# ------------------------------------------------------------------------------
+
+# True si corre `manage.py dispatch_notifications`; si no, un único hilo en
+# segundo plano por proceso drena la bandeja en orden tras cada commit
+NOTIFICATION_OUTBOX_WORKER = os.environ.get("NOTIFICATION_OUTBOX_WORKER", 'False').lower() in ['true', 'yes', '1']
+
+# Sin worker: cada cuántos segundos el hilo de la bandeja revisa lo pendiente y
+# reencola las 'procesando' con más de NOTIFICATION_STALE_MINUTES
+NOTIFICATION_RECOVERY_INTERVAL = int(os.environ.get("NOTIFICATION_RECOVERY_INTERVAL", 60))
+NOTIFICATION_STALE_MINUTES = int(os.environ.get("NOTIFICATION_STALE_MINUTES", 10))
+
+# Cache de conteos de no leídas: un alias de CACHES compartido entre procesos
+# (archivos, base de datos, redis...), nunca LocMemCache
+NOTIFICATION_CACHE_ALIAS = os.environ.get("NOTIFICATION_CACHE_ALIAS", "default")
+NOTIFICATION_COUNTER_TIMEOUT = int(os.environ.get("NOTIFICATION_COUNTER_TIMEOUT", 300))
+
+# Segundos que los consumers reutilizan, por usuario, las no leídas y el rol leídos al conectarse
+NOTIFICATION_SNAPSHOT_TTL = int(os.environ.get("NOTIFICATION_SNAPSHOT_TTL", 5))
+NOTIFICATION_ROLE_TTL = int(os.environ.get("NOTIFICATION_ROLE_TTL", 60))
+
+# En el formato compacto (v2), datos_adicionales más grandes que esto se piden aparte con get_data
+NOTIFICATION_INLINE_DATA_BYTES = int(os.environ.get("NOTIFICATION_INLINE_DATA_BYTES", 512))
+
+# Días que se conservan las notificaciones leídas, por tipo (`manage.py prune_notifications`)
+NOTIFICATION_RETENTION_DAYS = {
+    'default': int(os.environ.get("NOTIFICATION_RETENTION_DAYS", 90)),
+    'ALERTA_STOCK': 30,
+    'PRODUCTO_ACTUALIZADO': 30,
+    'CATEGORIA_NUEVA': 30,
+    'SISTEMA': 60,
+}
+NOTIFICATION_PRUNE_BATCH_SIZE = int(os.environ.get("NOTIFICATION_PRUNE_BATCH_SIZE", 1000))
+
 # Configuración de stock
 # ------------------------------------------------------------------------------
+
+# Ventana en la que se agrupan los cambios de stock antes de enviarlos a stock_group (0: envío inmediato)
+STOCK_BROADCAST_WINDOW_MS = int(os.environ.get("STOCK_BROADCAST_WINDOW_MS", 250))
+
+# Presupuesto de consultas por petición (QueryBudgetMiddleware, desarrollo/CI)
+# ------------------------------------------------------------------------------
+
+QUERY_BUDGET_ENABLED = os.environ.get("QUERY_BUDGET_ENABLED", str(DEBUG)).lower() in ['true', 'yes', '1']
+QUERY_BUDGET_MAX_QUERIES = int(os.environ.get("QUERY_BUDGET_MAX_QUERIES", 50))
+QUERY_BUDGET_MAX_REPEATED = int(os.environ.get("QUERY_BUDGET_MAX_REPEATED", 10))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -19,10 +19,18 @@ function formatCurrency(amount) {
 
 socket.onmessage = function(event) {
     const message = JSON.parse(event.data); // El objeto con "type" y "data"
+
+    // El socket también responde a las suscripciones ('subscriptions' / 'error')
+    if (message.type === 'error') {
+        console.warn("Stock socket:", message.message);
+        return;
+    }
+    if (message.type !== 'stock_update') return;
     console.log("Stock update:", message);
 
-    // Accedemos a la info dentro de message.data
-    const stockData = message.data;
+    // Los lotes (batch: true) traen en data una lista con el último estado de cada producto
+    const updates = message.batch ? message.data : [message.data];
+    if (!updates || updates.length === 0) return;
 
     toastr.options = {
     "closeButton": false,
@@ -41,8 +49,14 @@ socket.onmessage = function(event) {
     "hideMethod": "fadeOut"
 };
 
-    toastr.info(`El producto ${stockData.name} ahora tiene ${stockData.current_stock} 📦 unidades.`, 'Actualización de Stock');
+    if (updates.length === 1) {
+        const stockData = updates[0];
+        toastr.info(`El producto ${stockData.name} ahora tiene ${stockData.current_stock} 📦 unidades.`, 'Actualización de Stock');
+    } else {
+        toastr.info(`${updates.length} productos actualizaron su stock.`, 'Actualización de Stock');
+    }
 
+    // Una sola recarga por mensaje, aunque el lote traiga muchos productos
     dt_products.ajax.url(urldata).load();
 
     // Recargar datos analíticos cuando llega actualización
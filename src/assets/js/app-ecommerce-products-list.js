@@ -7,6 +7,39 @@ const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
 const socket = new WebSocket(`${protocol}//${window.location.host}/ws/stock/`);
 let urldata='/api/products/data/';
 
+// Temas de stock suscritos según los filtros: sin filtros se recibe todo el catálogo
+let stockTopics = { categories: [], low_stock: false };
+
+function syncStockSubscription() {
+    const category = $("#ProductCategory").val();
+    const stock = $("#ProductStock").val();
+    const topics = {
+        categories: category ? [parseInt(category, 10)] : [],
+        low_stock: stock === 'low_stock' || stock === 'out_of_stock'
+    };
+
+    if (socket.readyState !== WebSocket.OPEN) {
+        stockTopics = topics;  // Se envía al abrir el socket
+        return;
+    }
+
+    if (stockTopics.categories.length || stockTopics.low_stock) {
+        socket.send(JSON.stringify({ type: 'unsubscribe', ...stockTopics }));
+    }
+    if (topics.categories.length || topics.low_stock) {
+        socket.send(JSON.stringify({ type: 'subscribe', ...topics }));
+    } else {
+        socket.send(JSON.stringify({ type: 'subscribe', all: true }));
+    }
+    stockTopics = topics;
+}
+
+socket.addEventListener('open', function () {
+    if (stockTopics.categories.length || stockTopics.low_stock) {
+        socket.send(JSON.stringify({ type: 'subscribe', ...stockTopics }));
+    }
+});
+
 function getCookie(name) {
     let cookieValue = null;
     if (document.cookie && document.cookie !== '') {
@@ -745,6 +778,7 @@ function buildProductFilterURL() {
 // Reutilizar para los tres filtros
 $('.product_status, .product_category, .product_stock').on('change', function () {
      buildProductFilterURL();
+    syncStockSubscription();
     dt_products.ajax.url(urldata).load();
 });
 
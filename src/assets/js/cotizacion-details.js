@@ -786,6 +786,33 @@ const CotizacionDetails = {
         this.uploadFile(fileInput.files[0]);
     },
 
+    /**
+     * Esperar a que el worker termine un trabajo de procesamiento
+     */
+    async waitForJob(jobId, interval = 2000) {
+        while (true) {
+            const response = await fetch(`/api/cotizacion/envios/${this.config.envioId}/processing_job/?job_id=${jobId}`);
+            if (!response.ok) {
+                toastr.error('No se pudo consultar el estado del procesamiento');
+                return;
+            }
+
+            const job = await response.json();
+            if (job.terminado) {
+                if (job.estado === 'completado') {
+                    toastr.success('Archivo procesado exitosamente');
+                } else {
+                    toastr.error(job.error || 'Error al procesar archivo');
+                }
+                this.loadDetails(); // Recargar detalles
+                return;
+            }
+
+            this.showLoading(true, `Procesando archivo... ${job.progreso}%`);
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    },
+
     /**
      * Subir archivo
      */
@@ -806,8 +833,8 @@ const CotizacionDetails = {
 
             if (response.ok) {
                 const result = await response.json();
-                toastr.success(result.message);
-                this.loadDetails(); // Recargar detalles
+                toastr.info(result.message);
+                await this.waitForJob(result.job_id);
             } else {
                 const error = await response.json();
                 toastr.error(error.message || 'Error al procesar archivo');
@@ -893,8 +920,8 @@ const CotizacionDetails = {
 
             if (response.ok) {
                 const result = await response.json();
-                toastr.success(result.message);
-                this.loadDetails(); // Recargar detalles
+                toastr.info(result.message);
+                await this.waitForJob(result.job_id);
             } else {
                 const error = await response.json();
                 toastr.error(error.error || 'Error al reprocesar');
@@ -14,6 +14,10 @@ class NotificationSystem {
         this.reconnectAttempts = 0;
         this.maxReconnectAttempts = 5;
         this.reconnectInterval = 3000;
+        // Cursor de la última notificación recibida (para pedir solo lo perdido al reconectar)
+        this.lastCursor = null;
+        // Tabla de tipos del formato compacto (v2), llega en el mensaje 'hello'
+        this.types = [];
 
         this.init();
     }
@@ -28,7 +32,7 @@ class NotificationSystem {
     initWebSocket() {
         // Configurar WebSocket para notificaciones
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws/notifications/`;
+        const wsUrl = `${protocol}//${window.location.host}/ws/notifications/?v=2`;
 
         try {
             this.socket = new WebSocket(wsUrl);
@@ -38,6 +42,10 @@ class NotificationSystem {
                 this.isConnected = true;
                 this.reconnectAttempts = 0;
                 this.updateConnectionStatus(true);
+
+                if (this.lastCursor) {
+                    this.socket.send(JSON.stringify({ type: 'get_since', cursor: this.lastCursor }));
+                }
             };
 
             this.socket.onmessage = (event) => {
@@ -91,18 +99,90 @@ class NotificationSystem {
         console.log('📨 Mensaje WebSocket recibido:', message.type);
 
         switch (message.type) {
+            case 'hello':
+                this.types = message.types;
+                break;
             case 'notification':
+                message.data = this.decode(message.data);
+                if (message.data.cursor) {
+                    this.lastCursor = message.data.cursor;
+                }
                 this.addNewNotification(message.data);
                 break;
             case 'unread_count':
                 this.updateUnreadCount(message.count);
                 break;
             case 'unread_notifications':
-                this.loadNotifications(message.notifications);
+                // En una reconexión la lista se completa con 'notifications_since'
+                if (!this.lastCursor) {
+                    this.lastCursor = message.cursor;
+                    this.loadNotifications(message.notifications.map(n => this.decode(n)));
+                }
+                break;
+            case 'notifications_since':
+                message.notifications = message.notifications.map(n => this.decode(n));
+                this.mergeMissedNotifications(message);
+                break;
+            case 'notification_data':
+                this.setNotificationData(message.id, message.data);
                 break;
         }
     }
 
+    decode(notification) {
+        // Formato compacto (v2) -> mismo objeto que envía la API
+        if (notification.i === undefined) {
+            return notification;
+        }
+        const [tipo, , icono] = this.types[notification.k] || ['sistema', '', 'ri-notification-line'];
+        return {
+            id: notification.i,
+            tipo: tipo,
+            titulo: notification.h || '',
+            mensaje: notification.m,
+            fecha_hora: notification.f,
+            leida: notification.r === 1,
+            url_accion: notification.u || null,
+            color: notification.c || 'info',
+            icono: notification.ic || icono,
+            datos_adicionales: notification.d || {},
+            datos_pendientes: notification.x === 1,
+            cursor: notification.cu
+        };
+    }
+
+    requestNotificationData(notification) {
+        // Los datos_adicionales grandes no viajan en el frame; se piden al abrir la notificación
+        if (notification.datos_pendientes && this.isConnected) {
+            this.socket.send(JSON.stringify({ type: 'get_data', notification_id: notification.id }));
+        }
+    }
+
+    setNotificationData(notificationId, data) {
+        const notification = this.notifications.find(n => n.id === notificationId);
+        if (notification) {
+            notification.datos_adicionales = data || {};
+            notification.datos_pendientes = false;
+        }
+    }
+
+    mergeMissedNotifications(message) {
+        const knownIds = new Set(this.notifications.map(n => n.id));
+        message.notifications
+            .filter(n => !knownIds.has(n.id))
+            .forEach(n => this.notifications.unshift(n));
+
+        this.notifications = this.notifications.slice(0, 50);
+        this.lastCursor = message.cursor || this.lastCursor;
+        this.updateNotificationsList();
+
+        if (message.has_more) {
+            this.socket.send(JSON.stringify({ type: 'get_since', cursor: this.lastCursor }));
+        } else {
+            this.socket.send(JSON.stringify({ type: 'get_unread_count' }));
+        }
+    }
+
     addNewNotification(notification) {
         console.log('🔔 Nueva notificación:', notification.titulo);
 
@@ -127,6 +207,23 @@ class NotificationSystem {
         this.updateNotificationsList();
     }
 
+    timeAgo(notification) {
+        // El socket envía solo fecha_hora (ISO); el texto relativo se calcula aquí
+        if (!notification.fecha_hora) {
+            return notification.tiempo_transcurrido || '';
+        }
+
+        const seconds = Math.max(0, Math.floor((Date.now() - new Date(notification.fecha_hora).getTime()) / 1000));
+        const days = Math.floor(seconds / 86400);
+        const hours = Math.floor(seconds / 3600);
+        const minutes = Math.floor(seconds / 60);
+
+        if (days > 0) return `hace ${days} día${days > 1 ? 's' : ''}`;
+        if (hours > 0) return `hace ${hours} hora${hours > 1 ? 's' : ''}`;
+        if (minutes > 0) return `hace ${minutes} minuto${minutes > 1 ? 's' : ''}`;
+        return 'hace unos segundos';
+    }
+
     loadNotifications(notifications) {
         this.notifications = notifications;
         this.updateNotificationsList();
@@ -220,6 +317,7 @@ class NotificationSystem {
     handleNotificationClick(notification) {
         // Marcar como leída
         this.markAsRead(notification.id);
+        this.requestNotificationData(notification);
 
         // Redirigir si tiene URL de acción
         if (notification.url_accion) {
@@ -335,7 +433,7 @@ class NotificationSystem {
                 <div class="flex-grow-1">
                     <h6 class="small mb-1">${notification.titulo || 'Notificación'}</h6>
                     <small class="mb-1 d-block text-body">${notification.mensaje}</small>
-                    <small class="text-muted">${notification.tiempo_transcurrido}</small>
+                    <small class="text-muted">${this.timeAgo(notification)}</small>
                 </div>
                 <div class="flex-shrink-0 dropdown-notifications-actions">
                     ${!notification.leida ? `
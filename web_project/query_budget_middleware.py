@@ -0,0 +1,88 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """Registra las consultas SQL ejecutadas dentro del bloque `with`.
+
+    Usa `execute_wrapper`, así que funciona también con DEBUG=False.
+    `repeated` cuenta las consultas cuyo SQL (sin parámetros) ya se había
+    ejecutado: es la firma de un N+1.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._record))
+        return self
+
+    def __exit__(self, *exc):
+        self._stack.close()
+
+    def _record(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def repeated(self):
+        return sum(n - 1 for n in Counter(sql for sql, _ in self.queries).values())
+
+    @property
+    def db_time_ms(self):
+        return sum(duration for _, duration in self.queries) * 1000
+
+    def most_repeated(self, limit=3):
+        return [
+            (sql, n) for sql, n in Counter(sql for sql, _ in self.queries).most_common(limit) if n > 1
+        ]
+
+
+class QueryBudgetMiddleware:
+    """Mide consultas, SQL repetido y tiempo de base de datos por petición (desarrollo/CI).
+
+    Agrega las cabeceras X-Query-Count, X-Query-Repeated y X-Query-Time-Ms y
+    registra un warning cuando la petición supera QUERY_BUDGET_MAX_QUERIES o
+    QUERY_BUDGET_MAX_REPEATED. Solo se activa con QUERY_BUDGET_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.max_queries = getattr(settings, 'QUERY_BUDGET_MAX_QUERIES', 50)
+        self.max_repeated = getattr(settings, 'QUERY_BUDGET_MAX_REPEATED', 10)
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = recorder.count
+        response['X-Query-Repeated'] = recorder.repeated
+        response['X-Query-Time-Ms'] = f'{recorder.db_time_ms:.1f}'
+
+        if recorder.count > self.max_queries or recorder.repeated > self.max_repeated:
+            logger.warning(
+                f"Presupuesto de consultas excedido en {request.method} {request.path}: "
+                f"{recorder.count} consultas, {recorder.repeated} repetidas, {recorder.db_time_ms:.1f} ms. "
+                f"Más repetidas: {[(sql[:120], n) for sql, n in recorder.most_repeated()]}"
+            )
+        return response